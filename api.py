@@ -0,0 +1,318 @@
+"""
+Local HTTP API over the controllers, for tools that need the same data as the GUI.
+
+Usage: python api.py [--host 127.0.0.1] [--port 8080] [--cache-ttl-ms 2000]
+
+Endpoints (JSON in and out; <entity> is companies, departments, employees or roles):
+    GET    /health
+    GET    /<entity>?page_size=100&after=<id>&total=1&fields=name,email   (or projection=list)
+    GET    /<entity>/search?q=text&limit=20&fields=...
+    GET    /<entity>/<id>?fields=...
+    POST   /<entity>                  one object, or a list inserted in batches
+    PATCH  /<entity>/<id>             fields to $set ("password" is hashed for employees)
+    DELETE /<entity>/<id>[?cascade=1] cascade only for companies and departments
+    GET    /reports/headcounts
+
+Lists are keyset-paginated on _id: pass the returned next_after as ?after= for the next page.
+GET responses carry ETag and Last-Modified and answer If-None-Match / If-Modified-Since
+with 304. Identical GETs within --cache-ttl-ms are served from memory; any write through
+the API empties that cache, writes from elsewhere show up once it expires.
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import sys
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from utils.cache import LRUCache
+from utils.projections import check_public_projection
+
+logger = logging.getLogger(__name__)
+
+# Controller module and singular name per entity, as in cli.py
+ENTITIES = {
+    "companies": ("controllers.companies_controller", "company"),
+    "departments": ("controllers.departments_controller", "department"),
+    "employees": ("controllers.employees_controller", "employee"),
+    "roles": ("controllers.roles_controller", "role"),
+}
+CASCADES = {"companies": "delete_company_cascade", "departments": "delete_department_cascade"}
+MAX_PAGE_SIZE = 1000
+
+
+class ApiError(Exception):
+    """An error that maps directly onto an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _controller(entity, name):
+    module_name, singular = ENTITIES[entity]
+    return getattr(importlib.import_module(module_name), name.format(entity=entity, singular=singular))
+
+
+def _projection(entity, params):
+    """The projection asked for in the query string; secret fields and views are a 400."""
+    if params.get("fields"):
+        return check_public_projection(entity, [field for field in params["fields"].split(",") if field])
+    return check_public_projection(entity, params.get("projection"))
+
+
+def _int_param(params, name, default, maximum=None):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if value <= 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be positive")
+    return min(value, maximum) if maximum else value
+
+
+class ApiServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the database and the response caches shared by all requests."""
+    daemon_threads = True
+
+    def __init__(self, address, db, cache_ttl_ms=2000):
+        super().__init__(address, ApiHandler)
+        self.db = db
+        # Hot GET responses; None turns the short-lived cache off
+        self.responses = LRUCache(maxsize=2048, ttl=cache_ttl_ms / 1000) if cache_ttl_ms > 0 else None
+        # ETag and Last-Modified per URL, kept after the response expires so an unchanged
+        # body keeps its Last-Modified across recomputations
+        self.validators = LRUCache(maxsize=8192, ttl=None)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients don't pay a TCP handshake per request
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, keep-alive clients stall ~40 ms on each
+    disable_nagle_algorithm = True
+    server_version = "ManagementSystemAPI/1.0"
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    # Routing
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        params = dict(parse_qsl(url.query))
+        return url, parts, params
+
+    def _entity(self, parts):
+        if not parts or parts[0] not in ENTITIES:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Unknown resource")
+        return parts[0]
+
+    def do_GET(self):
+        self._handle(self._get, cacheable=True)
+
+    def do_HEAD(self):
+        self._handle(self._get, cacheable=True, head=True)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_PATCH(self):
+        self._handle(self._patch)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def _handle(self, action, cacheable=False, head=False):
+        try:
+            url, parts, params = self._route()
+            if cacheable:
+                self._send_cacheable(url, lambda: action(parts, params), head)
+                return
+            try:
+                status, payload = action(parts, params)
+            finally:
+                if self.server.responses is not None:
+                    # Writes made through the API (even partly failed ones) show up on the next GET
+                    self.server.responses.clear()
+            self._send_json(status, payload)
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except Exception as e:
+            logger.exception("Request %s %s failed", self.command, self.path)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    # Reads
+
+    def _get(self, parts, params):
+        db = self.server.db
+        if parts == ["health"]:
+            return {"status": "ok"}
+        if parts == ["reports", "headcounts"]:
+            from controllers.reports_controller import get_company_headcounts
+            return get_company_headcounts(db)
+
+        entity = self._entity(parts)
+        if len(parts) == 1:
+            return _controller(entity, "get_{entity}_page")(
+                db, _int_param(params, "page_size", 100, MAX_PAGE_SIZE), params.get("after"),
+                params.get("total") in ("1", "true"), projection=_projection(entity, params)
+            )
+        if parts[1:] == ["search"]:
+            return _controller(entity, "search_{entity}")(
+                db, params.get("q", ""), limit=_int_param(params, "limit", 20, MAX_PAGE_SIZE), projection=_projection(entity, params)
+            )
+        if len(parts) == 2:
+            document = _controller(entity, "get_{singular}_by_id")(db, parts[1], projection=_projection(entity, params))
+            if document is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No {ENTITIES[entity][1]} with ID {parts[1]}")
+            return document
+        raise ApiError(HTTPStatus.NOT_FOUND, "Unknown resource")
+
+    def _send_cacheable(self, url, compute, head):
+        key = (url.path, tuple(sorted(parse_qsl(url.query))))
+        responses, validators = self.server.responses, self.server.validators
+
+        entry = responses.get(key) if responses is not None else None
+        cache_status = "HIT" if entry is not None else "MISS"
+        if entry is None:
+            body = json.dumps(compute(), default=str).encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            previous = validators.get(key)
+            last_modified = previous[1] if previous and previous[0] == etag else time.time()
+            entry = (body, etag, last_modified)
+            validators.set(key, (etag, last_modified))
+            if responses is not None:
+                responses.set(key, entry)
+
+        body, etag, last_modified = entry
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            # Clients may keep the body but must revalidate before reusing it
+            "Cache-Control": "no-cache",
+            "X-Cache": cache_status,
+        }
+        if self._not_modified(etag, last_modified):
+            self._send(HTTPStatus.NOT_MODIFIED, b"", headers)
+        else:
+            self._send(HTTPStatus.OK, body, {"Content-Type": "application/json", **headers}, head=head)
+
+    def _not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # If-None-Match wins over If-Modified-Since when both are sent
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    # Writes
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b"null")
+        except json.JSONDecodeError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+
+    def _post(self, parts, params):
+        from controllers.batch_controller import insert_batch
+        entity = self._entity(parts)
+        if len(parts) != 1:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Unknown resource")
+        body = self._read_json()
+        rows = body if isinstance(body, list) else [body]
+        report = insert_batch(self.server.db, entity, rows)
+        return (HTTPStatus.CREATED if report["inserted"] else HTTPStatus.BAD_REQUEST), report
+
+    def _patch(self, parts, params):
+        from controllers.batch_controller import update_batch
+        entity = self._entity(parts)
+        if len(parts) != 2:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Unknown resource")
+        body = self._read_json()
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Body must be an object")
+        report = update_batch(self.server.db, entity, [{**body, "_id": parts[1]}])
+        if report["errors"]:
+            return HTTPStatus.BAD_REQUEST, report
+        if not report["matched"]:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"No {ENTITIES[entity][1]} with ID {parts[1]}")
+        return HTTPStatus.OK, _controller(entity, "get_{singular}_by_id")(self.server.db, parts[1])
+
+    def _delete(self, parts, params):
+        entity = self._entity(parts)
+        if len(parts) != 2:
+            raise ApiError(HTTPStatus.NOT_FOUND, "Unknown resource")
+        if params.get("cascade") in ("1", "true"):
+            if entity not in CASCADES:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"cascade is only supported for {', '.join(CASCADES)}")
+            from controllers import cascade_controller
+            counts = getattr(cascade_controller, CASCADES[entity])(self.server.db, parts[1])
+            if not counts[entity]:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"No {ENTITIES[entity][1]} with ID {parts[1]}")
+            return HTTPStatus.OK, counts
+
+        from controllers.batch_controller import delete_batch
+        report = delete_batch(self.server.db, entity, [parts[1]])
+        if report["errors"]:
+            return HTTPStatus.BAD_REQUEST, report
+        if not report["deleted"]:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"No {ENTITIES[entity][1]} with ID {parts[1]}")
+        return HTTPStatus.OK, report
+
+    # Responses
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, default=str).encode("utf-8"), {"Content-Type": "application/json"})
+
+    def _send(self, status, body, headers, head=False):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head:
+            self.wfile.write(body)
+
+
+def serve(db, host="127.0.0.1", port=8080, cache_ttl_ms=2000):
+    """Create the server; call serve_forever() on it (it listens once created)."""
+    return ApiServer((host, port), db, cache_ttl_ms)
+
+
+def main(argv=None):
+    from config.settings import get_settings
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings["api_host"])
+    parser.add_argument("--port", type=int, default=settings["api_port"])
+    parser.add_argument("--cache-ttl-ms", type=int, default=settings["api_cache_ttl_ms"], help="0 turns the response cache off")
+    args = parser.parse_args(argv)
+
+    from config.db_config import get_client
+    server = serve(get_client()[settings["database_name"]], args.host, args.port, args.cache_ttl_ms)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Throughput benchmark for the HTTP API: requests/second and latency under concurrent clients.
+
+Usage:
+    python -m benchmarks.bench_api --backend mongomock --size 10000
+    python -m benchmarks.bench_api --backend mongod --uri mongodb://localhost:27017 --size 100000 --clients 16
+
+The API server runs in-process on a free port against a freshly seeded database. Every
+scenario is run with the response cache off and on; the revalidate scenario sends the
+ETag from a first response, so it measures 304 handling. Results go to a JSON report.
+"""
+import argparse
+import http.client
+import json
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from api import serve
+from benchmarks.bench_controllers import _connect, _git_commit, _percentile, seed
+
+
+def _scenarios(data, rng):
+    """Request factories per scenario: each returns (path, headers) for the next request."""
+    pick = lambda name: str(rng.choice(data[name])["_id"])
+    return {
+        "list_page": lambda etags: ("/employees?page_size=100", {}),
+        "list_page_fields": lambda etags: ("/employees?page_size=100&fields=name,email", {}),
+        "get_by_id": lambda etags: (f"/employees/{pick('employees')}", {}),
+        "hot_by_id": lambda etags: (f"/employees/{data['employees'][0]['_id']}", {}),
+        "revalidate": lambda etags: ("/employees?page_size=100", {"If-None-Match": etags["/employees?page_size=100"]}),
+    }
+
+
+def _client(port, make_request, etags, deadline, samples, statuses, lock):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    local_samples, local_statuses = [], {}
+    while time.perf_counter() < deadline:
+        path, headers = make_request(etags)
+        started = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        local_samples.append((time.perf_counter() - started) * 1000)
+        local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+    connection.close()
+    with lock:
+        samples.extend(local_samples)
+        for status, count in local_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+def measure(port, make_request, etags, clients, seconds):
+    """Run `clients` keep-alive connections against the server for `seconds`."""
+    samples, statuses, lock = [], {}, threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=_client, args=(port, make_request, etags, deadline, samples, statuses, lock))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(samples),
+        "requests_per_sec": round(len(samples) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(samples), 3) if samples else None,
+        "p50_ms": round(_percentile(samples, 0.50), 3) if samples else None,
+        "p95_ms": round(_percentile(samples, 0.95), 3) if samples else None,
+        "p99_ms": round(_percentile(samples, 0.99), 3) if samples else None,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def run(backend, uri, size, clients, seconds, cache_ttl_ms, seed_value):
+    rng = random.Random(seed_value)
+    db = _connect(backend, uri)
+    data = seed(db, size, seed_value)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "backend": backend,
+        "size": size,
+        "clients": clients,
+        "seconds_per_scenario": seconds,
+        "results": {},
+    }
+
+    for label, ttl in (("cache_off", 0), ("cache_on", cache_ttl_ms)):
+        server = serve(db, port=0, cache_ttl_ms=ttl)
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # The revalidate scenario needs the current validator of its URL
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", "/employees?page_size=100")
+        response = connection.getresponse()
+        response.read()
+        etags = {"/employees?page_size=100": response.getheader("ETag")}
+        connection.close()
+
+        report["results"][label] = {}
+        for name, make_request in _scenarios(data, rng).items():
+            result = measure(port, make_request, etags, clients, seconds)
+            report["results"][label][name] = result
+            print(f"{label:<10} {name:<18} {result['requests_per_sec']:>9} req/s  p95={result['p95_ms']} ms", file=sys.stderr)
+
+        server.shutdown()
+        server.server_close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("mongomock", "mongod"), default="mongomock")
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="mongod URI (mongod backend only)")
+    parser.add_argument("--size", type=int, default=10000, help="employees to seed")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent keep-alive connections")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each scenario")
+    parser.add_argument("--cache-ttl-ms", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_api_output.json")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("controllers.reports_controller").setLevel(logging.ERROR)
+    report = run(args.backend, args.uri, args.size, args.clients, args.seconds, args.cache_ttl_ms, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Latency and memory benchmark for the controller functions at several collection sizes.
+
+Usage:
+    python -m benchmarks.bench_controllers --backend mongomock --sizes 1000,10000
+    python -m benchmarks.bench_controllers --backend mongod --uri mongodb://localhost:27017 --sizes 1000,100000,1000000
+
+For every size the benchmark database is reseeded, each controller function is called
+repeatedly, and p50/p95/p99 latency plus the peak memory of one traced call are written
+to a JSON report that can be diffed across commits.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# A cheap bcrypt cost keeps add_employee about the database, not the hash
+os.environ.setdefault("MS_BCRYPT_ROUNDS", "4")
+
+from controllers.companies_controller import get_all_companies, get_company_by_id, add_company, edit_company
+from controllers.departments_controller import get_all_departments, get_department_by_id, add_department, edit_department
+from controllers.employees_controller import get_all_employees, get_employee_by_id, add_employee, edit_employee
+from controllers.roles_controller import get_all_roles, get_role_by_id, add_role, edit_role
+from utils.cache import documents_cache
+from utils.seeder import seed_database
+
+BENCH_DATABASE = "management_system_bench"
+
+
+def _connect(backend, uri):
+    if backend == "mongomock":
+        import mongomock
+        return mongomock.MongoClient()[BENCH_DATABASE]
+    from pymongo import MongoClient
+    client = MongoClient(uri)
+    client.drop_database(BENCH_DATABASE)
+    return client[BENCH_DATABASE]
+
+
+def seed(db, size, seed_value):
+    """Reseed the database with about `size` employees and a proportional hierarchy above them."""
+    for name in ("companies", "departments", "roles", "employees"):
+        db[name].delete_many({})
+    documents_cache.clear()
+
+    companies = max(1, size // 500)
+    departments_per_company = 10
+    seed_database(db, companies=companies, departments_per_company=departments_per_company, roles_per_department=5,
+                  employees_per_department=max(1, size // (companies * departments_per_company)), seed=seed_value)
+
+    # Only the IDs are kept, to pick random targets for the point operations
+    return {name: list(db[name].find({}, {"_id": 1})) for name in ("companies", "departments", "roles", "employees")}
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, iterations):
+    """Time `iterations` calls of func() and trace the memory of one extra call."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(_percentile(samples, 0.50), 3),
+        "p95_ms": round(_percentile(samples, 0.95), 3),
+        "p99_ms": round(_percentile(samples, 0.99), 3),
+        "max_ms": round(max(samples), 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def _cases(db, data, rng):
+    """Controller calls to benchmark, as (name, zero-argument callable, is_full_scan)."""
+    pick = lambda name: str(rng.choice(data[name])["_id"])
+
+    def uncached(func, name):
+        # Clear the read-through cache first so the database round trip is what gets measured
+        def call():
+            documents_cache.clear()
+            func(db, pick(name))
+        return call
+
+    department_id = pick("departments")
+    company_id = pick("companies")
+    counter = iter(range(10**9))
+    return [
+        ("get_all_companies", lambda: get_all_companies(db), True),
+        ("get_all_departments", lambda: get_all_departments(db), True),
+        ("get_all_roles", lambda: get_all_roles(db), True),
+        ("get_all_employees", lambda: get_all_employees(db), True),
+        ("get_company_by_id", uncached(get_company_by_id, "companies"), False),
+        ("get_department_by_id", uncached(get_department_by_id, "departments"), False),
+        ("get_role_by_id", uncached(get_role_by_id, "roles"), False),
+        ("get_employee_by_id", uncached(get_employee_by_id, "employees"), False),
+        ("get_employee_by_id_cached", lambda: get_employee_by_id(db, data["employees"][0]["_id"]), False),
+        ("add_company", lambda: add_company(db, f"Bench {next(counter)}", "0212345678", "bench@company.com", "Giza"), False),
+        ("add_department", lambda: add_department(db, f"Bench {next(counter)}", "Bench", company_id), False),
+        ("add_role", lambda: add_role(db, f"Bench {next(counter)}", "Bench", department_id), False),
+        ("add_employee", lambda: add_employee(db, "Bench Employee", f"bench{next(counter)}@example.com", "secret",
+                                              "Egyptian", "01012345678", department_id), False),
+        ("edit_company", lambda: edit_company(db, pick("companies"), {"location": f"Loc {next(counter)}"}), False),
+        ("edit_department", lambda: edit_department(db, pick("departments"), {"description": f"D {next(counter)}"}), False),
+        ("edit_role", lambda: edit_role(db, pick("roles"), {"description": f"D {next(counter)}"}), False),
+        ("edit_employee", lambda: edit_employee(db, pick("employees"), {"nationality": f"N {next(counter)}"}), False),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(backend, uri, sizes, iterations, scan_iterations, seed_value):
+    rng = random.Random(seed_value)
+    db = _connect(backend, uri)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "backend": backend,
+        "seed": seed_value,
+        "sizes": {},
+    }
+
+    for size in sizes:
+        started = time.perf_counter()
+        data = seed(db, size, seed_value)
+        results = {"seed_seconds": round(time.perf_counter() - started, 2), "operations": {}}
+        for name, func, full_scan in _cases(db, data, rng):
+            results["operations"][name] = measure(func, scan_iterations if full_scan else iterations)
+            print(f"size={size:>8} {name:<28} p50={results['operations'][name]['p50_ms']:>9} ms", file=sys.stderr)
+        report["sizes"][str(size)] = results
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("mongomock", "mongod"), default="mongomock")
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="mongod URI (mongod backend only)")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="comma-separated employee counts")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per point operation")
+    parser.add_argument("--scan-iterations", type=int, default=5, help="calls per get_all_* operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args(argv)
+
+    # The headcount summaries are refreshed on every write; their warnings would drown the output
+    logging.getLogger("controllers.reports_controller").setLevel(logging.ERROR)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = run(args.backend, args.uri, sizes, args.iterations, args.scan_iterations, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the old model round trip on list reads with the raw-document path and slotted models.
+
+Usage: python -m benchmarks.bench_models [rows]
+Needs no database: the documents are synthesized the way the driver returns them.
+"""
+import json
+import sys
+import time
+import tracemalloc
+from bson import ObjectId
+from models.employees_model import Employee
+
+
+class _DictEmployee:
+    """The Employee model as it was before __slots__, kept here only for comparison."""
+
+    def __init__(self, name, email, phone_number, department_id, hashed_password, nationality, employee_id=None):
+        self.employee_id = employee_id
+        self.name = name
+        self.email = email
+        self.phone_number = phone_number
+        self.department_id = department_id
+        self.hashed_password = hashed_password
+        self.nationality = nationality
+
+
+def _documents(rows):
+    department_id = ObjectId()
+    return [{
+        "_id": ObjectId(),
+        "name": f"Employee {i}",
+        "email": f"employee{i}@example.com",
+        "phone_number": f"0100{i:07d}",
+        "department_id": department_id,
+        "hashed_password": "$2b$12$" + "x" * 53,
+        "nationality": "Egyptian",
+    } for i in range(rows)]
+
+
+def _measure(label, func):
+    """Run func once, returning its wall time and the peak memory it allocated."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"case": label, "seconds": round(seconds, 4), "peak_mb": round(peak / 2**20, 2)}
+
+
+def run(rows):
+    documents = _documents(rows)
+    fields = ("name", "email", "phone_number", "department_id", "hashed_password", "nationality")
+    return [
+        # What get_all_employees used to do for every row
+        _measure("round_trip", lambda: [Employee.from_dict(doc).to_dict() for doc in documents]),
+        # What it does now: hand the driver's documents over untouched
+        _measure("raw", lambda: list(documents)),
+        _measure("objects_with_dict", lambda: [
+            _DictEmployee(*(doc[field] for field in fields), employee_id=doc["_id"]) for doc in documents
+        ]),
+        _measure("objects_with_slots", lambda: [
+            Employee(*(doc[field] for field in fields), employee_id=doc["_id"]) for doc in documents
+        ]),
+    ]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(json.dumps({"rows": count, "results": run(count)}, indent=2))
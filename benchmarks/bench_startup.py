@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark: how long `import app` takes and how long until the main menu is drawn.
+
+Usage:
+    python -m benchmarks.bench_startup [--repeats 10] [--max-import-ms 300] [--output startup.json]
+
+Every measurement runs in a fresh interpreter so nothing is already imported. The run fails
+(exit status 1) if importing app loads any of the heavy modules the menu defers, or if the
+median import time is over --max-import-ms, so it can guard against regressions in CI.
+The time-to-menu measurement needs a display and is skipped without one.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the menu must not need before it is on screen
+DEFERRED_MODULES = (
+    "pymongo", "bcrypt", "bson",
+    "controllers", "models",
+    "views.companies_view", "views.departments_view", "views.employees_view",
+    "views.roles_view", "views.diagnostics_view",
+)
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000, "modules": sorted(sys.modules)}))
+"""
+
+# The parent passes its wall clock just before launching, so interpreter start-up is included
+_MENU_PROBE = """
+import json, os, sys, time
+launched = float(sys.argv[1])
+import tkinter
+try:
+    from views.main_menu import build_main_menu
+    root = build_main_menu()
+    root.update()
+except tkinter.TclError as e:
+    print(json.dumps({"error": str(e)}))
+else:
+    print(json.dumps({"menu_ms": (time.time() - launched) * 1000}))
+    root.destroy()
+sys.stdout.flush()
+# Skip waiting for the background connection attempt
+os._exit(0)
+"""
+
+
+def _run_probe(code, *args):
+    completed = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Probe failed: {completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _summary(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def _deferred_loaded(modules):
+    return sorted(
+        module for module in modules
+        if any(module == name or module.startswith(name + ".") for name in DEFERRED_MODULES)
+    )
+
+
+def run(repeats):
+    """Measure import and time-to-menu over `repeats` fresh interpreters."""
+    import_samples = []
+    loaded = []
+    for _ in range(repeats):
+        result = _run_probe(_IMPORT_PROBE)
+        import_samples.append(result["import_ms"])
+        loaded = _deferred_loaded(result["modules"])
+
+    report = {"import_app": _summary(import_samples), "deferred_modules_loaded": loaded, "time_to_menu": None}
+
+    menu_samples = []
+    for _ in range(repeats):
+        result = _run_probe(_MENU_PROBE, repr(time.time()))
+        if "error" in result:
+            report["time_to_menu"] = {"skipped": result["error"]}
+            break
+        menu_samples.append(result["menu_ms"])
+    if menu_samples:
+        report["time_to_menu"] = _summary(menu_samples)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="fail if the median import is slower")
+    parser.add_argument("--output", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeats)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if report["deferred_modules_loaded"]:
+        failures.append("importing app loaded " + ", ".join(report["deferred_modules_loaded"]))
+    if args.max_import_ms is not None and report["import_app"]["median_ms"] > args.max_import_ms:
+        failures.append(f"median import {report['import_app']['median_ms']} ms is over {args.max_import_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Headless command line for scripts and scheduled jobs; never imports tkinter.
+
+Usage:
+    python cli.py companies list [--fields name,email] [--limit 100] [--format csv] [--output companies.csv]
+    python cli.py employees get 65f0c0ffee... [...]
+    python cli.py roles search "engineer"
+    python cli.py departments add --input departments.csv
+    python cli.py companies add --set name=Acme --set email=info@acme.com --set phone_number=0100 --set location=Cairo
+    python cli.py employees edit --input changes.jsonl
+    python cli.py employees edit 65f0c0ffee... --set nationality=Egyptian
+    python cli.py departments delete --input ids.txt [--cascade] [--archive]
+    python cli.py employees export employees.csv.gz
+    python cli.py employees import new_hires.csv
+    python cli.py employees verify someone@acme.com
+    python cli.py passwords mark-stale
+    python cli.py reports refresh [--company ID]
+    python cli.py references normalize
+    python cli.py indexes sync [--drop-extra]
+    python cli.py replica sync [--reseed] [--collection employees]
+    python cli.py replica status
+
+Input files are CSV, JSON (an array or one object), JSONL or plain text with one ID per line
+(delete only), chosen by extension or --input-format; "-" reads stdin. Multi-row add, edit
+and delete go through the batch controller: one bulk write per chunk, not one per row.
+Reports go to stdout as JSON; the exit status is 1 when any row failed.
+"""
+import argparse
+import csv
+import getpass
+import importlib
+import json
+import os
+import sys
+from itertools import chain, islice
+
+# Controller module and function names per entity; modules are imported only when used
+ENTITIES = {
+    "companies": ("controllers.companies_controller", "company"),
+    "departments": ("controllers.departments_controller", "department"),
+    "employees": ("controllers.employees_controller", "employee"),
+    "roles": ("controllers.roles_controller", "role"),
+}
+CASCADES = {"companies": "delete_company_cascade", "departments": "delete_department_cascade"}
+
+
+def _controller(entity, name):
+    module_name, singular = ENTITIES[entity]
+    return getattr(importlib.import_module(module_name), name.format(entity=entity, singular=singular))
+
+
+def _connect():
+    from config.db_config import get_database
+    return get_database()
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    formats = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".txt": "text"}
+    if extension not in formats:
+        raise ValueError(f"Cannot detect the format of {path}; pass --input-format")
+    return formats[extension]
+
+
+def read_rows(path, fmt=None):
+    """Yield the rows of an input file (or stdin for "-") one at a time."""
+    fmt = _detect_format(path, fmt) if path != "-" else (fmt or "jsonl")
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        elif fmt == "json":
+            data = json.load(stream)
+            yield from (data if isinstance(data, list) else [data])
+        elif fmt == "jsonl":
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        elif fmt == "text":
+            for line in stream:
+                if line.strip():
+                    yield line.strip()
+        else:
+            raise ValueError(f"Unknown input format {fmt!r}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def write_rows(rows, fmt, fields, output):
+    """Stream documents to output as JSON (an array), JSONL or CSV; CSV columns default to the first row's."""
+    if fmt == "csv":
+        if fields is None:
+            rows = iter(rows)
+            first = next(rows, None)
+            fields = list(first) if first else []
+            rows = chain([first], rows) if first else rows
+        writer = csv.DictWriter(output, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({field: row.get(field, "") for field in fields})
+        return
+    separator = "[\n" if fmt == "json" else ""
+    for row in rows:
+        output.write(separator + json.dumps(row, default=str))
+        separator = ",\n" if fmt == "json" else "\n"
+    if fmt == "json":
+        output.write("[]\n" if separator == "[\n" else "\n]\n")
+    elif separator:
+        output.write("\n")
+
+
+def _set_pairs(pairs):
+    row = {}
+    for pair in pairs or []:
+        field, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"--set expects field=value, got {pair!r}")
+        row[field] = value
+    return row
+
+
+def _fields(args):
+    """The --fields list, rejecting secret fields such as the password hash."""
+    from utils.projections import check_public_projection
+    return check_public_projection(args.entity, args.fields.split(",")) if args.fields else None
+
+
+def _print_report(report):
+    print(json.dumps(report, indent=2, default=str))
+    return 1 if report.get("errors") else 0
+
+
+def cmd_list(db, args):
+    from controllers.export_controller import EXPORTS
+    fields = _fields(args)
+    batches = _controller(args.entity, "iter_{entity}")(db, args.batch_size, projection=fields)
+    rows = (row for batch in batches for row in batch)
+    if args.limit:
+        rows = islice(rows, args.limit)
+    if not args.output:
+        write_rows(rows, args.format, fields or EXPORTS[args.entity][1], sys.stdout)
+        return 0
+    with open(args.output, "w", newline="", encoding="utf-8") as output:
+        write_rows(rows, args.format, fields or EXPORTS[args.entity][1], output)
+    return 0
+
+
+def cmd_get(db, args):
+    get_by_id = _controller(args.entity, "get_{singular}_by_id")
+    status = 0
+    rows = []
+    for document_id in args.ids:
+        try:
+            document = get_by_id(db, document_id)
+        except ValueError as e:
+            document = None
+            print(f"{document_id}: {e}", file=sys.stderr)
+        if document is None:
+            status = 1
+        else:
+            rows.append(document)
+    write_rows(rows, args.format, None, sys.stdout)
+    return status
+
+
+def cmd_search(db, args):
+    rows = _controller(args.entity, "search_{entity}")(db, args.text, limit=args.limit)
+    write_rows(rows, args.format, None, sys.stdout)
+    return 0
+
+
+def cmd_add(db, args):
+    from controllers.batch_controller import insert_batch
+    rows = read_rows(args.input, args.input_format) if args.input else [_set_pairs(args.set)]
+    return _print_report(insert_batch(db, args.entity, rows, args.batch_size))
+
+
+def cmd_edit(db, args):
+    from controllers.batch_controller import update_batch
+    if args.input:
+        rows = read_rows(args.input, args.input_format)
+    else:
+        if not args.id:
+            raise ValueError("edit needs an ID and --set, or --input")
+        rows = [{"_id": args.id, **_set_pairs(args.set)}]
+    return _print_report(update_batch(db, args.entity, rows, args.batch_size))
+
+
+def cmd_delete(db, args):
+    ids = list(args.ids)
+    if args.input:
+        ids.extend(row.get("_id") if isinstance(row, dict) else row for row in read_rows(args.input, args.input_format))
+
+    if not args.cascade:
+        from controllers.batch_controller import delete_batch
+        return _print_report(delete_batch(db, args.entity, ids, args.batch_size))
+
+    if args.entity not in CASCADES:
+        raise ValueError(f"--cascade is only supported for {', '.join(CASCADES)}")
+    from controllers import cascade_controller
+    cascade = getattr(cascade_controller, CASCADES[args.entity])
+    report = {"rows": len(ids), "deleted": {}, "errors": []}
+    for row_number, document_id in enumerate(ids, start=1):
+        try:
+            for collection, count in cascade(db, document_id, archive=args.archive).items():
+                report["deleted"][collection] = report["deleted"].get(collection, 0) + count
+        except (ValueError, RuntimeError) as e:
+            report["errors"].append({"row": row_number, "error": str(e)})
+    return _print_report(report)
+
+
+def cmd_export(db, args):
+    from controllers.export_controller import export_collection
+    fields = _fields(args)
+    written = export_collection(db, args.entity, args.path, fmt=args.export_format, fields=fields)
+    print(json.dumps({"path": args.path, "rows": written}))
+    return 0
+
+
+def cmd_import(db, args):
+    from controllers.import_controller import import_employees
+    return _print_report(import_employees(db, args.path, fmt=args.input_format, chunk_size=args.batch_size))
+
+
+def cmd_verify(db, args):
+    from controllers.employees_controller import verify_employee_password
+    # The prompt goes to the terminal, so piped output stays valid JSON
+    raw_password = getpass.getpass() if sys.stdin.isatty() else sys.stdin.readline().rstrip("\n")
+    # Waits for a rehash of a weak hash, which would be lost when the process exits
+    employee = verify_employee_password(db, args.email, raw_password, wait=True)
+    print(json.dumps({"email": args.email, "valid": employee is not None}))
+    return 0 if employee is not None else 1
+
+
+def cmd_mark_stale(db, args):
+    from utils.passwords import mark_stale_hashes
+    print(json.dumps({"flagged": mark_stale_hashes(db, args.rounds)}))
+    return 0
+
+
+def cmd_reports(db, args):
+    from controllers.reports_controller import refresh_headcounts, get_company_headcounts
+    refresh_headcounts(db, args.company)
+    write_rows(get_company_headcounts(db), args.format, None, sys.stdout)
+    return 0
+
+
+def cmd_references(db, args):
+    from controllers.batch_controller import normalize_references
+    from controllers.reports_controller import refresh_headcounts
+    converted = normalize_references(db, args.batch_size)
+    if any(converted.values()):
+        refresh_headcounts(db)
+    print(json.dumps({"converted": converted}, indent=2))
+    return 0
+
+
+def cmd_indexes(db, args):
+    from models.indexes import sync_indexes, format_report
+    result = sync_indexes(db, drop_extra=args.drop_extra)
+    print(format_report(result))
+    return 1 if any(entry["errors"] or entry["conflicts"] for entry in result.values()) else 0
+
+
+def cmd_replica(db, args):
+    from utils.replica import COLLECTIONS, get_replica
+    replica = get_replica()
+    if replica is None:
+        raise ValueError("No local replica configured; set replica_path or MS_REPLICA_PATH")
+    if args.command == "sync":
+        pulled = {collection: replica.sync(collection, reseed=args.reseed) for collection in (args.collection or COLLECTIONS)}
+        print(json.dumps({"pulled": pulled}, indent=2))
+    else:
+        print(json.dumps(replica.stats(), indent=2))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=("json", "jsonl", "csv"), default="json", help="output format for list/get/search/reports")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per bulk write or cursor batch")
+    # The same options are accepted after the command too; SUPPRESS keeps a value given
+    # before it from being reset to the default
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("--format", choices=("json", "jsonl", "csv"), default=argparse.SUPPRESS, help="output format for list/get/search/reports")
+    options.add_argument("--batch-size", type=int, default=argparse.SUPPRESS, help="rows per bulk write or cursor batch")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    for entity in ENTITIES:
+        entity_parser = groups.add_parser(entity, help=f"manage {entity}")
+        entity_parser.set_defaults(entity=entity)
+        commands = entity_parser.add_subparsers(dest="command", required=True)
+
+        command = commands.add_parser("list", parents=[options], help=f"stream every {entity[:-1]}")
+        command.add_argument("--fields", help="comma-separated fields to fetch")
+        command.add_argument("--limit", type=int)
+        command.add_argument("--output", help="write to this file instead of stdout")
+        command.set_defaults(handler=cmd_list)
+
+        command = commands.add_parser("get", parents=[options], help="fetch by ID")
+        command.add_argument("ids", nargs="+")
+        command.set_defaults(handler=cmd_get)
+
+        command = commands.add_parser("search", parents=[options], help="full-text search")
+        command.add_argument("text")
+        command.add_argument("--limit", type=int, default=20)
+        command.set_defaults(handler=cmd_search)
+
+        for name, handler in (("add", cmd_add), ("edit", cmd_edit)):
+            command = commands.add_parser(name, parents=[options], help=f"{name} one row (--set) or many (--input)")
+            if name == "edit":
+                command.add_argument("id", nargs="?")
+            command.add_argument("--input", help="CSV/JSON/JSONL file, or - for stdin")
+            command.add_argument("--input-format", choices=("csv", "json", "jsonl"))
+            command.add_argument("--set", action="append", metavar="FIELD=VALUE")
+            command.set_defaults(handler=handler)
+
+        command = commands.add_parser("delete", parents=[options], help="delete by ID")
+        command.add_argument("ids", nargs="*")
+        command.add_argument("--input", help="file of IDs (text, or rows with _id)")
+        command.add_argument("--input-format", choices=("csv", "json", "jsonl", "text"))
+        if entity in CASCADES:
+            command.add_argument("--cascade", action="store_true", help="also delete everything that belongs to it")
+            command.add_argument("--archive", action="store_true", help="copy cascaded documents to *_archive first")
+        command.set_defaults(handler=cmd_delete, cascade=False, archive=False)
+
+        command = commands.add_parser("export", parents=[options], help="stream the whole collection to a file")
+        command.add_argument("path")
+        command.add_argument("--fields")
+        command.add_argument("--export-format", choices=("csv", "jsonl"))
+        command.set_defaults(handler=cmd_export)
+
+        if entity == "employees":
+            command = commands.add_parser("import", parents=[options], help="bulk import from CSV/JSONL")
+            command.add_argument("path")
+            command.add_argument("--input-format", choices=("csv", "jsonl"))
+            command.set_defaults(handler=cmd_import)
+
+            command = commands.add_parser("verify", parents=[options], help="check a password (read from the terminal or stdin)")
+            command.add_argument("email")
+            command.set_defaults(handler=cmd_verify)
+
+    command = groups.add_parser("passwords", help="password hashes").add_subparsers(dest="command", required=True)
+    stale = command.add_parser("mark-stale", parents=[options], help="flag hashes weaker than the configured work factor")
+    stale.add_argument("--rounds", type=int, help="work factor to compare against (default: bcrypt_rounds)")
+    stale.set_defaults(handler=cmd_mark_stale)
+
+    command = groups.add_parser("reports", help="headcount summaries").add_subparsers(dest="command", required=True)
+    refresh = command.add_parser("refresh", parents=[options], help="rebuild the summaries and print them")
+    refresh.add_argument("--company")
+    refresh.set_defaults(handler=cmd_reports)
+
+    command = groups.add_parser("references", help="parent references").add_subparsers(dest="command", required=True)
+    command.add_parser("normalize", parents=[options], help="convert references stored as strings to ObjectIds").set_defaults(handler=cmd_references)
+
+    command = groups.add_parser("indexes", help="declared indexes").add_subparsers(dest="command", required=True)
+    sync = command.add_parser("sync", parents=[options], help="create missing indexes")
+    sync.add_argument("--drop-extra", action="store_true")
+    sync.set_defaults(handler=cmd_indexes)
+
+    command = groups.add_parser("replica", help="local read replica").add_subparsers(dest="command", required=True)
+    sync = command.add_parser("sync", parents=[options], help="pull changes since the last sync")
+    sync.add_argument("--reseed", action="store_true", help="copy everything again instead of pulling changes")
+    sync.add_argument("--collection", action="append", choices=("companies", "departments", "roles", "employees"))
+    sync.set_defaults(handler=cmd_replica)
+    command.add_parser("status", parents=[options], help="documents held and freshness per collection").set_defaults(handler=cmd_replica)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(_connect(), args)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        # Summary refreshes still waiting on their timers run before the clients go away
+        from config.db_config import close_client
+        from controllers import async_reports_controller, reports_controller
+        from utils.event_loop import run
+        reports_controller.flush_refreshes()
+        run(async_reports_controller.flush_refreshes())
+        close_client()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import threading
+import time
+from datetime import datetime, timezone
+import bson
+from pymongo import monitoring
+
+# Bucket upper bounds in milliseconds, growing by 25% from 50µs to about a minute
+_BUCKET_BOUNDS = [0.05 * 1.25 ** i for i in range(64)]
+
+# Name of the controller function running in the current thread, for attributing commands
+current_operation = contextvars.ContextVar("current_operation", default=None)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram; percentiles are accurate to one bucket (about 25%)."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, duration_ms):
+        self.buckets[bisect.bisect_left(_BUCKET_BOUNDS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return min(_BUCKET_BOUNDS[index], self.max_ms) if index < len(_BUCKET_BOUNDS) else self.max_ms
+        return self.max_ms
+
+
+class _Stats:
+    __slots__ = ("histogram", "errors", "bytes_returned")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.bytes_returned = 0
+
+
+class MetricsRegistry:
+    """Latency, error and byte counters keyed by operation name, shared by every thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.started_at = datetime.now(timezone.utc)
+
+    def record(self, name, duration_ms, failed=False, bytes_returned=0):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _Stats()
+            stats.histogram.record(duration_ms)
+            stats.errors += failed
+            stats.bytes_returned += bytes_returned
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.started_at = datetime.now(timezone.utc)
+
+    def snapshot(self):
+        """Return a JSON-friendly summary of every operation seen so far."""
+        with self._lock:
+            operations = {}
+            for name, stats in sorted(self._stats.items()):
+                histogram = stats.histogram
+                operations[name] = {
+                    "count": histogram.count,
+                    "errors": stats.errors,
+                    "mean_ms": round(histogram.total_ms / histogram.count, 3) if histogram.count else 0.0,
+                    "p50_ms": round(histogram.percentile(0.50), 3),
+                    "p95_ms": round(histogram.percentile(0.95), 3),
+                    "p99_ms": round(histogram.percentile(0.99), 3),
+                    "max_ms": round(histogram.max_ms, 3),
+                    "bytes_returned": stats.bytes_returned,
+                }
+            return {"since": self.started_at.isoformat(), "operations": operations}
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+metrics = MetricsRegistry()
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Records every MongoDB command as "command:<name>" and, when it ran inside an
+    instrumented controller, also as "<controller> > <name>".
+
+    Command events are published on the thread that issued the command, which is what
+    makes the controller context variable usable here.
+
+    Measuring a reply means encoding it again, so only one reply in reply_size_sample_rate
+    is measured and counted that many times; 0 turns byte counting off.
+    """
+
+    def __init__(self, reply_size_sample_rate=20):
+        self.reply_size_sample_rate = reply_size_sample_rate
+        # next() on a count is atomic under the GIL, so listener threads can share it
+        self._replies = itertools.count()
+
+    def started(self, event):
+        pass
+
+    def _estimated_reply_size(self, reply):
+        rate = self.reply_size_sample_rate
+        if rate <= 0 or next(self._replies) % rate:
+            return 0
+        try:
+            return len(bson.encode(reply)) * rate
+        except Exception:
+            return 0
+
+    def _names(self, command_name):
+        names = [f"command:{command_name}"]
+        operation = current_operation.get()
+        if operation:
+            names.append(f"{operation} > {command_name}")
+        return names
+
+    def succeeded(self, event):
+        reply_size = self._estimated_reply_size(event.reply)
+        for name in self._names(event.command_name):
+            metrics.record(name, event.duration_micros / 1000, bytes_returned=reply_size)
+
+    def failed(self, event):
+        for name in self._names(event.command_name):
+            metrics.record(name, event.duration_micros / 1000, failed=True)
+
+
+def instrumented(func):
+    """Time a controller function (sync or async) as "controller:<name>" and tag the commands it sends."""
+    name = func.__name__
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            # Each task has its own context, so concurrent calls don't tag each other's commands
+            token = current_operation.set(name)
+            started = time.perf_counter()
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                metrics.record(f"controller:{name}", (time.perf_counter() - started) * 1000, failed=failed)
+                current_operation.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_operation.set(name)
+        started = time.perf_counter()
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            metrics.record(f"controller:{name}", (time.perf_counter() - started) * 1000, failed=failed)
+            current_operation.reset(token)
+
+    return wrapper
@@ -0,0 +1,121 @@
+import importlib.util
+import json
+import os
+import threading
+
+# Defaults match the values that used to be hard-coded in db_config, except the connection
+# string: it holds credentials, so it must come from MS_MONGO_URI or the config file
+DEFAULTS = {
+    "mongo_uri": "",
+    "database_name": "management_system",
+    "max_pool_size": 50,
+    "min_pool_size": 2,
+    "connect_timeout_ms": 5000,
+    "server_selection_timeout_ms": 5000,
+    "socket_timeout_ms": 30000,
+    "compressors": ["zstd", "snappy", "zlib"],
+    "bcrypt_rounds": 12,
+    "hash_workers": 0,  # 0 means one worker per CPU
+    "command_monitoring": 1,
+    "reply_size_sample_rate": 20,  # measure one reply in N for the bytes-returned estimate; 0 turns it off
+    "slow_query_ms": 200,  # 0 turns the slow-query log off
+    "slow_query_log_file": "slow_queries.log",
+    "slow_query_explain": 1,
+    "api_host": "127.0.0.1",
+    "api_port": 8080,
+    "api_cache_ttl_ms": 2000,
+    "replica_path": "",  # SQLite file for the local read replica; empty turns it off
+    "replica_max_staleness_ms": 30000,
+    "replica_sync_overlap_ms": 5000,
+}
+
+# Environment variable that overrides each setting
+ENV_VARS = {
+    "mongo_uri": "MS_MONGO_URI",
+    "database_name": "MS_DATABASE_NAME",
+    "max_pool_size": "MS_MAX_POOL_SIZE",
+    "min_pool_size": "MS_MIN_POOL_SIZE",
+    "connect_timeout_ms": "MS_CONNECT_TIMEOUT_MS",
+    "server_selection_timeout_ms": "MS_SERVER_SELECTION_TIMEOUT_MS",
+    "socket_timeout_ms": "MS_SOCKET_TIMEOUT_MS",
+    "compressors": "MS_COMPRESSORS",
+    "bcrypt_rounds": "MS_BCRYPT_ROUNDS",
+    "hash_workers": "MS_HASH_WORKERS",
+    "command_monitoring": "MS_COMMAND_MONITORING",
+    "reply_size_sample_rate": "MS_REPLY_SIZE_SAMPLE_RATE",
+    "slow_query_ms": "MS_SLOW_QUERY_MS",
+    "slow_query_log_file": "MS_SLOW_QUERY_LOG_FILE",
+    "slow_query_explain": "MS_SLOW_QUERY_EXPLAIN",
+    "api_host": "MS_API_HOST",
+    "api_port": "MS_API_PORT",
+    "api_cache_ttl_ms": "MS_API_CACHE_TTL_MS",
+    "replica_path": "MS_REPLICA_PATH",
+    "replica_max_staleness_ms": "MS_REPLICA_MAX_STALENESS_MS",
+    "replica_sync_overlap_ms": "MS_REPLICA_SYNC_OVERLAP_MS",
+}
+
+CONFIG_FILE_ENV_VAR = "MS_CONFIG_FILE"
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
+# Python packages pymongo needs for each wire compressor; zlib ships with Python
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def _coerce(key, value):
+    """Convert a raw value from the environment or the config file to the type of its default."""
+    default = DEFAULTS[key]
+    if isinstance(default, list):
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(",") if item.strip()]
+        return list(value)
+    if isinstance(default, int):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Setting '{key}' must be an integer, got {value!r}")
+    return str(value)
+
+
+def available_compressors(compressors):
+    """Keep only the compressors whose Python package is installed, in order of preference."""
+    return [name for name in compressors
+            if name in _COMPRESSOR_MODULES and importlib.util.find_spec(_COMPRESSOR_MODULES[name]) is not None]
+
+
+def load_settings(config_file=None, environ=None):
+    """Build the settings from the defaults, then the JSON config file, then the environment."""
+    environ = os.environ if environ is None else environ
+    settings = dict(DEFAULTS)
+
+    config_file = config_file or environ.get(CONFIG_FILE_ENV_VAR) or DEFAULT_CONFIG_FILE
+    if os.path.exists(config_file):
+        with open(config_file, encoding="utf-8") as f:
+            file_settings = json.load(f)
+        unknown = set(file_settings) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown settings in {config_file}: {', '.join(sorted(unknown))}")
+        for key, value in file_settings.items():
+            settings[key] = _coerce(key, value)
+
+    for key, env_var in ENV_VARS.items():
+        if env_var in environ:
+            settings[key] = _coerce(key, environ[env_var])
+
+    if settings["min_pool_size"] > settings["max_pool_size"]:
+        raise ValueError("min_pool_size cannot be greater than max_pool_size")
+    if not 4 <= settings["bcrypt_rounds"] <= 31:
+        raise ValueError("bcrypt_rounds must be between 4 and 31")
+
+    return settings
+
+
+def get_settings():
+    """Return the process-wide settings, loading them on first use."""
+    global _settings
+    with _settings_lock:
+        if _settings is None:
+            _settings = load_settings()
+        return _settings
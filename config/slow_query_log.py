@@ -0,0 +1,143 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+from bson import json_util
+from pymongo import monitoring
+from config.monitoring import current_operation
+
+# Parts of a command worth logging and replaying under explain; findAndModify needs
+# update/remove/new/fields/upsert to be explained
+_QUERY_FIELDS = ("filter", "projection", "sort", "limit", "skip", "pipeline", "query", "key", "updates", "deletes", "hint",
+                 "collation", "update", "fields", "remove", "new", "upsert", "arrayFilters")
+# Commands the server can explain; $out/$merge pipelines are left out because they write
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+
+
+def _summarize_explain(explain):
+    """Pull the numbers that tell a collection scan from an index scan out of an explain result."""
+    stats = explain.get("executionStats", {})
+    plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = []
+    while isinstance(plan, dict) and plan:
+        stages.append(plan.get("stage") or plan.get("queryPlan", {}).get("stage", "?"))
+        plan = plan.get("inputStage") or plan.get("queryPlan", {}).get("inputStage")
+    return {
+        "plan": " <- ".join(stage for stage in stages if stage),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+def _shape(value):
+    """Replace the values in a document with their type names, keeping the keys."""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shape(item) for item in value]
+    return type(value).__name__
+
+
+def _loggable(details):
+    """
+    A copy of the details safe to write to the log: the values an update writes (a new
+    password hash, say) are replaced by their shape. The original is kept for explain.
+    """
+    logged = dict(details)
+    if "update" in logged:
+        logged["update"] = _shape(logged["update"])
+    if "updates" in logged:
+        logged["updates"] = [{**statement, "u": _shape(statement.get("u"))} for statement in logged["updates"]]
+    return logged
+
+
+def _documents_returned(reply):
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if "value" in reply:
+        return 1 if reply["value"] else 0
+    return reply.get("n")
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    Logs every command slower than threshold_ms to a rotating file, then replays it under
+    explain("executionStats") on a background thread and logs the plan next to it.
+
+    The explain runs later on its own thread: listeners must never issue commands inline.
+    """
+
+    def __init__(self, threshold_ms, log_file, explain=True, max_bytes=5 * 2**20, backup_count=5):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.client = None  # set by db_config once the client exists
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+        self.logger = logging.getLogger("management_system.slow_queries")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+
+    def _key(self, event):
+        return event.request_id, event.connection_id
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        command = event.command
+        details = {
+            "command": event.command_name,
+            "database": event.database_name,
+            "collection": command.get(event.command_name),
+            "controller": current_operation.get(),
+        }
+        details.update({field: command[field] for field in _QUERY_FIELDS if field in command})
+        with self._lock:
+            self._pending[self._key(event)] = details
+
+    def succeeded(self, event):
+        with self._lock:
+            details = self._pending.pop(self._key(event), None)
+        duration_ms = event.duration_micros / 1000
+        if details is None or duration_ms < self.threshold_ms:
+            return
+
+        details["duration_ms"] = round(duration_ms, 3)
+        details["documents_returned"] = _documents_returned(event.reply)
+        self.logger.info("slow %s", json_util.dumps(_loggable(details)))
+
+        if self.explain and self.client is not None and self._can_explain(details):
+            self._executor.submit(self._explain, details)
+
+    def failed(self, event):
+        with self._lock:
+            self._pending.pop(self._key(event), None)
+
+    def _can_explain(self, details):
+        if details["command"] not in _EXPLAINABLE:
+            return False
+        pipeline = details.get("pipeline") or []
+        return not any("$out" in stage or "$merge" in stage for stage in pipeline)
+
+    def _explain(self, details):
+        command = {details["command"]: details["collection"]}
+        command.update({field: details[field] for field in _QUERY_FIELDS if field in details})
+        if details["command"] == "aggregate":
+            command["cursor"] = {}
+        try:
+            explain = self.client[details["database"]].command({"explain": command, "verbosity": "executionStats"})
+            summary = _summarize_explain(explain)
+            self.logger.info("explain %s", json_util.dumps({**summary, "command": details["command"],
+                                                            "collection": details["collection"],
+                                                            "controller": details["controller"],
+                                                            "winning_plan": explain.get("queryPlanner", {}).get("winningPlan")}))
+        except Exception as e:
+            self.logger.info("explain_failed %s", json_util.dumps({"collection": details["collection"], "error": str(e)}))
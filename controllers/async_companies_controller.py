@@ -0,0 +1,111 @@
+import asyncio
+from models.companies_model import Company
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.async_reports_controller import refresh_after_write
+from controllers.companies_controller import build_company
+from utils.cache import find_one_by_id_cached_async, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes_async
+from utils.replica import serving_replica_async
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page_async, iter_batches_async, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+
+# Coroutine versions of controllers.companies_controller; db is a database on the async client
+
+@instrumented
+async def get_companies_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of companies ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "companies")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_page, "companies", page_size, after, with_total, resolve_projection(projection, Company.PROJECTIONS))
+    return await fetch_page_async(db.companies, page_size, after, with_total, projection=resolve_projection(projection, Company.PROJECTIONS))
+
+async def iter_companies(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield companies in batches straight from the cursor."""
+    async for batch in iter_batches_async(db.companies, batch_size, projection=resolve_projection(projection, Company.PROJECTIONS)):
+        yield batch
+
+@instrumented
+async def get_all_companies(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "companies")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_all, "companies", resolve_projection(projection, Company.PROJECTIONS))
+    return [company async for batch in iter_companies(db, projection=projection) for company in batch]
+
+
+@instrumented
+async def search_companies(db, text, limit=20, projection=None):
+    """Full-text search on the companies text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Company.PROJECTIONS) or {}
+    try:
+        cursor = db.companies.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list()
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching companies: {e}")
+
+
+@instrumented
+async def get_company_by_id(db, company_id, projection=None):
+    if not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+
+    replica = await serving_replica_async(db, "companies")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_by_id, "companies", company_id, resolve_projection(projection, Company.PROJECTIONS))
+    company_data = await find_one_by_id_cached_async(db.companies, ObjectId(company_id))
+    return project_document(company_data, resolve_projection(projection, Company.PROJECTIONS))
+
+
+@instrumented
+async def add_company(db, name, phone_number, email, location):
+    company_data = build_company(name, phone_number, email, location)
+
+    try:
+        # insert_one fills in company_data["_id"], so this is the stored document
+        result = await db.companies.insert_one(stamp(company_data))
+        note_write("companies")
+        await refresh_after_write(db, result.inserted_id)
+        return company_data
+    except PyMongoError as e:
+        raise Exception(f"Failed to add company to the database: {e}")
+
+@instrumented
+async def edit_company(db, company_id, updated_data):
+    if not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+
+    # Returns the stored document after the update, or None when the company does not exist
+    company_data = await db.companies.find_one_and_update(
+        {"_id": ObjectId(company_id)},
+        {"$set": stamp(dict(updated_data))},
+        return_document=ReturnDocument.AFTER
+    )
+    note_write("companies")
+    invalidate_document(db.companies, ObjectId(company_id))
+    # The headcount summary carries the company name
+    if company_data and "name" in updated_data:
+        await refresh_after_write(db, company_id)
+    return company_data
+
+@instrumented
+async def delete_company(db, company_id):
+    if not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+
+    result = await db.companies.delete_one({"_id": ObjectId(company_id)})
+    if result.deleted_count:
+        await record_deletes_async(db, "companies", [ObjectId(company_id)])
+    invalidate_document(db.companies, ObjectId(company_id))
+    await refresh_after_write(db, company_id)
+    return result.deleted_count > 0
@@ -0,0 +1,137 @@
+import asyncio
+from models.departments_model import Department
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.async_reports_controller import refresh_after_move, refresh_after_write
+from controllers.departments_controller import build_department, department_update
+from utils.cache import find_one_by_id_cached_async, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes_async
+from utils.replica import serving_replica_async
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page_async, iter_batches_async, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+
+# Coroutine versions of controllers.departments_controller; db is a database on the async client
+
+@instrumented
+async def get_departments_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of departments ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "departments")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_page, "departments", page_size, after, with_total, resolve_projection(projection, Department.PROJECTIONS))
+    try:
+        return await fetch_page_async(db.departments, page_size, after, with_total, projection=resolve_projection(projection, Department.PROJECTIONS))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching departments: {e}")
+
+async def iter_departments(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield departments in batches straight from the cursor."""
+    try:
+        async for batch in iter_batches_async(db.departments, batch_size, projection=resolve_projection(projection, Department.PROJECTIONS)):
+            yield batch
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching departments: {e}")
+
+@instrumented
+async def get_all_departments(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "departments")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_all, "departments", resolve_projection(projection, Department.PROJECTIONS))
+    return [department async for batch in iter_departments(db, projection=projection) for department in batch]
+
+@instrumented
+async def search_departments(db, text, limit=20, projection=None):
+    """Full-text search on the departments text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Department.PROJECTIONS) or {}
+    try:
+        cursor = db.departments.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list()
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching departments: {e}")
+
+@instrumented
+async def get_department_by_id(db, department_id, projection=None):
+    if not ObjectId.is_valid(department_id):
+        raise ValueError("Invalid department ID")
+
+    try:
+        replica = await serving_replica_async(db, "departments")
+        if replica is not None:
+            return await asyncio.to_thread(replica.find_by_id, "departments", department_id, resolve_projection(projection, Department.PROJECTIONS))
+        department_data = await find_one_by_id_cached_async(db.departments, ObjectId(department_id))
+        return project_document(department_data, resolve_projection(projection, Department.PROJECTIONS))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching department with ID {department_id}: {e}")
+
+@instrumented
+async def add_department(db, name, description, company_id):
+    department_data = build_department(name, description, company_id)
+
+    try:
+        company_exists = await find_one_by_id_cached_async(db.companies, department_data["company_id"])
+        if not company_exists:
+            raise ValueError(f"Company with ID {company_id} does not exist")
+
+        # insert_one adds the _id to department_data
+        await db.departments.insert_one(stamp(department_data))
+        note_write("departments")
+        await refresh_after_write(db, company_id)
+        return department_data
+    except PyMongoError as e:
+        raise RuntimeError(f"Error adding new department: {e}")
+
+@instrumented
+async def edit_department(db, department_id, updated_data):
+    if not ObjectId.is_valid(department_id):
+        raise ValueError("Invalid department ID")
+    updated_data = department_update(updated_data)
+
+    try:
+        previous = None
+        if "company_id" in updated_data:
+            if not await find_one_by_id_cached_async(db.companies, updated_data["company_id"]):
+                raise ValueError(f"Company with ID {updated_data['company_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = await db.departments.find_one({"_id": ObjectId(department_id)}, {"company_id": 1})
+
+        # Returns the stored document after the update, or None when the department does not exist
+        department_data = await db.departments.find_one_and_update(
+            {"_id": ObjectId(department_id)},
+            {"$set": stamp(updated_data)},
+            return_document=ReturnDocument.AFTER
+        )
+        note_write("departments")
+        invalidate_document(db.departments, ObjectId(department_id))
+        if previous is not None and department_data is not None:
+            await refresh_after_move(db, "company_id", previous.get("company_id"), department_data["company_id"])
+        return department_data
+    except PyMongoError as e:
+        raise RuntimeError(f"Error updating department with ID {department_id}: {e}")
+
+@instrumented
+async def delete_department(db, department_id):
+    if not ObjectId.is_valid(department_id):
+        raise ValueError("Invalid department ID")
+
+    try:
+        # Remember the owning company so its summary can be refreshed after the delete
+        department = await find_one_by_id_cached_async(db.departments, ObjectId(department_id))
+        result = await db.departments.delete_one({"_id": ObjectId(department_id)})
+        if result.deleted_count:
+            await record_deletes_async(db, "departments", [ObjectId(department_id)])
+        invalidate_document(db.departments, ObjectId(department_id))
+        if department:
+            await refresh_after_write(db, department.get("company_id"))
+        return result.deleted_count > 0
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting department with ID {department_id}: {e}")
@@ -0,0 +1,154 @@
+import asyncio
+from models.employees_model import Employee
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.async_reports_controller import company_of_department, refresh_after_move, refresh_after_write
+from controllers.employees_controller import build_employee, employee_update
+from utils.cache import find_one_by_id_cached_async, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes_async
+from utils.replica import serving_replica_async
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page_async, iter_batches_async, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+from utils.passwords import submit_hash
+from utils.validators import to_object_id
+
+# Coroutine versions of controllers.employees_controller; db is a database on the async client
+
+@instrumented
+async def get_employees_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of employees ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "employees")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_page, "employees", page_size, after, with_total, resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    try:
+        return await fetch_page_async(db.employees, page_size, after, with_total, projection=resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching employees: {e}")
+
+async def iter_employees(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield employees in batches straight from the cursor."""
+    try:
+        async for batch in iter_batches_async(db.employees, batch_size, projection=resolve_projection(projection, Employee.PROJECTIONS, "list")):
+            yield batch
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching employees: {e}")
+
+@instrumented
+async def get_all_employees(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "employees")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_all, "employees", resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    return [emp async for batch in iter_employees(db, projection=projection) for emp in batch]
+
+@instrumented
+async def search_employees(db, text, limit=20, projection=None):
+    """Full-text search on the employees text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Employee.PROJECTIONS, "list") or {}
+    try:
+        cursor = db.employees.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list()
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching employees: {e}")
+
+@instrumented
+async def get_employee_by_id(db, employee_id, projection=None):
+    if not ObjectId.is_valid(employee_id):
+        raise ValueError("Invalid employee ID")
+
+    try:
+        replica = await serving_replica_async(db, "employees")
+        if replica is not None:
+            return await asyncio.to_thread(replica.find_by_id, "employees", employee_id, resolve_projection(projection, Employee.PROJECTIONS, "detail"))
+        employee_data = await find_one_by_id_cached_async(db.employees, ObjectId(employee_id))
+        return project_document(employee_data, resolve_projection(projection, Employee.PROJECTIONS, "detail"))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching employee with ID {employee_id}: {e}")
+
+@instrumented
+async def add_employee(db, name, email, raw_password, nationality, phone_number, department_id):
+    department_oid = to_object_id(department_id, "department")
+
+    try:
+        # The department check and the bcrypt hash don't depend on each other, so they overlap
+        department_exists, hashed_password = await asyncio.gather(
+            find_one_by_id_cached_async(db.departments, department_oid),
+            asyncio.wrap_future(submit_hash(raw_password)),
+        )
+        if not department_exists:
+            raise ValueError(f"Department with ID {department_id} does not exist")
+
+        employee_data = build_employee(name, email, hashed_password, nationality, phone_number, department_oid)
+
+        # insert_one adds the _id to employee_data
+        await db.employees.insert_one(stamp(employee_data))
+        note_write("employees")
+        await refresh_after_write(db, await company_of_department(db, department_id))
+
+        # Return the stored employee, without the password hash
+        return project_document(employee_data, Employee.PROJECTIONS["detail"])
+    except PyMongoError as e:
+        raise RuntimeError(f"Error adding new employee: {e}")
+
+
+@instrumented
+async def edit_employee(db, employee_id, updated_data):
+    """Update an employee; a plain "password" in updated_data is hashed in the process pool."""
+    if not ObjectId.is_valid(employee_id):
+        raise ValueError("Invalid employee ID")
+
+    updated_data, raw_password = employee_update(updated_data)
+    if raw_password:
+        # A fresh hash uses the current work factor, so the employee no longer needs a rehash
+        updated_data.update(hashed_password=await asyncio.wrap_future(submit_hash(raw_password)), password_rehash_required=False)
+
+    try:
+        previous = None
+        if "department_id" in updated_data:
+            if not await find_one_by_id_cached_async(db.departments, updated_data["department_id"]):
+                raise ValueError(f"Department with ID {updated_data['department_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = await db.employees.find_one({"_id": ObjectId(employee_id)}, {"department_id": 1})
+
+        # Returns the stored document after the update, or None when the employee does not exist
+        employee_data = await db.employees.find_one_and_update(
+            {"_id": ObjectId(employee_id)},
+            {"$set": stamp(updated_data)},
+            projection=Employee.PROJECTIONS["detail"],
+            return_document=ReturnDocument.AFTER
+        )
+        note_write("employees")
+        invalidate_document(db.employees, ObjectId(employee_id))
+        if previous is not None and employee_data is not None:
+            await refresh_after_move(db, "department_id", previous.get("department_id"), employee_data["department_id"])
+        return employee_data
+    except PyMongoError as e:
+        raise RuntimeError(f"Error updating employee with ID {employee_id}: {e}")
+
+@instrumented
+async def delete_employee(db, employee_id):
+    if not ObjectId.is_valid(employee_id):
+        raise ValueError("Invalid employee ID")
+
+    try:
+        # Remember the department so its company's summary can be refreshed after the delete
+        employee = await find_one_by_id_cached_async(db.employees, ObjectId(employee_id))
+        result = await db.employees.delete_one({"_id": ObjectId(employee_id)})
+        if result.deleted_count:
+            await record_deletes_async(db, "employees", [ObjectId(employee_id)])
+        invalidate_document(db.employees, ObjectId(employee_id))
+        if employee:
+            await refresh_after_write(db, await company_of_department(db, employee.get("department_id")))
+        return result.deleted_count > 0
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting employee with ID {employee_id}: {e}")
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.reports_controller import (
+    COMPANY_HEADCOUNTS, DEPARTMENT_HEADCOUNTS, REFRESH_DELAY, company_headcounts_pipeline, department_headcounts_pipeline,
+)
+from utils.cache import find_one_by_id_cached_async
+
+logger = logging.getLogger(__name__)
+
+# Companies waiting for a refresh and the loop timer that runs them; only touched from the
+# event-loop thread, so no lock is needed
+_pending_refreshes = {}
+_refresh_handle = None
+_refresh_tasks = set()
+
+
+async def refresh_headcounts(db, company_id=None):
+    """Async version of reports_controller.refresh_headcounts, on the same pipelines."""
+    if company_id is not None and not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+    company_oid = ObjectId(company_id) if company_id is not None else None
+    refreshed_at = datetime.now(timezone.utc)
+
+    try:
+        await db.departments.aggregate(department_headcounts_pipeline(company_oid, refreshed_at))
+        stale = {"refreshed_at": {"$lt": refreshed_at}}
+        if company_oid:
+            stale["company_id"] = company_oid
+        await db[DEPARTMENT_HEADCOUNTS].delete_many(stale)
+
+        await db.companies.aggregate(company_headcounts_pipeline(company_oid, refreshed_at))
+        stale = {"refreshed_at": {"$lt": refreshed_at}}
+        if company_oid:
+            stale["_id"] = company_oid
+        await db[COMPANY_HEADCOUNTS].delete_many(stale)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error refreshing headcounts: {e}")
+
+
+async def company_of_department(db, department_id):
+    """Return the company ID a department belongs to, or None if it is unknown."""
+    if not ObjectId.is_valid(department_id):
+        return None
+    department = await find_one_by_id_cached_async(db.departments, ObjectId(department_id))
+    company_id = department.get("company_id") if department else None
+    return company_id if company_id is not None and ObjectId.is_valid(company_id) else None
+
+
+async def refresh_after_write(db, company_id):
+    """Schedule a refresh of the touched company's summary, as reports_controller.refresh_after_write does."""
+    global _refresh_handle
+    if company_id is None:
+        return
+    _pending_refreshes[(db.name, str(company_id))] = db
+    if _refresh_handle is None:
+        _refresh_handle = asyncio.get_running_loop().call_later(REFRESH_DELAY, _start_flush)
+
+
+def _start_flush():
+    # The loop keeps only weak references to tasks
+    task = asyncio.ensure_future(flush_refreshes())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def flush_refreshes():
+    """Run the scheduled summary refreshes now; a failure here never fails the write."""
+    global _refresh_handle
+    if _refresh_handle is not None:
+        _refresh_handle.cancel()
+        _refresh_handle = None
+    pending = dict(_pending_refreshes)
+    _pending_refreshes.clear()
+    for (_, company_id), db in pending.items():
+        try:
+            await refresh_headcounts(db, company_id)
+        except (RuntimeError, ValueError) as e:
+            logger.warning("Headcount summary for company %s not refreshed: %s", company_id, e)
+
+
+async def refresh_after_move(db, parent_field, old_parent_id, new_parent_id):
+    """Refresh the summaries on both sides of an edit that moved a document to another parent."""
+    if old_parent_id == new_parent_id:
+        return
+    for parent_id in (old_parent_id, new_parent_id):
+        company_id = parent_id if parent_field == "company_id" else await company_of_department(db, parent_id)
+        await refresh_after_write(db, company_id)
+
+
+@instrumented
+async def get_company_headcounts(db):
+    """Return the precomputed departments/roles/employees counts per company."""
+    try:
+        return await db[COMPANY_HEADCOUNTS].find().sort("name", 1).to_list()
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching company headcounts: {e}")
@@ -0,0 +1,138 @@
+import asyncio
+from models.roles_model import Role
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.async_reports_controller import company_of_department, refresh_after_move, refresh_after_write
+from controllers.roles_controller import build_role, role_update
+from utils.cache import find_one_by_id_cached_async, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes_async
+from utils.replica import serving_replica_async
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page_async, iter_batches_async, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+
+# Coroutine versions of controllers.roles_controller; db is a database on the async client
+
+@instrumented
+async def get_roles_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of roles ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "roles")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_page, "roles", page_size, after, with_total, resolve_projection(projection, Role.PROJECTIONS))
+    try:
+        return await fetch_page_async(db.roles, page_size, after, with_total, projection=resolve_projection(projection, Role.PROJECTIONS))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching roles: {e}")
+
+async def iter_roles(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield roles in batches straight from the cursor."""
+    try:
+        async for batch in iter_batches_async(db.roles, batch_size, projection=resolve_projection(projection, Role.PROJECTIONS)):
+            yield batch
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching roles: {e}")
+
+@instrumented
+async def get_all_roles(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = await serving_replica_async(db, "roles")
+    if replica is not None:
+        return await asyncio.to_thread(replica.find_all, "roles", resolve_projection(projection, Role.PROJECTIONS))
+    return [role async for batch in iter_roles(db, projection=projection) for role in batch]
+
+@instrumented
+async def search_roles(db, text, limit=20, projection=None):
+    """Full-text search on the roles text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Role.PROJECTIONS) or {}
+    try:
+        cursor = db.roles.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return await cursor.to_list()
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching roles: {e}")
+
+@instrumented
+async def get_role_by_id(db, role_id, projection=None):
+    if not ObjectId.is_valid(role_id):
+        raise ValueError("Invalid role ID")
+
+    try:
+        replica = await serving_replica_async(db, "roles")
+        if replica is not None:
+            return await asyncio.to_thread(replica.find_by_id, "roles", role_id, resolve_projection(projection, Role.PROJECTIONS))
+        role_data = await find_one_by_id_cached_async(db.roles, ObjectId(role_id))
+        return project_document(role_data, resolve_projection(projection, Role.PROJECTIONS))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching role with ID {role_id}: {e}")
+
+@instrumented
+async def add_role(db, title, description, department_id):
+    role_data = build_role(title, description, department_id)
+
+    try:
+        # Check if the department exists
+        department_exists = await find_one_by_id_cached_async(db.departments, role_data["department_id"])
+        if not department_exists:
+            raise ValueError(f"Department with ID {department_id} does not exist")
+
+        # insert_one adds the _id to role_data
+        await db.roles.insert_one(stamp(role_data))
+        note_write("roles")
+        await refresh_after_write(db, await company_of_department(db, department_id))
+        return role_data
+    except PyMongoError as e:
+        raise RuntimeError(f"Error adding new role: {e}")
+
+@instrumented
+async def edit_role(db, role_id, updated_data):
+    if not ObjectId.is_valid(role_id):
+        raise ValueError("Invalid role ID")
+    updated_data = role_update(updated_data)
+
+    try:
+        previous = None
+        if "department_id" in updated_data:
+            if not await find_one_by_id_cached_async(db.departments, updated_data["department_id"]):
+                raise ValueError(f"Department with ID {updated_data['department_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = await db.roles.find_one({"_id": ObjectId(role_id)}, {"department_id": 1})
+
+        # Returns the stored document after the update, or None when the role does not exist
+        role_data = await db.roles.find_one_and_update(
+            {"_id": ObjectId(role_id)},
+            {"$set": stamp(updated_data)},
+            return_document=ReturnDocument.AFTER
+        )
+        note_write("roles")
+        invalidate_document(db.roles, ObjectId(role_id))
+        if previous is not None and role_data is not None:
+            await refresh_after_move(db, "department_id", previous.get("department_id"), role_data["department_id"])
+        return role_data
+    except PyMongoError as e:
+        raise RuntimeError(f"Error updating role with ID {role_id}: {e}")
+
+@instrumented
+async def delete_role(db, role_id):
+    if not ObjectId.is_valid(role_id):
+        raise ValueError("Invalid role ID")
+
+    try:
+        # Remember the department so its company's summary can be refreshed after the delete
+        role = await find_one_by_id_cached_async(db.roles, ObjectId(role_id))
+        result = await db.roles.delete_one({"_id": ObjectId(role_id)})
+        if result.deleted_count:
+            await record_deletes_async(db, "roles", [ObjectId(role_id)])
+        invalidate_document(db.roles, ObjectId(role_id))
+        if role:
+            await refresh_after_write(db, await company_of_department(db, role.get("department_id")))
+        return result.deleted_count > 0
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting role with ID {role_id}: {e}")
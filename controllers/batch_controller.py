@@ -0,0 +1,440 @@
+from itertools import islice
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from config.monitoring import instrumented
+from models.employees_model import Employee
+from controllers.import_controller import clean_employee_row
+from controllers.reports_controller import company_of_department, refresh_after_write
+from utils.cache import invalidate_document
+from utils.change_tracking import confirm_deleted, stamp, note_write, record_deletes
+from utils.passwords import hash_passwords
+
+DEFAULT_CHUNK_SIZE = 1000
+# Fields returned for stored documents; the password hash never leaves the database
+_RETURNED_FIELDS = {"employees": Employee.PROJECTIONS["detail"]}
+
+# Writable fields of each entity and the reference that ties it to its parent collection
+ENTITIES = {
+    "companies": {"required": ("name", "phone_number", "email", "location"), "optional": (), "parent": None},
+    "departments": {"required": ("name", "company_id"), "optional": ("description",), "parent": ("company_id", "companies")},
+    "roles": {"required": ("title", "department_id"), "optional": ("description",), "parent": ("department_id", "departments")},
+    "employees": {
+        "required": ("name", "email", "password", "nationality", "phone_number", "department_id"),
+        "optional": (),
+        "parent": ("department_id", "departments"),
+    },
+}
+
+
+def _entity(entity):
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity {entity!r}; expected one of {', '.join(ENTITIES)}")
+    return ENTITIES[entity]
+
+
+def _chunks(items, chunk_size):
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive integer")
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean_row(entity, row, partial=False):
+    """
+    Normalize one input row into the document to store; raises ValueError for bad rows.
+
+    With partial=True (updates) only the fields present are checked and returned, and a
+    plain "password" is passed through for hashing.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    spec = _entity(entity)
+    if entity == "employees" and not partial:
+        employee_data, raw_password = clean_employee_row(row)
+        return {**employee_data, "password": raw_password}
+
+    allowed = spec["required"] + spec["optional"]
+    unknown = [field for field in row if field not in allowed and field != "_id"]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    fields = [field for field in allowed if field in row] if partial else allowed
+    data = {field: str(row.get(field) or "").strip() for field in fields}
+    missing = [field for field in spec["required"] if field in data and not data[field]]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    if partial and not data:
+        raise ValueError("Nothing to update")
+
+    if spec["parent"]:
+        parent_field = spec["parent"][0]
+        if parent_field in data:
+            if not ObjectId.is_valid(data[parent_field]):
+                raise ValueError(f"Invalid {parent_field}: {data[parent_field]!r}")
+            data[parent_field] = ObjectId(data[parent_field])
+    if "phone_number" in data and not data["phone_number"].isdigit():
+        raise ValueError("Phone number must contain only digits.")
+    return data
+
+
+def _check_parents(db, entity, valid, report):
+    """Drop rows whose parent does not exist, using one $in query for the whole chunk."""
+    parent = _entity(entity)["parent"]
+    if not parent:
+        return valid
+    parent_field, parent_collection = parent
+    referenced_ids = list({data[parent_field] for _, data in valid if parent_field in data})
+    if not referenced_ids:
+        return valid
+    existing_ids = {doc["_id"] for doc in db[parent_collection].find({"_id": {"$in": referenced_ids}}, {"_id": 1})}
+
+    kept = []
+    for row_number, data in valid:
+        if parent_field in data and data[parent_field] not in existing_ids:
+            report["errors"].append({"row": row_number, "error": f"{parent_field} {data[parent_field]} does not exist"})
+        else:
+            kept.append((row_number, data))
+    return kept
+
+
+def _hash_chunk_passwords(valid):
+    """Replace plain passwords with bcrypt hashes, hashing the whole chunk in the process pool."""
+    with_password = [data for _, data in valid if "password" in data]
+    if with_password:
+        for data, hashed_password in zip(with_password, hash_passwords([data.pop("password") for data in with_password])):
+            data["hashed_password"] = hashed_password
+            # A fresh hash uses the current work factor
+            data["password_rehash_required"] = False
+
+
+def _owning_companies(db, entity, documents):
+    """Return the IDs of the companies whose headcounts the given documents count towards."""
+    if entity == "companies":
+        return {doc["_id"] for doc in documents}
+    if entity == "departments":
+        return {doc.get("company_id") for doc in documents}
+    departments = {doc.get("department_id") for doc in documents}
+    return {company_of_department(db, department_id) for department_id in departments}
+
+
+def _refresh(db, company_ids):
+    # One summary refresh per company at the end instead of one per written row
+    for company_id in company_ids:
+        refresh_after_write(db, company_id)
+
+
+def _record_write_errors(error, row_numbers, report):
+    """Map the errors of an unordered bulk write back to input rows; returns the failed op indexes."""
+    failed = set()
+    for write_error in error.details.get("writeErrors", []):
+        failed.add(write_error["index"])
+        report["errors"].append({"row": row_numbers[write_error["index"]], "error": write_error.get("errmsg", "Write failed")})
+    return failed
+
+
+@instrumented
+def insert_batch(db, entity, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Insert many rows of an entity with one insert_many per chunk.
+
+    Rows are validated like the add_* controllers, parent references are checked with one
+    query per chunk, and employee passwords are hashed in bulk. Returns a report with the
+    number of rows read and inserted, the new IDs and per-row errors (rows are numbered from 1).
+    """
+    report = {"rows": 0, "inserted": 0, "inserted_ids": [], "errors": []}
+    touched = set()
+    try:
+        for chunk in _chunks(enumerate(rows, start=1), chunk_size):
+            report["rows"] += len(chunk)
+            valid = []
+            for row_number, row in chunk:
+                try:
+                    valid.append((row_number, _clean_row(entity, row)))
+                except ValueError as e:
+                    report["errors"].append({"row": row_number, "error": str(e)})
+            valid = _check_parents(db, entity, valid, report)
+            if not valid:
+                continue
+            _hash_chunk_passwords(valid)
+
+            documents = [stamp(data) for _, data in valid]
+            failed = set()
+            try:
+                # Unordered so one bad document doesn't stop the rest of the chunk
+                db[entity].insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                failed = _record_write_errors(e, [row_number for row_number, _ in valid], report)
+            # insert_many fills in _id even for the documents the server rejected
+            inserted = [doc for index, doc in enumerate(documents) if index not in failed]
+            report["inserted"] += len(inserted)
+            report["inserted_ids"].extend(str(doc["_id"]) for doc in inserted)
+            touched |= _owning_companies(db, entity, inserted)
+            note_write(entity)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error inserting {entity}: {e}")
+
+    _refresh(db, touched)
+    return report
+
+
+@instrumented
+def update_batch(db, entity, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Apply many partial updates with one unordered bulk_write per chunk.
+
+    Every row needs an "_id" plus the fields to $set; an employee "password" is hashed.
+    Returns a report with the rows read, how many matched and were modified, and per-row errors.
+    """
+    spec = _entity(entity)
+    report = {"rows": 0, "matched": 0, "modified": 0, "errors": []}
+    touched = set()
+    try:
+        for chunk in _chunks(enumerate(rows, start=1), chunk_size):
+            report["rows"] += len(chunk)
+            valid = []
+            for row_number, row in chunk:
+                try:
+                    if not isinstance(row, dict) or not ObjectId.is_valid(row.get("_id")):
+                        raise ValueError("Row needs a valid _id")
+                    data = _clean_row(entity, row, partial=True)
+                    data["_id"] = ObjectId(row["_id"])
+                    valid.append((row_number, data))
+                except ValueError as e:
+                    report["errors"].append({"row": row_number, "error": str(e)})
+            valid = _check_parents(db, entity, valid, report)
+            if not valid:
+                continue
+            _hash_chunk_passwords(valid)
+
+            ids = [data.pop("_id") for _, data in valid]
+            if spec["parent"] and any(spec["parent"][0] in data for _, data in valid):
+                # Moving rows between parents changes headcounts on both sides
+                moved = db[entity].find({"_id": {"$in": ids}}, {spec["parent"][0]: 1})
+                touched |= _owning_companies(db, entity, list(moved))
+                touched |= _owning_companies(db, entity, [data for _, data in valid if spec["parent"][0] in data])
+            if entity == "companies":
+                # The headcount summary carries the company name
+                touched |= {_id for _id, (_, data) in zip(ids, valid) if "name" in data}
+
+            operations = [UpdateOne({"_id": _id}, {"$set": stamp(data)}) for _id, (_, data) in zip(ids, valid)]
+            try:
+                result = db[entity].bulk_write(operations, ordered=False)
+                report["matched"] += result.matched_count
+                report["modified"] += result.modified_count
+            except BulkWriteError as e:
+                report["matched"] += e.details.get("nMatched", 0)
+                report["modified"] += e.details.get("nModified", 0)
+                _record_write_errors(e, [row_number for row_number, _ in valid], report)
+            note_write(entity)
+            for _id in ids:
+                invalidate_document(db[entity], _id)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error updating {entity}: {e}")
+
+    _refresh(db, touched)
+    return report
+
+
+@instrumented
+def delete_batch(db, entity, ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Delete many documents by ID with one delete_many per chunk.
+
+    Children are left alone, like the single-row delete_* controllers; use the cascade
+    controller to remove them too. Returns a report with the IDs read, how many were
+    deleted and the invalid IDs.
+    """
+    _entity(entity)
+    report = {"rows": 0, "deleted": 0, "errors": []}
+    touched = set()
+    try:
+        for chunk in _chunks(enumerate(ids, start=1), chunk_size):
+            report["rows"] += len(chunk)
+            object_ids = []
+            for row_number, document_id in chunk:
+                if ObjectId.is_valid(document_id):
+                    object_ids.append(ObjectId(document_id))
+                else:
+                    report["errors"].append({"row": row_number, "error": f"Invalid ID: {document_id!r}"})
+            if not object_ids:
+                continue
+
+            # Read the parent references first so the right summaries are refreshed afterwards
+            parent = _entity(entity)["parent"]
+            projection = {parent[0]: 1} if parent else {"_id": 1}
+            existing = list(db[entity].find({"_id": {"$in": object_ids}}, projection))
+            touched |= _owning_companies(db, entity, existing)
+
+            result = db[entity].delete_many({"_id": {"$in": object_ids}})
+            report["deleted"] += result.deleted_count
+            record_deletes(db, entity, confirm_deleted(db[entity], [doc["_id"] for doc in existing], result.deleted_count))
+            for object_id in object_ids:
+                invalidate_document(db[entity], object_id)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting {entity}: {e}")
+
+    _refresh(db, touched)
+    return report
+
+
+def _change_result(change, error=None, document=None):
+    return {
+        "key": change.get("key"),
+        "op": change.get("op"),
+        "id": str(change["id"]) if change.get("id") is not None else None,
+        "ok": error is None,
+        "error": error,
+        "document": document,
+    }
+
+
+@instrumented
+def apply_changes(db, entity, changes):
+    """
+    Flush a unit of work of one entity: staged inserts, updates and deletes in one bulk_write.
+
+    Each change is {"key", "op": "insert" | "update" | "delete", "id", "data"}, with at most
+    one change per row. Rows are validated like insert_batch/update_batch, and the write is
+    unordered, so one failing row doesn't stop the others. Returns a report with one result
+    per change (in input order) carrying ok/error and, for inserts and updates, the stored
+    document, plus inserted/updated/deleted/failed counts.
+    """
+    spec = _entity(entity)
+    parent_field = spec["parent"][0] if spec["parent"] else None
+    results = {}
+    staged = []  # (key, change, data) for the rows that passed validation
+
+    for change in changes:
+        key, op = change.get("key"), change.get("op")
+        try:
+            if op not in ("insert", "update", "delete"):
+                raise ValueError(f"Unknown operation {op!r}")
+            if op != "insert" and not ObjectId.is_valid(change.get("id")):
+                raise ValueError("Invalid ID")
+            data = None
+            if op == "insert":
+                data = _clean_row(entity, change.get("data") or {})
+            elif op == "update":
+                data = _clean_row(entity, change.get("data") or {}, partial=True)
+            staged.append((key, change, data))
+        except ValueError as e:
+            results[key] = _change_result(change, error=str(e))
+
+    touched = set()
+    try:
+        # One $in query checks the parents of every staged row
+        report = {"errors": []}
+        with_data = _check_parents(db, entity, [(key, data) for key, _, data in staged if data is not None], report)
+        changes_by_key = {key: change for key, change, _ in staged}
+        for error in report["errors"]:
+            results[error["row"]] = _change_result(changes_by_key[error["row"]], error=error["error"])
+        staged = [(key, change, data) for key, change, data in staged if key not in results]
+        _hash_chunk_passwords(with_data)
+
+        # Parents of the rows being deleted or moved, so the right summaries are refreshed
+        moved_ids = [ObjectId(change["id"]) for _, change, data in staged
+                     if change["op"] == "delete" or (change["op"] == "update" and parent_field in data)]
+        existing_ids = set()
+        if moved_ids:
+            projection = {parent_field: 1} if parent_field else {"_id": 1}
+            moved = list(db[entity].find({"_id": {"$in": moved_ids}}, projection))
+            existing_ids = {doc["_id"] for doc in moved}
+            touched |= _owning_companies(db, entity, moved)
+
+        operations = []
+        for _, change, data in staged:
+            if change["op"] == "insert":
+                data["_id"] = ObjectId()
+                operations.append(InsertOne(stamp(data)))
+            elif change["op"] == "update":
+                operations.append(UpdateOne({"_id": ObjectId(change["id"])}, {"$set": stamp(data)}))
+            else:
+                operations.append(DeleteOne({"_id": ObjectId(change["id"])}))
+
+        failed = {}
+        removed = 0
+        if operations:
+            try:
+                removed = db[entity].bulk_write(operations, ordered=False).deleted_count
+            except BulkWriteError as e:
+                removed = e.details.get("nRemoved", 0)
+                failed = {write_error["index"]: write_error.get("errmsg", "Write failed") for write_error in e.details.get("writeErrors", [])}
+
+        written, deleted_ids = [], []
+        for index, (key, change, data) in enumerate(staged):
+            if index in failed:
+                results[key] = _change_result(change, error=failed[index])
+                continue
+            if change["op"] != "insert":
+                invalidate_document(db[entity], ObjectId(change["id"]))
+            if change["op"] == "delete":
+                results[key] = _change_result(change)
+                if ObjectId(change["id"]) in existing_ids:
+                    deleted_ids.append(ObjectId(change["id"]))
+            else:
+                written.append((key, change, data["_id"] if change["op"] == "insert" else ObjectId(change["id"])))
+        if deleted_ids:
+            record_deletes(db, entity, confirm_deleted(db[entity], deleted_ids, removed))
+        if operations:
+            note_write(entity)
+
+        # Read back what was stored in one query, so the caller can show it as is
+        stored = {}
+        if written:
+            cursor = db[entity].find({"_id": {"$in": [object_id for _, _, object_id in written]}}, _RETURNED_FIELDS.get(entity))
+            stored = {doc["_id"]: doc for doc in cursor}
+        for key, change, object_id in written:
+            document = stored.get(object_id)
+            if document is None:
+                results[key] = _change_result(change, error=f"ID {object_id} no longer exists in {entity}")
+            else:
+                results[key] = _change_result({**change, "id": object_id}, document=document)
+        touched |= _owning_companies(db, entity, list(stored.values()))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error applying changes to {entity}: {e}")
+
+    _refresh(db, touched)
+    ordered = [results[change.get("key")] for change in changes]
+    counts = {op: sum(1 for result in ordered if result["ok"] and result["op"] == op) for op in ("insert", "update", "delete")}
+    return {
+        "results": ordered,
+        "inserted": counts["insert"],
+        "updated": counts["update"],
+        "deleted": counts["delete"],
+        "failed": sum(1 for result in ordered if not result["ok"]),
+    }
+
+
+@instrumented
+def normalize_references(db, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Convert parent references stored as strings (by edits made before they were converted)
+    into ObjectIds, so lookups and cascades only need to match one type.
+
+    Returns the number of documents converted per entity; strings that are not valid IDs are left alone.
+    """
+    converted = {}
+    try:
+        for entity, spec in ENTITIES.items():
+            if not spec["parent"]:
+                continue
+            parent_field = spec["parent"][0]
+            converted[entity] = 0
+            cursor = db[entity].find({parent_field: {"$type": "string"}}, {parent_field: 1})
+            for chunk in _chunks(cursor, chunk_size):
+                valid = [doc for doc in chunk if ObjectId.is_valid(doc[parent_field])]
+                if not valid:
+                    continue
+                operations = [UpdateOne({"_id": doc["_id"]}, {"$set": stamp({parent_field: ObjectId(doc[parent_field])})}) for doc in valid]
+                converted[entity] += db[entity].bulk_write(operations, ordered=False).modified_count
+                for doc in valid:
+                    invalidate_document(db[entity], doc["_id"])
+            note_write(entity)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error converting references: {e}")
+    return converted
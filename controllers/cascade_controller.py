@@ -0,0 +1,143 @@
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import OperationFailure, PyMongoError
+from config.monitoring import instrumented
+from controllers.reports_controller import company_of_department, refresh_after_write
+from utils.cache import invalidate_document
+from utils.change_tracking import confirm_deleted, record_deletes
+
+# Keeps each $in list and bulk write to a reasonable size
+CHUNK_SIZE = 5000
+
+# Error code servers return for transactions outside a replica set or sharded cluster
+_ILLEGAL_OPERATION = 20
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _find_ids(collection, field, parent_ids, session):
+    ids = []
+    for chunk in _chunks(parent_ids):
+        cursor = collection.find({field: {"$in": chunk}}, {"_id": 1}, session=session)
+        ids.extend(doc["_id"] for doc in cursor)
+    return ids
+
+
+def _collect_department_descendants(db, department_ids, session):
+    return {
+        "departments": list(department_ids),
+        "roles": _find_ids(db.roles, "department_id", department_ids, session),
+        "employees": _find_ids(db.employees, "department_id", department_ids, session),
+    }
+
+
+def _remove(db, collection_name, ids, archive, session):
+    """Delete the documents with the given ids, copying them to <collection>_archive first if asked."""
+    deleted = 0
+    archived_at = datetime.now(timezone.utc)
+    for chunk in _chunks(ids):
+        query = {"_id": {"$in": chunk}}
+        documents = list(db[collection_name].find(query, None if archive else {"_id": 1}, session=session))
+        if archive and documents:
+            # Upserts keep a retried transaction from failing on documents archived by the first attempt
+            operations = [ReplaceOne({"_id": doc["_id"]}, {**doc, "archived_at": archived_at}, upsert=True) for doc in documents]
+            db[f"{collection_name}_archive"].bulk_write(operations, ordered=False, session=session)
+        count = db[collection_name].delete_many(query, session=session).deleted_count
+        deleted += count
+        # In the same transaction, so replicas never miss a cascaded delete; only documents
+        # that existed and are now gone get a tombstone
+        gone = confirm_deleted(db[collection_name], [doc["_id"] for doc in documents], count, session=session)
+        record_deletes(db, collection_name, gone, session=session)
+    return deleted
+
+
+def _run_in_transaction(db, work):
+    """Run work(session) inside a transaction when the deployment supports one, else without."""
+    try:
+        session = db.client.start_session()
+    except NotImplementedError:
+        # In-process stand-ins such as mongomock have no sessions
+        return work(None)
+
+    try:
+        with session:
+            return session.with_transaction(work)
+    except OperationFailure as e:
+        if e.code != _ILLEGAL_OPERATION:
+            raise
+    # Standalone servers have no transactions; fall back to plain (non-atomic) deletes
+    return work(None)
+
+
+def _cascade(db, collect, archive):
+    deleted_ids = {}
+
+    def work(session):
+        targets = collect(session)
+        counts = {}
+        # Children first, so an interrupted non-transactional run never leaves orphans behind
+        for collection_name in ("employees", "roles", "departments", "companies"):
+            ids = targets.get(collection_name, [])
+            counts[collection_name] = _remove(db, collection_name, ids, archive, session)
+        deleted_ids.update(targets)
+        return counts
+
+    counts = _run_in_transaction(db, work)
+    for collection_name, ids in deleted_ids.items():
+        for document_id in ids:
+            invalidate_document(db[collection_name], document_id)
+    return counts
+
+
+@instrumented
+def delete_company_cascade(db, company_id, archive=False):
+    """
+    Delete a company with all of its departments, and their roles and employees.
+
+    With archive=True the documents are copied to <collection>_archive before removal.
+    Returns the number of deleted documents per collection.
+    """
+    if not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+    company_oid = ObjectId(company_id)
+
+    def collect(session):
+        department_ids = _find_ids(db.departments, "company_id", [company_oid], session)
+        targets = _collect_department_descendants(db, department_ids, session)
+        targets["companies"] = [company_oid]
+        return targets
+
+    try:
+        counts = _cascade(db, collect, archive)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting company with ID {company_id}: {e}")
+    refresh_after_write(db, company_oid)
+    return counts
+
+
+@instrumented
+def delete_department_cascade(db, department_id, archive=False):
+    """
+    Delete a department with all of its roles and employees.
+
+    With archive=True the documents are copied to <collection>_archive before removal.
+    Returns the number of deleted documents per collection.
+    """
+    if not ObjectId.is_valid(department_id):
+        raise ValueError("Invalid department ID")
+    department_oid = ObjectId(department_id)
+
+    def collect(session):
+        return _collect_department_descendants(db, [department_oid], session)
+
+    company_id = company_of_department(db, department_oid)
+    try:
+        counts = _cascade(db, collect, archive)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error deleting department with ID {department_id}: {e}")
+    refresh_after_write(db, company_id)
+    return counts
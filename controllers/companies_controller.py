@@ -1,54 +1,120 @@
 from models.companies_model import Company
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
-def get_all_companies(db):
-    companies = db.companies.find()
+from config.monitoring import instrumented
+from controllers.reports_controller import refresh_after_write
+from utils.cache import find_one_by_id_cached, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes
+from utils.replica import serving_replica
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page, iter_batches, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
 
+@instrumented
+def get_companies_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of companies ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "companies")
+    if replica is not None:
+        return replica.find_page("companies", page_size, after, with_total, resolve_projection(projection, Company.PROJECTIONS))
+    return fetch_page(db.companies, page_size, after, with_total, projection=resolve_projection(projection, Company.PROJECTIONS))
+
+def iter_companies(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield companies in batches straight from the cursor."""
+    return iter_batches(db.companies, batch_size, projection=resolve_projection(projection, Company.PROJECTIONS))
+
+@instrumented
+def get_all_companies(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "companies")
+    if replica is not None:
+        return replica.find_all("companies", resolve_projection(projection, Company.PROJECTIONS))
     # Return the list of companies, including the _id field
-    return [company for company in companies]
+    return [company for batch in iter_companies(db, projection=projection) for company in batch]
+
+
+@instrumented
+def search_companies(db, text, limit=20, projection=None):
+    """Full-text search on the companies text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
 
+    fields = resolve_projection(projection, Company.PROJECTIONS) or {}
+    try:
+        cursor = db.companies.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return list(cursor)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching companies: {e}")
 
 
-def get_company_by_id(db, company_id):
+@instrumented
+def get_company_by_id(db, company_id, projection=None):
     if not ObjectId.is_valid(company_id):
         raise ValueError("Invalid company ID")
 
-    company_data = db.companies.find_one({"_id": ObjectId(company_id)})
-    return Company.from_dict(company_data).to_dict() if company_data else None
+    replica = serving_replica(db, "companies")
+    if replica is not None:
+        return replica.find_by_id("companies", company_id, resolve_projection(projection, Company.PROJECTIONS))
+    company_data = find_one_by_id_cached(db.companies, ObjectId(company_id))
+    # Raw document straight from the driver (or the cache), no model round trip
+    return project_document(company_data, resolve_projection(projection, Company.PROJECTIONS))
 
 
-def add_company(db, name, phone_number, email, location):
-    # Validate inputs
+def build_company(name, phone_number, email, location):
+    """Validate a new company and return the document to insert; shared with the async controller."""
     if not name.strip() or not phone_number.strip() or not email.strip() or not location.strip():
         raise ValueError("All fields are required and must not be empty.")
-    
+
     if not phone_number.isdigit():
         raise ValueError("Phone number must contain only digits.")
-    
+
+    return Company(name=name, phone_number=phone_number, email=email, location=location).to_dict()
+
+
+@instrumented
+def add_company(db, name, phone_number, email, location):
+    company_data = build_company(name, phone_number, email, location)
+
     try:
-        new_company = Company(name=name, phone_number=phone_number, email=email, location=location)
-        
-        result = db.companies.insert_one(new_company.to_dict())
-        
-        new_company.company_id = str(result.inserted_id)
+        # insert_one fills in company_data["_id"], so this is the stored document
+        result = db.companies.insert_one(stamp(company_data))
+        note_write("companies")
+        refresh_after_write(db, result.inserted_id)
         
-        return new_company.to_dict()  
+        return company_data
     except PyMongoError as e:
         raise Exception(f"Failed to add company to the database: {e}")
 
+@instrumented
 def edit_company(db, company_id, updated_data):
     if not ObjectId.is_valid(company_id):
         raise ValueError("Invalid company ID")
 
-    result = db.companies.update_one(
+    # Returns the stored document after the update, or None when the company does not exist
+    company_data = db.companies.find_one_and_update(
         {"_id": ObjectId(company_id)},
-        {"$set": updated_data}
+        {"$set": stamp(dict(updated_data))},
+        return_document=ReturnDocument.AFTER
     )
-    return result.modified_count > 0
+    note_write("companies")
+    invalidate_document(db.companies, ObjectId(company_id))
+    # The headcount summary carries the company name
+    if company_data and "name" in updated_data:
+        refresh_after_write(db, company_id)
+    return company_data
 
+@instrumented
 def delete_company(db, company_id):
     if not ObjectId.is_valid(company_id):
         raise ValueError("Invalid company ID")
 
     result = db.companies.delete_one({"_id": ObjectId(company_id)})
+    if result.deleted_count:
+        record_deletes(db, "companies", [ObjectId(company_id)])
+    invalidate_document(db.companies, ObjectId(company_id))
+    refresh_after_write(db, company_id)
     return result.deleted_count > 0
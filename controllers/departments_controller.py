@@ -1,53 +1,131 @@
-import tkinter as tk
-from tkinter import messagebox
 from models.departments_model import Department
+import sys
+import threading
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.reports_controller import refresh_after_move, refresh_after_write
+from utils.cache import find_one_by_id_cached, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes
+from utils.replica import serving_replica
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page, iter_batches, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+from utils.validators import to_object_id
 
 def show_error(title, message):
-    tk.Tk().withdraw()
-    messagebox.showerror(title, message)
+    # Tk may only be touched from the main thread; background callers report errors themselves
+    if threading.current_thread() is not threading.main_thread():
+        return
+    # Headless callers (the CLI, scheduled jobs) never load tkinter and only get the exception
+    if "tkinter" not in sys.modules:
+        return
+    import tkinter as tk
+    from tkinter import messagebox
+    # Reuse the application's root; creating a Tk() here would start a new Tcl interpreter
+    # per error, and without a root there is no window to show the dialog over
+    root = getattr(tk, "_default_root", None)
+    if root is None:
+        return
+    messagebox.showerror(title, message, parent=root)
 
-def get_all_departments(db):
+@instrumented
+def get_departments_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of departments ordered by _id, with the cursor for the next page."""
     try:
-        departments = db.departments.find()
-        return [Department(name=dept.get("name"), description=dept.get("description"), company_id=dept.get("company_id"), department_id=dept.get("_id")).to_dict() for dept in departments]
+        # Served from the local replica when one is configured and fresh enough
+        replica = serving_replica(db, "departments")
+        if replica is not None:
+            return replica.find_page("departments", page_size, after, with_total, resolve_projection(projection, Department.PROJECTIONS))
+        return fetch_page(db.departments, page_size, after, with_total, projection=resolve_projection(projection, Department.PROJECTIONS))
+    except ValueError as ve:
+        show_error("Validation Error", str(ve))
+        raise ve
+    except PyMongoError as e:
+        show_error("Database Error", f"Error fetching departments: {e}")
+        raise RuntimeError(f"Error fetching departments: {e}")
+
+def iter_departments(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield departments in batches straight from the cursor."""
+    try:
+        yield from iter_batches(db.departments, batch_size, projection=resolve_projection(projection, Department.PROJECTIONS))
     except PyMongoError as e:
         show_error("Database Error", f"Error fetching departments: {e}")
         raise RuntimeError(f"Error fetching departments: {e}")
 
-def get_department_by_id(db, department_id):
+@instrumented
+def get_all_departments(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "departments")
+    if replica is not None:
+        return replica.find_all("departments", resolve_projection(projection, Department.PROJECTIONS))
+    return [dept for batch in iter_departments(db, projection=projection) for dept in batch]
+
+@instrumented
+def search_departments(db, text, limit=20, projection=None):
+    """Full-text search on the departments text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Department.PROJECTIONS) or {}
+    try:
+        cursor = db.departments.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return list(cursor)
+    except PyMongoError as e:
+        show_error("Database Error", f"Error searching departments: {e}")
+        raise RuntimeError(f"Error searching departments: {e}")
+
+@instrumented
+def get_department_by_id(db, department_id, projection=None):
     if not ObjectId.is_valid(department_id):
         show_error("Invalid ID", "Invalid department ID")
         raise ValueError("Invalid department ID")
 
     try:
-        department_data = db.departments.find_one({"_id": ObjectId(department_id)})
-        return Department.from_dict(department_data).to_dict() if department_data else None
+        replica = serving_replica(db, "departments")
+        if replica is not None:
+            return replica.find_by_id("departments", department_id, resolve_projection(projection, Department.PROJECTIONS))
+        department_data = find_one_by_id_cached(db.departments, ObjectId(department_id))
+        # Raw document straight from the driver (or the cache), no model round trip
+        return project_document(department_data, resolve_projection(projection, Department.PROJECTIONS))
     except PyMongoError as e:
         show_error("Database Error", f"Error fetching department with ID {department_id}: {e}")
         raise RuntimeError(f"Error fetching department with ID {department_id}: {e}")
 
+def build_department(name, description, company_id):
+    """Validate a new department and return the document to insert; shared with the async controller."""
+    return {
+        "name": name,
+        "description": description,
+        "company_id": to_object_id(company_id, "company")  # Store company_id as ObjectId
+    }
+
+def department_update(updated_data):
+    """Copy of updated_data with company_id as an ObjectId; raises ValueError for a bad ID."""
+    updated_data = dict(updated_data)
+    if "company_id" in updated_data:
+        # The views send IDs as strings; references are always stored as ObjectIds
+        updated_data["company_id"] = to_object_id(updated_data["company_id"], "company")
+    return updated_data
+
+@instrumented
 def add_department(db, name, description, company_id):
     try:
         # Validate and check if the company exists
-        if not ObjectId.is_valid(company_id):
-            raise ValueError("Invalid company ID")
-
-        company_exists = db.companies.find_one({"_id": ObjectId(company_id)})
+        department_data = build_department(name, description, company_id)
+        company_exists = find_one_by_id_cached(db.companies, department_data["company_id"])
         if not company_exists:
             raise ValueError(f"Company with ID {company_id} does not exist")
 
-        # Create a dictionary for the new department
-        department_data = {
-            "name": name,
-            "description": description,
-            "company_id": ObjectId(company_id)  # Store company_id as ObjectId
-        }
-        
-        # Insert the department into the collection
-        result = db.departments.insert_one(department_data)
-        return str(result.inserted_id)
+        # Insert the department into the collection; insert_one adds the _id to department_data
+        db.departments.insert_one(stamp(department_data))
+        note_write("departments")
+        refresh_after_write(db, company_id)
+        return department_data
     except ValueError as ve:
         # Show a single error message for validation issues
         show_error("Validation Error", str(ve))
@@ -57,28 +135,54 @@ def add_department(db, name, description, company_id):
         raise RuntimeError(f"Error adding new department: {e}")
 
 
+@instrumented
 def edit_department(db, department_id, updated_data):
     if not ObjectId.is_valid(department_id):
         show_error("Invalid ID", "Invalid department ID")
         raise ValueError("Invalid department ID")
 
     try:
-        result = db.departments.update_one(
+        updated_data = department_update(updated_data)
+        previous = None
+        if "company_id" in updated_data:
+            if not find_one_by_id_cached(db.companies, updated_data["company_id"]):
+                raise ValueError(f"Company with ID {updated_data['company_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = db.departments.find_one({"_id": ObjectId(department_id)}, {"company_id": 1})
+
+        # Returns the stored document after the update, or None when the department does not exist
+        department_data = db.departments.find_one_and_update(
             {"_id": ObjectId(department_id)},
-            {"$set": updated_data}
+            {"$set": stamp(updated_data)},
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        note_write("departments")
+        invalidate_document(db.departments, ObjectId(department_id))
+        if previous is not None and department_data is not None:
+            refresh_after_move(db, "company_id", previous.get("company_id"), department_data["company_id"])
+        return department_data
+    except ValueError as ve:
+        show_error("Validation Error", str(ve))
+        raise ve
     except PyMongoError as e:
         show_error("Database Error", f"Error updating department with ID {department_id}: {e}")
         raise RuntimeError(f"Error updating department with ID {department_id}: {e}")
 
+@instrumented
 def delete_department(db, department_id):
     if not ObjectId.is_valid(department_id):
         show_error("Invalid ID", "Invalid department ID")
         raise ValueError("Invalid department ID")
 
     try:
+        # Remember the owning company so its summary can be refreshed after the delete
+        department = find_one_by_id_cached(db.departments, ObjectId(department_id))
         result = db.departments.delete_one({"_id": ObjectId(department_id)})
+        if result.deleted_count:
+            record_deletes(db, "departments", [ObjectId(department_id)])
+        invalidate_document(db.departments, ObjectId(department_id))
+        if department:
+            refresh_after_write(db, department.get("company_id"))
         return result.deleted_count > 0
     except PyMongoError as e:
         show_error("Database Error", f"Error deleting department with ID {department_id}: {e}")
@@ -1,77 +1,192 @@
+from models.employees_model import Employee
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
-from models.employees_model import Employee
-import bcrypt
+from config.monitoring import instrumented
+from controllers.reports_controller import company_of_department, refresh_after_move, refresh_after_write
+from utils.cache import find_one_by_id_cached, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes
+from utils.replica import serving_replica
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page, iter_batches, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+from utils.passwords import hash_password, check_password, rehash_if_needed
+from utils.validators import to_object_id
+
+@instrumented
+def get_employees_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of employees ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "employees")
+    if replica is not None:
+        return replica.find_page("employees", page_size, after, with_total, resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    try:
+        return fetch_page(db.employees, page_size, after, with_total, projection=resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching employees: {e}")
 
-def get_all_employees(db):
+def iter_employees(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield employees in batches straight from the cursor."""
     try:
-        employees = db.employees.find()
-        return [Employee.from_dict(emp).to_dict() for emp in employees]
+        yield from iter_batches(db.employees, batch_size, projection=resolve_projection(projection, Employee.PROJECTIONS, "list"))
     except PyMongoError as e:
         raise RuntimeError(f"Error fetching employees: {e}")
 
-def get_employee_by_id(db, employee_id):
+@instrumented
+def get_all_employees(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "employees")
+    if replica is not None:
+        return replica.find_all("employees", resolve_projection(projection, Employee.PROJECTIONS, "list"))
+    return [emp for batch in iter_employees(db, projection=projection) for emp in batch]
+
+@instrumented
+def search_employees(db, text, limit=20, projection=None):
+    """Full-text search on the employees text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Employee.PROJECTIONS, "list") or {}
+    try:
+        cursor = db.employees.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return list(cursor)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching employees: {e}")
+
+@instrumented
+def get_employee_by_id(db, employee_id, projection=None):
     if not ObjectId.is_valid(employee_id):
         raise ValueError("Invalid employee ID")
 
     try:
-        employee_data = db.employees.find_one({"_id": ObjectId(employee_id)})
-        return Employee.from_dict(employee_data).to_dict() if employee_data else None
+        replica = serving_replica(db, "employees")
+        if replica is not None:
+            return replica.find_by_id("employees", employee_id, resolve_projection(projection, Employee.PROJECTIONS, "detail"))
+        employee_data = find_one_by_id_cached(db.employees, ObjectId(employee_id))
+        # Raw document straight from the driver (or the cache), no model round trip
+        return project_document(employee_data, resolve_projection(projection, Employee.PROJECTIONS, "detail"))
     except PyMongoError as e:
         raise RuntimeError(f"Error fetching employee with ID {employee_id}: {e}")
 
+def build_employee(name, email, hashed_password, nationality, phone_number, department_id):
+    """The document to insert for a new employee; shared with the async controller."""
+    return {
+        "name": name,
+        "email": email,
+        "phone_number": phone_number,
+        "department_id": to_object_id(department_id, "department"),
+        "hashed_password": hashed_password,  # Store as string
+        "nationality": nationality
+    }
+
+def employee_update(updated_data):
+    """
+    Split updated_data into the fields to $set, with department_id as an ObjectId, and the
+    plain "password" to hash (None to keep the current hash). Raises ValueError for a bad ID.
+    """
+    updated_data = dict(updated_data)
+    raw_password = updated_data.pop("password", None) or None
+    if "department_id" in updated_data:
+        # The views send IDs as strings; references are always stored as ObjectIds
+        updated_data["department_id"] = to_object_id(updated_data["department_id"], "department")
+    return updated_data, raw_password
+
+@instrumented
 def add_employee(db, name, email, raw_password, nationality, phone_number, department_id):
-    if not ObjectId.is_valid(department_id):
-        raise ValueError("Invalid department ID")
+    department_oid = to_object_id(department_id, "department")
 
     try:
         # Check if the department exists
-        department_exists = db.departments.find_one({"_id": ObjectId(department_id)})
+        department_exists = find_one_by_id_cached(db.departments, department_oid)
         if not department_exists:
             raise ValueError(f"Department with ID {department_id} does not exist")
 
-        # Ensure the password is encoded before hashing
-        password_bytes = raw_password.encode('utf-8')
-        hashed_password = bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode('utf-8')  # Convert binary to string
-
-        # Create the employee dictionary with hashed password and department reference
-        employee_data = {
-            "name": name,
-            "email": email,
-            "phone_number": phone_number,
-            "department_id": ObjectId(department_id),
-            "hashed_password": hashed_password,  # Store as string
-            "nationality": nationality
-        }
-
-        # Insert the employee into the collection
-        result = db.employees.insert_one(employee_data)
+        # Hash with the configured work factor; stored as a string
+        employee_data = build_employee(name, email, hash_password(raw_password), nationality, phone_number, department_oid)
+
+        # Insert the employee into the collection; insert_one adds the _id to employee_data
+        db.employees.insert_one(stamp(employee_data))
+        note_write("employees")
+        refresh_after_write(db, company_of_department(db, department_id))
         
-        # Return the employee's ID
-        return str(result.inserted_id)
+        # Return the stored employee, without the password hash
+        return project_document(employee_data, Employee.PROJECTIONS["detail"])
     except PyMongoError as e:
         raise RuntimeError(f"Error adding new employee: {e}")
 
 
+@instrumented
 def edit_employee(db, employee_id, updated_data):
+    """Update an employee; a plain "password" in updated_data replaces the hash."""
     if not ObjectId.is_valid(employee_id):
         raise ValueError("Invalid employee ID")
 
+    updated_data, raw_password = employee_update(updated_data)
+    if raw_password:
+        # A fresh hash uses the current work factor, so the employee no longer needs a rehash
+        updated_data.update(hashed_password=hash_password(raw_password), password_rehash_required=False)
+
     try:
-        result = db.employees.update_one(
+        previous = None
+        if "department_id" in updated_data:
+            if not find_one_by_id_cached(db.departments, updated_data["department_id"]):
+                raise ValueError(f"Department with ID {updated_data['department_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = db.employees.find_one({"_id": ObjectId(employee_id)}, {"department_id": 1})
+
+        # Returns the stored document after the update, or None when the employee does not exist
+        employee_data = db.employees.find_one_and_update(
             {"_id": ObjectId(employee_id)},
-            {"$set": updated_data}
+            {"$set": stamp(updated_data)},
+            projection=Employee.PROJECTIONS["detail"],
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        note_write("employees")
+        invalidate_document(db.employees, ObjectId(employee_id))
+        if previous is not None and employee_data is not None:
+            refresh_after_move(db, "department_id", previous.get("department_id"), employee_data["department_id"])
+        return employee_data
     except PyMongoError as e:
         raise RuntimeError(f"Error updating employee with ID {employee_id}: {e}")
 
+@instrumented
+def verify_employee_password(db, email, raw_password, wait=False):
+    """
+    Check an employee's password; returns the employee (without the hash) or None.
+
+    A match against a hash weaker than the configured work factor replaces it in the
+    background; wait=True blocks until it is stored, for short-lived processes.
+    """
+    try:
+        employee = db.employees.find_one({"email": email})
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching employee with email {email}: {e}")
+    if not employee or not check_password(raw_password, employee.get("hashed_password")):
+        return None
+
+    future = rehash_if_needed(db, employee["_id"], raw_password, employee["hashed_password"])
+    if future is not None and wait:
+        # A failed store is logged by rehash_if_needed; the password itself was still valid
+        future.exception()
+    return project_document(employee, Employee.PROJECTIONS["detail"])
+
+@instrumented
 def delete_employee(db, employee_id):
     if not ObjectId.is_valid(employee_id):
         raise ValueError("Invalid employee ID")
 
     try:
+        # Remember the department so its company's summary can be refreshed after the delete
+        employee = find_one_by_id_cached(db.employees, ObjectId(employee_id))
         result = db.employees.delete_one({"_id": ObjectId(employee_id)})
+        if result.deleted_count:
+            record_deletes(db, "employees", [ObjectId(employee_id)])
+        invalidate_document(db.employees, ObjectId(employee_id))
+        if employee:
+            refresh_after_write(db, company_of_department(db, employee.get("department_id")))
         return result.deleted_count > 0
     except PyMongoError as e:
         raise RuntimeError(f"Error deleting employee with ID {employee_id}: {e}")
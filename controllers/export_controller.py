@@ -0,0 +1,97 @@
+import csv
+import gzip
+import json
+import os
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.companies_controller import iter_companies
+from controllers.departments_controller import iter_departments
+from controllers.employees_controller import iter_employees
+from controllers.roles_controller import iter_roles
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Reader and default columns for each exportable entity; secrets are never exported by default
+EXPORTS = {
+    "companies": (iter_companies, ["_id", "name", "phone_number", "email", "location"]),
+    "departments": (iter_departments, ["_id", "name", "description", "company_id"]),
+    "employees": (iter_employees, ["_id", "name", "email", "phone_number", "department_id", "nationality"]),
+    "roles": (iter_roles, ["_id", "title", "description", "department_id"]),
+}
+
+
+def _plain(value):
+    """Turn BSON values into something CSV and JSON can hold."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
+def _detect_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot detect the export format of {path}; pass fmt='csv' or fmt='jsonl'")
+
+
+@instrumented
+def export_collection(db, entity, path, fmt=None, fields=None, compress=None, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Stream every document of an entity to a CSV or JSONL file.
+
+    Only `fields` are fetched (a projection), and documents are written batch by batch, so
+    memory stays flat whatever the collection size. The file is gzip-compressed when
+    compress is True or the path ends in .gz. progress, if given, is called as
+    progress(written, estimated_total) after every batch. Returns the number of rows written.
+    """
+    if entity not in EXPORTS:
+        raise ValueError(f"Unknown entity {entity!r}; expected one of {', '.join(EXPORTS)}")
+    reader, default_fields = EXPORTS[entity]
+    fields = list(fields or default_fields)
+    fmt = fmt or _detect_format(path)
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("Format must be 'csv' or 'jsonl'")
+    if compress is None:
+        compress = path.endswith(".gz")
+
+    projection = {field: 1 for field in fields}
+    if "_id" not in fields:
+        projection["_id"] = 0
+
+    # Write next to the target and rename at the end, so a failed export never leaves a partial file
+    temp_path = f"{path}.part"
+    opener = gzip.open if compress else open
+    written = 0
+    try:
+        total = db[entity].estimated_document_count()
+        with opener(temp_path, "wt", newline="", encoding="utf-8") as f:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(fields)
+
+            for batch in reader(db, batch_size, projection=projection):
+                for doc in batch:
+                    if writer:
+                        writer.writerow([_plain(doc.get(field)) for field in fields])
+                    else:
+                        f.write(json.dumps({field: _plain(doc.get(field)) for field in fields}, default=str))
+                        f.write("\n")
+                written += len(batch)
+                if progress:
+                    progress(written, max(total, written))
+
+        os.replace(temp_path, path)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error exporting {entity}: {e}")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return written
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+from config.monitoring import instrumented
+from controllers.reports_controller import company_of_department, refresh_after_write
+from utils.change_tracking import stamp, note_write
+from utils.formatters import format_email, format_name, format_phone_number
+from utils.passwords import hash_passwords
+from utils.validators import is_valid_email, is_valid_name, is_valid_object_id, is_valid_phone_number
+
+DEFAULT_CHUNK_SIZE = 1000
+EMPLOYEE_FIELDS = ("name", "email", "password", "nationality", "phone_number", "department_id")
+
+
+def _read_rows(path, fmt):
+    """Yield (row_number, row_dict) pairs from a CSV or JSONL file without loading it whole."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            # Row 1 is the header, so data rows start at 2 like in a spreadsheet
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                yield row_number, row
+        else:
+            for row_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    row = {"__error__": f"Invalid JSON: {e}"}
+                yield row_number, row
+
+
+def _detect_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot detect the file format of {path}; pass fmt='csv' or fmt='jsonl'")
+
+
+def clean_employee_row(row):
+    """Normalize one input row; returns (employee_data, raw_password) or raises ValueError."""
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+
+    missing = [field for field in EMPLOYEE_FIELDS if not str(row.get(field) or "").strip()]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    name = format_name(str(row["name"]))
+    email = format_email(str(row["email"]))
+    phone_number = format_phone_number(str(row["phone_number"]))
+    department_id = str(row["department_id"]).strip()
+
+    if not is_valid_name(name):
+        raise ValueError(f"Invalid name: {name!r}")
+    if not is_valid_email(email):
+        raise ValueError(f"Invalid email: {email!r}")
+    if not is_valid_phone_number(phone_number):
+        raise ValueError(f"Invalid phone number: {row['phone_number']!r}")
+    if not is_valid_object_id(department_id):
+        raise ValueError(f"Invalid department ID: {department_id!r}")
+
+    employee_data = {
+        "name": name,
+        "email": email,
+        "phone_number": phone_number,
+        "department_id": ObjectId(department_id),
+        "nationality": str(row["nationality"]).strip(),
+    }
+    return employee_data, str(row["password"])
+
+
+def _import_chunk(db, chunk, report, touched_departments):
+    """Validate, hash and insert one chunk of (row_number, row) pairs."""
+    valid = []
+    for row_number, row in chunk:
+        try:
+            valid.append((row_number, *clean_employee_row(row)))
+        except ValueError as e:
+            report["errors"].append({"row": row_number, "error": str(e)})
+
+    if not valid:
+        return
+
+    # One round trip checks every department referenced by the chunk
+    referenced_ids = list({employee_data["department_id"] for _, employee_data, _ in valid})
+    existing_ids = {doc["_id"] for doc in db.departments.find({"_id": {"$in": referenced_ids}}, {"_id": 1})}
+
+    to_insert = []
+    raw_passwords = []
+    for row_number, employee_data, raw_password in valid:
+        if employee_data["department_id"] not in existing_ids:
+            report["errors"].append({"row": row_number, "error": f"Department with ID {employee_data['department_id']} does not exist"})
+            continue
+        to_insert.append((row_number, employee_data))
+        raw_passwords.append(raw_password)
+        touched_departments.add(employee_data["department_id"])
+
+    if not to_insert:
+        return
+
+    # bcrypt dominates the cost of an import, so the chunk is hashed on every CPU at once
+    for (_, employee_data), hashed_password in zip(to_insert, hash_passwords(raw_passwords)):
+        employee_data["hashed_password"] = hashed_password
+
+    try:
+        # Unordered so one bad document doesn't stop the rest of the chunk
+        result = db.employees.insert_many([stamp(employee_data) for _, employee_data in to_insert], ordered=False)
+        report["inserted"] += len(result.inserted_ids)
+    except BulkWriteError as e:
+        report["inserted"] += e.details.get("nInserted", 0)
+        for write_error in e.details.get("writeErrors", []):
+            row_number = to_insert[write_error["index"]][0]
+            report["errors"].append({"row": row_number, "error": write_error.get("errmsg", "Write failed")})
+    note_write("employees")
+
+
+@instrumented
+def import_employees(db, path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Stream employees from a CSV or JSONL file into the database in chunks.
+
+    Each row needs name, email, password, nationality, phone_number and department_id.
+    Returns a report with the number of rows read and inserted, per-row errors and rows/sec.
+    progress, if given, is called with the report after every chunk.
+    """
+    fmt = fmt or _detect_format(path)
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("Format must be 'csv' or 'jsonl'")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be a positive integer")
+
+    report = {"rows": 0, "inserted": 0, "errors": [], "seconds": 0.0, "rows_per_sec": 0.0}
+    started = time.perf_counter()
+    rows = _read_rows(path, fmt)
+    touched_departments = set()
+
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report["rows"] += len(chunk)
+            _import_chunk(db, chunk, report, touched_departments)
+
+            report["seconds"] = time.perf_counter() - started
+            report["rows_per_sec"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+            if progress:
+                progress(report)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error importing employees: {e}")
+
+    # One summary refresh per company at the end instead of one per inserted row
+    for company_id in {company_of_department(db, department_id) for department_id in touched_departments}:
+        refresh_after_write(db, company_id)
+
+    return report
@@ -0,0 +1,178 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from utils.cache import find_one_by_id_cached
+
+logger = logging.getLogger(__name__)
+
+DEPARTMENT_HEADCOUNTS = "department_headcounts"
+COMPANY_HEADCOUNTS = "company_headcounts"
+# Seconds a summary refresh waits after a write; further writes to the same company within
+# it share the one refresh
+REFRESH_DELAY = 0.5
+
+# Companies waiting for a refresh, keyed by (database name, company ID), and the timer that runs them
+_pending_refreshes = {}
+_refresh_timer = None
+_refresh_lock = threading.Lock()
+
+
+def _count_lookup(source, local_field, as_field):
+    """$lookup that only brings back the number of matching documents, using the foreign key index."""
+    return {"$lookup": {
+        "from": source,
+        "localField": local_field,
+        "foreignField": "department_id",
+        "pipeline": [{"$group": {"_id": None, "count": {"$sum": 1}}}],
+        "as": as_field,
+    }}
+
+
+def department_headcounts_pipeline(company_oid, refreshed_at):
+    match = {"company_id": company_oid} if company_oid else {}
+    return [
+        {"$match": match},
+        _count_lookup("employees", "_id", "employees_count"),
+        _count_lookup("roles", "_id", "roles_count"),
+        {"$project": {
+            "name": 1,
+            "company_id": 1,
+            "employees": {"$ifNull": [{"$first": "$employees_count.count"}, 0]},
+            "roles": {"$ifNull": [{"$first": "$roles_count.count"}, 0]},
+            "refreshed_at": {"$literal": refreshed_at},
+        }},
+        {"$merge": {"into": DEPARTMENT_HEADCOUNTS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def company_headcounts_pipeline(company_oid, refreshed_at):
+    match = {"_id": company_oid} if company_oid else {}
+    return [
+        {"$match": match},
+        {"$lookup": {
+            "from": DEPARTMENT_HEADCOUNTS,
+            "localField": "_id",
+            "foreignField": "company_id",
+            "as": "departments_summary",
+        }},
+        {"$project": {
+            "name": 1,
+            "departments": {"$size": "$departments_summary"},
+            "roles": {"$sum": "$departments_summary.roles"},
+            "employees": {"$sum": "$departments_summary.employees"},
+            "refreshed_at": {"$literal": refreshed_at},
+        }},
+        {"$merge": {"into": COMPANY_HEADCOUNTS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+
+def refresh_headcounts(db, company_id=None):
+    """
+    Recompute the headcount summaries for one company, or for every company when company_id is None.
+
+    Rows are upserted with $merge and rows that the run did not touch (deleted departments or
+    companies) are removed afterwards, so readers never see an empty summary.
+    """
+    if company_id is not None and not ObjectId.is_valid(company_id):
+        raise ValueError("Invalid company ID")
+    company_oid = ObjectId(company_id) if company_id is not None else None
+    refreshed_at = datetime.now(timezone.utc)
+
+    try:
+        db.departments.aggregate(department_headcounts_pipeline(company_oid, refreshed_at))
+        stale = {"refreshed_at": {"$lt": refreshed_at}}
+        if company_oid:
+            stale["company_id"] = company_oid
+        db[DEPARTMENT_HEADCOUNTS].delete_many(stale)
+
+        db.companies.aggregate(company_headcounts_pipeline(company_oid, refreshed_at))
+        stale = {"refreshed_at": {"$lt": refreshed_at}}
+        if company_oid:
+            stale["_id"] = company_oid
+        db[COMPANY_HEADCOUNTS].delete_many(stale)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error refreshing headcounts: {e}")
+
+
+def company_of_department(db, department_id):
+    """Return the company ID a department belongs to, or None if it is unknown."""
+    if not ObjectId.is_valid(department_id):
+        return None
+    department = find_one_by_id_cached(db.departments, ObjectId(department_id))
+    company_id = department.get("company_id") if department else None
+    return company_id if company_id is not None and ObjectId.is_valid(company_id) else None
+
+
+def refresh_after_write(db, company_id):
+    """
+    Schedule a refresh of the touched company's summary after a write.
+
+    The refresh runs REFRESH_DELAY seconds later on a timer thread, so the write returns
+    without waiting for the aggregations, and a burst of writes to one company costs one refresh.
+    """
+    global _refresh_timer
+    if company_id is None:
+        return
+    with _refresh_lock:
+        _pending_refreshes[(db.name, str(company_id))] = db
+        if _refresh_timer is None:
+            # Not a daemon thread, so a short-lived process (the CLI) still refreshes before exiting
+            _refresh_timer = threading.Timer(REFRESH_DELAY, flush_refreshes)
+            _refresh_timer.start()
+
+
+def flush_refreshes():
+    """Run the scheduled summary refreshes now; a failure here never fails the write."""
+    global _refresh_timer
+    with _refresh_lock:
+        pending = dict(_pending_refreshes)
+        _pending_refreshes.clear()
+        if _refresh_timer is not None:
+            _refresh_timer.cancel()
+            _refresh_timer = None
+    for (_, company_id), db in pending.items():
+        try:
+            refresh_headcounts(db, company_id)
+        except (RuntimeError, ValueError) as e:
+            logger.warning("Headcount summary for company %s not refreshed: %s", company_id, e)
+
+
+def refresh_after_move(db, parent_field, old_parent_id, new_parent_id):
+    """Refresh the summaries on both sides of an edit that moved a document to another parent."""
+    if old_parent_id == new_parent_id:
+        return
+    for parent_id in (old_parent_id, new_parent_id):
+        refresh_after_write(db, parent_id if parent_field == "company_id" else company_of_department(db, parent_id))
+
+
+def get_company_headcounts(db):
+    """Return the precomputed departments/roles/employees counts per company."""
+    try:
+        return list(db[COMPANY_HEADCOUNTS].find().sort("name", 1))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching company headcounts: {e}")
+
+
+def get_department_headcounts(db, company_id=None):
+    """Return the precomputed employees/roles counts per department, optionally for one company."""
+    query = {}
+    if company_id is not None:
+        if not ObjectId.is_valid(company_id):
+            raise ValueError("Invalid company ID")
+        query["company_id"] = ObjectId(company_id)
+    try:
+        return list(db[DEPARTMENT_HEADCOUNTS].find(query).sort("name", 1))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching department headcounts: {e}")
+
+
+if __name__ == "__main__":
+    # Usage: python -m controllers.reports_controller  (full rebuild of the summaries)
+    from config.db_config import get_database
+
+    database = get_database()
+    refresh_headcounts(database)
+    for row in get_company_headcounts(database):
+        print(f"{row.get('name')}: {row['departments']} departments, {row['roles']} roles, {row['employees']} employees")
@@ -1,67 +1,151 @@
 from models.roles_model import Role
 from bson import ObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
+from config.monitoring import instrumented
+from controllers.reports_controller import company_of_department, refresh_after_move, refresh_after_write
+from utils.cache import find_one_by_id_cached, invalidate_document
+from utils.change_tracking import stamp, note_write, record_deletes
+from utils.replica import serving_replica
+from utils.projections import resolve_projection, project_document
+from utils.pagination import fetch_page, iter_batches, DEFAULT_PAGE_SIZE, DEFAULT_BATCH_SIZE
+from utils.validators import to_object_id
 
-def get_all_roles(db):
+@instrumented
+def get_roles_page(db, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, projection=None):
+    """Return one page of roles ordered by _id, with the cursor for the next page."""
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "roles")
+    if replica is not None:
+        return replica.find_page("roles", page_size, after, with_total, resolve_projection(projection, Role.PROJECTIONS))
     try:
-        roles = db.roles.find()
-        return [Role.from_dict(role).to_dict() for role in roles]
+        return fetch_page(db.roles, page_size, after, with_total, projection=resolve_projection(projection, Role.PROJECTIONS))
     except PyMongoError as e:
         raise RuntimeError(f"Error fetching roles: {e}")
 
-def get_role_by_id(db, role_id):
+def iter_roles(db, batch_size=DEFAULT_BATCH_SIZE, projection=None):
+    """Yield roles in batches straight from the cursor."""
+    try:
+        yield from iter_batches(db.roles, batch_size, projection=resolve_projection(projection, Role.PROJECTIONS))
+    except PyMongoError as e:
+        raise RuntimeError(f"Error fetching roles: {e}")
+
+@instrumented
+def get_all_roles(db, projection=None):
+    # Served from the local replica when one is configured and fresh enough
+    replica = serving_replica(db, "roles")
+    if replica is not None:
+        return replica.find_all("roles", resolve_projection(projection, Role.PROJECTIONS))
+    return [role for batch in iter_roles(db, projection=projection) for role in batch]
+
+@instrumented
+def search_roles(db, text, limit=20, projection=None):
+    """Full-text search on the roles text index, best matches first."""
+    text = text.strip()
+    if not text:
+        return []
+
+    fields = resolve_projection(projection, Role.PROJECTIONS) or {}
+    try:
+        cursor = db.roles.find(
+            {"$text": {"$search": text}},
+            {**fields, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+        return list(cursor)
+    except PyMongoError as e:
+        raise RuntimeError(f"Error searching roles: {e}")
+
+@instrumented
+def get_role_by_id(db, role_id, projection=None):
     if not ObjectId.is_valid(role_id):
         raise ValueError("Invalid role ID")
 
     try:
-        role_data = db.roles.find_one({"_id": ObjectId(role_id)})
-        return Role.from_dict(role_data).to_dict() if role_data else None
+        replica = serving_replica(db, "roles")
+        if replica is not None:
+            return replica.find_by_id("roles", role_id, resolve_projection(projection, Role.PROJECTIONS))
+        role_data = find_one_by_id_cached(db.roles, ObjectId(role_id))
+        # Raw document straight from the driver (or the cache), no model round trip
+        return project_document(role_data, resolve_projection(projection, Role.PROJECTIONS))
     except PyMongoError as e:
         raise RuntimeError(f"Error fetching role with ID {role_id}: {e}")
 
+def build_role(title, description, department_id):
+    """Validate a new role and return the document to insert; shared with the async controller."""
+    return {
+        "title": title,
+        "description": description,
+        "department_id": to_object_id(department_id, "department")  # Ensure department_id is stored as ObjectId
+    }
+
+def role_update(updated_data):
+    """Copy of updated_data with department_id as an ObjectId; raises ValueError for a bad ID."""
+    updated_data = dict(updated_data)
+    if "department_id" in updated_data:
+        # The views send IDs as strings; references are always stored as ObjectIds
+        updated_data["department_id"] = to_object_id(updated_data["department_id"], "department")
+    return updated_data
+
+@instrumented
 def add_role(db, title, description, department_id):
-    if not ObjectId.is_valid(department_id):
-        raise ValueError("Invalid department ID")
+    role_data = build_role(title, description, department_id)
 
     try:
         # Check if the department exists
-        department_exists = db.departments.find_one({"_id": ObjectId(department_id)})
+        department_exists = find_one_by_id_cached(db.departments, role_data["department_id"])
         if not department_exists:
             raise ValueError(f"Department with ID {department_id} does not exist")
 
-        # Prepare the role data
-        role_data = {
-            "title": title,
-            "description": description,
-            "department_id": ObjectId(department_id)  # Ensure department_id is stored as ObjectId
-        }
-
-        # Insert the role into the collection
-        result = db.roles.insert_one(role_data)
-        inserted_id = str(result.inserted_id)
-        return inserted_id
+        # Insert the role into the collection; insert_one adds the _id to role_data
+        db.roles.insert_one(stamp(role_data))
+        note_write("roles")
+        refresh_after_write(db, company_of_department(db, department_id))
+        return role_data
     except PyMongoError as e:
         raise RuntimeError(f"Error adding new role: {e}")
 
+@instrumented
 def edit_role(db, role_id, updated_data):
     if not ObjectId.is_valid(role_id):
         raise ValueError("Invalid role ID")
+    updated_data = role_update(updated_data)
 
     try:
-        result = db.roles.update_one(
+        previous = None
+        if "department_id" in updated_data:
+            if not find_one_by_id_cached(db.departments, updated_data["department_id"]):
+                raise ValueError(f"Department with ID {updated_data['department_id']} does not exist")
+            # The old parent, so the summaries on both sides of the move get refreshed
+            previous = db.roles.find_one({"_id": ObjectId(role_id)}, {"department_id": 1})
+
+        # Returns the stored document after the update, or None when the role does not exist
+        role_data = db.roles.find_one_and_update(
             {"_id": ObjectId(role_id)},
-            {"$set": updated_data}
+            {"$set": stamp(updated_data)},
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        note_write("roles")
+        invalidate_document(db.roles, ObjectId(role_id))
+        if previous is not None and role_data is not None:
+            refresh_after_move(db, "department_id", previous.get("department_id"), role_data["department_id"])
+        return role_data
     except PyMongoError as e:
         raise RuntimeError(f"Error updating role with ID {role_id}: {e}")
 
+@instrumented
 def delete_role(db, role_id):
     if not ObjectId.is_valid(role_id):
         raise ValueError("Invalid role ID")
 
     try:
+        # Remember the department so its company's summary can be refreshed after the delete
+        role = find_one_by_id_cached(db.roles, ObjectId(role_id))
         result = db.roles.delete_one({"_id": ObjectId(role_id)})
+        if result.deleted_count:
+            record_deletes(db, "roles", [ObjectId(role_id)])
+        invalidate_document(db.roles, ObjectId(role_id))
+        if role:
+            refresh_after_write(db, company_of_department(db, role.get("department_id")))
         return result.deleted_count > 0
     except PyMongoError as e:
         raise RuntimeError(f"Error deleting role with ID {role_id}: {e}")
@@ -1,6 +1,17 @@
 from bson import ObjectId
 
 class Company:
+    # No per-instance __dict__: smaller objects and faster attribute access
+    __slots__ = ("company_id", "name", "phone_number", "email", "location")
+
+    # Named projections accepted by the read controllers; None means every field
+    PROJECTIONS = {
+        "list": {"name": 1, "phone_number": 1, "email": 1, "location": 1},
+        "detail": None,
+    }
+    # Fields callers outside the controllers (API, CLI) may ask for
+    PUBLIC_FIELDS = ("_id", "name", "phone_number", "email", "location", "updated_at")
+
     def __init__(self, name, phone_number, email, location, company_id=None):
         self.company_id = company_id  
         self.name = name
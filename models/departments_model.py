@@ -1,6 +1,17 @@
 from bson import ObjectId
 
 class Department:
+    # No per-instance __dict__: smaller objects and faster attribute access
+    __slots__ = ("department_id", "name", "description", "company_id")
+
+    # Named projections accepted by the read controllers; None means every field
+    PROJECTIONS = {
+        "list": {"name": 1, "company_id": 1},
+        "detail": None,
+    }
+    # Fields callers outside the controllers (API, CLI) may ask for
+    PUBLIC_FIELDS = ("_id", "name", "description", "company_id", "updated_at")
+
     def __init__(self, name, description, company_id, department_id=None):
         self.department_id = department_id
         self.name = name
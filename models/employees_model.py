@@ -1,6 +1,21 @@
 from bson import ObjectId
 
 class Employee:
+    # No per-instance __dict__: smaller objects and faster attribute access
+    __slots__ = ("employee_id", "name", "email", "phone_number", "department_id", "hashed_password", "nationality")
+
+    # Named projections accepted by the read controllers. The password hash only leaves the
+    # database when "credentials" is asked for explicitly; the rehash flag is internal.
+    PROJECTIONS = {
+        "list": {"name": 1, "email": 1, "phone_number": 1, "department_id": 1, "nationality": 1},
+        "detail": {"hashed_password": 0, "password_rehash_required": 0},
+        "credentials": {"email": 1, "hashed_password": 1},
+    }
+    # Fields callers outside the controllers (API, CLI) may ask for
+    PUBLIC_FIELDS = ("_id", "name", "email", "phone_number", "department_id", "nationality", "updated_at")
+    # Fields outside callers are refused outright, whatever the projection
+    SECRET_FIELDS = ("hashed_password", "password_rehash_required")
+
     def __init__(self, name, email, phone_number, department_id, hashed_password, nationality, employee_id=None):
         self.employee_id = employee_id 
         self.name = name
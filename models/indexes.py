@@ -0,0 +1,126 @@
+import sys
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+from utils.change_tracking import TOMBSTONE_TTL_SECONDS
+
+# Serves the local replica's delta sync, which pulls documents changed after its watermark
+_UPDATED_AT = {"name": "updated_at_1", "keys": [("updated_at", ASCENDING)]}
+
+# Secondary indexes each collection should have, keyed by collection name.
+# Every entry needs an explicit name so sync_indexes can tell ours apart from extra ones.
+INDEXES = {
+    "companies": [
+        {"name": "email_1", "keys": [("email", ASCENDING)]},
+        {"name": "search_text", "keys": [("name", TEXT), ("email", TEXT), ("location", TEXT)]},
+        _UPDATED_AT,
+    ],
+    "departments": [
+        # Serves lookups by company and listing a company's departments by name
+        {"name": "company_id_1_name_1", "keys": [("company_id", ASCENDING), ("name", ASCENDING)]},
+        {"name": "search_text", "keys": [("name", TEXT), ("description", TEXT)]},
+        _UPDATED_AT,
+    ],
+    "roles": [
+        {"name": "department_id_1_title_1", "keys": [("department_id", ASCENDING), ("title", ASCENDING)]},
+        {"name": "search_text", "keys": [("title", TEXT), ("description", TEXT)]},
+        _UPDATED_AT,
+    ],
+    "employees": [
+        {"name": "department_id_1_name_1", "keys": [("department_id", ASCENDING), ("name", ASCENDING)]},
+        # Unique only where an email is actually set, so legacy rows without one don't collide
+        {
+            "name": "email_1_unique",
+            "keys": [("email", ASCENDING)],
+            "options": {"unique": True, "partialFilterExpression": {"email": {"$type": "string"}}},
+        },
+        # Backs the name/email search box; MongoDB allows one text index per collection
+        {"name": "search_text", "keys": [("name", TEXT), ("email", TEXT)], "options": {"weights": {"name": 2, "email": 1}}},
+        _UPDATED_AT,
+    ],
+    # Summary collections maintained by controllers.reports_controller
+    "department_headcounts": [
+        {"name": "company_id_1_name_1", "keys": [("company_id", ASCENDING), ("name", ASCENDING)]},
+    ],
+    # Delete markers written by utils.change_tracking, pulled by the replica per collection
+    "tombstones": [
+        {"name": "collection_1_deleted_at_1", "keys": [("collection", ASCENDING), ("deleted_at", ASCENDING)]},
+        {"name": "deleted_at_ttl", "keys": [("deleted_at", ASCENDING)], "options": {"expireAfterSeconds": TOMBSTONE_TTL_SECONDS}},
+    ],
+}
+
+
+def _same_keys(existing_keys, spec):
+    if any(direction == TEXT for _, direction in spec["keys"]):
+        # The server stores text indexes as _fts/_ftsx, so only the name can be compared
+        return True
+    return list(existing_keys) == [tuple(key) for key in spec["keys"]]
+
+
+def _index_model(spec):
+    return IndexModel(spec["keys"], name=spec["name"], **spec.get("options", {}))
+
+
+def sync_indexes(db, drop_extra=False):
+    """
+    Create any missing index from INDEXES and report indexes that exist but are not declared.
+
+    Returns a report keyed by collection with the created, extra, dropped, conflicting and
+    failed index names. Extra indexes are only dropped when drop_extra is True.
+    """
+    report = {}
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        entry = {"created": [], "extra": [], "dropped": [], "conflicts": [], "errors": {}}
+        report[collection_name] = entry
+
+        try:
+            existing = collection.index_information()
+        except PyMongoError as e:
+            entry["errors"]["*"] = str(e)
+            continue
+
+        declared = {spec["name"]: spec for spec in specs}
+        for name, spec in declared.items():
+            if name not in existing:
+                try:
+                    collection.create_indexes([_index_model(spec)])
+                    entry["created"].append(name)
+                except PyMongoError as e:
+                    entry["errors"][name] = str(e)
+            elif not _same_keys(existing[name]["key"], spec):
+                # Same name, different definition: leave it for a human to resolve
+                entry["conflicts"].append(name)
+
+        for name in existing:
+            if name == "_id_" or name in declared:
+                continue
+            entry["extra"].append(name)
+            if drop_extra:
+                try:
+                    collection.drop_index(name)
+                    entry["dropped"].append(name)
+                except PyMongoError as e:
+                    entry["errors"][name] = str(e)
+
+    return report
+
+
+def format_report(report):
+    """Render a sync_indexes report as readable lines."""
+    lines = []
+    for collection_name, entry in report.items():
+        for label in ("created", "extra", "dropped", "conflicts"):
+            if entry[label]:
+                lines.append(f"{collection_name}: {label} {', '.join(entry[label])}")
+        for name, error in entry["errors"].items():
+            lines.append(f"{collection_name}: failed {name}: {error}")
+    return "\n".join(lines) or "All indexes are in sync."
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.indexes [--drop-extra]
+    from config.db_config import get_database
+
+    result = sync_indexes(get_database(), drop_extra="--drop-extra" in sys.argv[1:])
+    print(format_report(result))
+    sys.exit(1 if any(entry["errors"] or entry["conflicts"] for entry in result.values()) else 0)
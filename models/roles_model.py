@@ -1,5 +1,16 @@
 from bson import ObjectId
 class Role:
+    # No per-instance __dict__: smaller objects and faster attribute access
+    __slots__ = ("role_id", "title", "description", "department_id")
+
+    # Named projections accepted by the read controllers; None means every field
+    PROJECTIONS = {
+        "list": {"title": 1, "department_id": 1},
+        "detail": None,
+    }
+    # Fields callers outside the controllers (API, CLI) may ask for
+    PUBLIC_FIELDS = ("_id", "title", "description", "department_id", "updated_at")
+
     def __init__(self, title, description, department_id, role_id=None):
         self.role_id = role_id
         self.title = title
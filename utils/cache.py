@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe cache bounded by entry count (LRU eviction) and entry age (TTL)."""
+
+    def __init__(self, maxsize=1024, ttl=60.0, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            expires_at = self._clock() + self.ttl if self.ttl else None
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# One cache for every collection; keys carry the database and collection name
+documents_cache = LRUCache(maxsize=4096, ttl=30.0)
+
+
+def _cache_key(collection, document_id):
+    return (collection.database.name, collection.name, str(document_id))
+
+
+def find_one_by_id_cached(collection, document_id):
+    """
+    Read-through lookup of a document by _id.
+
+    Only found documents are cached, so a document created right after a miss is seen
+    immediately. Callers get a copy and can modify it freely.
+    """
+    key = _cache_key(collection, document_id)
+    document = documents_cache.get(key)
+    if document is None:
+        document = collection.find_one({"_id": document_id})
+        if document is None:
+            return None
+        documents_cache.set(key, document)
+    return dict(document)
+
+
+async def find_one_by_id_cached_async(collection, document_id):
+    """find_one_by_id_cached for an AsyncCollection; both share the same cache."""
+    key = _cache_key(collection, document_id)
+    document = documents_cache.get(key)
+    if document is None:
+        document = await collection.find_one({"_id": document_id})
+        if document is None:
+            return None
+        documents_cache.set(key, document)
+    return dict(document)
+
+
+def invalidate_document(collection, document_id):
+    """Drop a cached document after it was modified or deleted."""
+    documents_cache.invalidate(_cache_key(collection, document_id))
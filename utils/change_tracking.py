@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+# Every write to an entity collection sets this field; the local replica pulls by it
+UPDATED_AT = "updated_at"
+# Deleted documents leave a tombstone here, so replicas can drop their copies
+TOMBSTONES = "tombstones"
+# Tombstones expire after this long (TTL index in models.indexes); a replica that
+# has not synced for longer must be seeded again
+TOMBSTONE_TTL_SECONDS = 30 * 24 * 3600
+
+# Collections whose documents this process wrote; the replica catches up on them before its next read
+_local_writes = {}
+
+
+def now():
+    """Current UTC time, truncated to the millisecond precision MongoDB stores."""
+    moment = datetime.now(timezone.utc)
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def stamp(data):
+    """Set updated_at on a document or a $set dict in place, and return it."""
+    data[UPDATED_AT] = now()
+    return data
+
+
+def note_write(collection_name):
+    """Record that this process changed a collection."""
+    _local_writes[collection_name] = _local_writes.get(collection_name, 0) + 1
+
+
+def local_writes(collection_name):
+    """How many writes this process made to a collection so far."""
+    return _local_writes.get(collection_name, 0)
+
+
+def _tombstones(collection_name, document_ids):
+    deleted_at = now()
+    return [{"collection": collection_name, "document_id": document_id, "deleted_at": deleted_at} for document_id in document_ids]
+
+
+def confirm_deleted(collection, existing_ids, deleted_count, session=None):
+    """
+    Return the IDs that are gone after deleting documents that existed just before.
+
+    When the server deleted fewer than expected (for example another writer got there first
+    and a document was re-inserted), the survivors are looked up so they don't get a tombstone.
+    """
+    existing_ids = list(existing_ids)
+    if deleted_count >= len(existing_ids):
+        return existing_ids
+    remaining = {doc["_id"] for doc in collection.find({"_id": {"$in": existing_ids}}, {"_id": 1}, session=session)}
+    return [document_id for document_id in existing_ids if document_id not in remaining]
+
+
+def record_deletes(db, collection_name, document_ids, session=None):
+    """Write one tombstone per deleted document."""
+    tombstones = _tombstones(collection_name, document_ids)
+    if tombstones:
+        db[TOMBSTONES].insert_many(tombstones, ordered=False, session=session)
+    note_write(collection_name)
+
+
+async def record_deletes_async(db, collection_name, document_ids):
+    """record_deletes for an AsyncDatabase."""
+    tombstones = _tombstones(collection_name, document_ids)
+    if tombstones:
+        await db[TOMBSTONES].insert_many(tombstones, ordered=False)
+    note_write(collection_name)
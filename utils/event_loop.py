@@ -0,0 +1,25 @@
+import asyncio
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """Return the event loop the async controllers run on, starting its thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="asyncio-loop", daemon=True).start()
+        return _loop
+
+
+def submit(coroutine):
+    """Schedule a coroutine on the loop thread; returns a concurrent.futures.Future for its result."""
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop())
+
+
+def run(coroutine, timeout=None):
+    """Run a coroutine on the loop thread and block until it finishes (for scripts and tests)."""
+    return submit(coroutine).result(timeout)
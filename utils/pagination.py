@@ -0,0 +1,90 @@
+import asyncio
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_BATCH_SIZE = 500
+
+
+def check_page(page_size, after):
+    """Validate the page arguments; returns the `after` cursor as an ObjectId, or None."""
+    if not isinstance(page_size, int) or page_size <= 0:
+        raise ValueError("Page size must be a positive integer")
+    if after is None:
+        return None
+    if not ObjectId.is_valid(after):
+        raise ValueError("Invalid page cursor")
+    return ObjectId(after)
+
+
+def _page_query(query, after):
+    """The filter of one page: the caller's query plus the keyset cursor."""
+    page_query = dict(query or {})
+    if after is not None:
+        # Keyset pagination: the _id index makes every page cost the same, however deep
+        page_query["_id"] = {"$gt": after}
+    return page_query
+
+
+def fetch_page(collection, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, query=None, transform=None, projection=None):
+    """Fetch one page of documents ordered by _id, starting right after the `after` cursor."""
+    after = check_page(page_size, after)
+    documents = list(collection.find(_page_query(query, after), projection).sort("_id", 1).limit(page_size))
+
+    # A full page means there may be more; the last _id is the cursor for the next one
+    next_after = str(documents[-1]["_id"]) if len(documents) == page_size else None
+
+    total = None
+    if with_total:
+        # Counted over the whole filter, not just the rows after the cursor; with no filter
+        # the estimate comes from collection metadata, so it does not scan anything
+        total = collection.count_documents(query) if query else collection.estimated_document_count()
+
+    items = [transform(doc) for doc in documents] if transform else documents
+    return {"items": items, "next_after": next_after, "total": total}
+
+
+def iter_batches(collection, batch_size=DEFAULT_BATCH_SIZE, query=None, transform=None, projection=None):
+    """Yield lists of at most `batch_size` documents straight from a single cursor."""
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer")
+
+    cursor = collection.find(query or {}, projection).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    for doc in cursor:
+        batch.append(transform(doc) if transform else doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def fetch_page_async(collection, page_size=DEFAULT_PAGE_SIZE, after=None, with_total=False, query=None, transform=None, projection=None):
+    """fetch_page for an AsyncCollection; the page and the total are fetched concurrently."""
+    after = check_page(page_size, after)
+    page = collection.find(_page_query(query, after), projection).sort("_id", 1).limit(page_size).to_list()
+    if with_total:
+        count = collection.count_documents(query) if query else collection.estimated_document_count()
+        documents, total = await asyncio.gather(page, count)
+    else:
+        documents, total = await page, None
+
+    next_after = str(documents[-1]["_id"]) if len(documents) == page_size else None
+    items = [transform(doc) for doc in documents] if transform else documents
+    return {"items": items, "next_after": next_after, "total": total}
+
+
+async def iter_batches_async(collection, batch_size=DEFAULT_BATCH_SIZE, query=None, transform=None, projection=None):
+    """Async generator version of iter_batches."""
+    if not isinstance(batch_size, int) or batch_size <= 0:
+        raise ValueError("Batch size must be a positive integer")
+
+    cursor = collection.find(query or {}, projection).sort("_id", 1).batch_size(batch_size)
+    batch = []
+    async for doc in cursor:
+        batch.append(transform(doc) if transform else doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
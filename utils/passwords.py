@@ -0,0 +1,159 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from bson import ObjectId
+import bcrypt
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+# Waits on the hash and stores it, so a rehash is one step callers can wait for
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-rehash")
+
+_ROUNDS_PATTERN = re.compile(r"^\$2[aby]?\$(\d{2})\$")
+
+
+def _current_rounds(rounds=None):
+    return rounds if rounds is not None else get_settings()["bcrypt_rounds"]
+
+
+def _hash(raw_password, rounds):
+    # Runs inside the worker processes, so it must stay a plain module-level function
+    return bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _get_pool():
+    """Return the shared hashing process pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = get_settings()["hash_workers"] or os.cpu_count() or 1
+            # Spawned, not forked: by now the process has Tk, asyncio and pymongo threads whose
+            # locks a forked child would inherit in whatever state they were in
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False)
+        return _pool
+
+
+def hash_password(raw_password, rounds=None):
+    """Hash one password in the calling thread; bcrypt releases the GIL while it works."""
+    return _hash(raw_password, _current_rounds(rounds))
+
+
+def submit_hash(raw_password, rounds=None):
+    """Hash one password in the process pool and return a Future with the hash."""
+    return _get_pool().submit(_hash, raw_password, _current_rounds(rounds))
+
+
+def hash_passwords(raw_passwords, rounds=None):
+    """Hash many passwords in parallel, one CPU per worker; results keep the input order."""
+    raw_passwords = list(raw_passwords)
+    if len(raw_passwords) < 2:
+        return [hash_password(raw, rounds) for raw in raw_passwords]
+    rounds = _current_rounds(rounds)
+    return list(_get_pool().map(_hash, raw_passwords, [rounds] * len(raw_passwords)))
+
+
+def check_password(raw_password, hashed_password):
+    """Return True when the password matches the stored hash."""
+    if not hashed_password:
+        return False
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(raw_password.encode('utf-8'), hashed_password)
+
+
+def hash_rounds(hashed_password):
+    """Return the work factor a bcrypt hash was made with, or None if it isn't a bcrypt hash."""
+    if isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.decode('utf-8')
+    match = _ROUNDS_PATTERN.match(hashed_password or "")
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed_password, rounds=None):
+    """True when a hash was made with a lower work factor than the configured one."""
+    current = hash_rounds(hashed_password)
+    return current is None or current < _current_rounds(rounds)
+
+
+def benchmark_rounds(target_ms=250, min_rounds=10, max_rounds=16):
+    """
+    Pick the highest work factor whose hash still takes no longer than target_ms on this machine.
+
+    Returns (rounds, timings) where timings maps each tried work factor to milliseconds.
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        started = time.perf_counter()
+        _hash("benchmark-password", rounds)
+        timings[rounds] = (time.perf_counter() - started) * 1000
+        if timings[rounds] > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+
+def mark_stale_hashes(db, rounds=None):
+    """
+    Flag employees whose hash is weaker than the configured work factor.
+
+    bcrypt cannot be upgraded without the plain password, so flagged hashes are replaced
+    the next time the password is set or verified (see rehash_if_needed).
+    """
+    rounds = _current_rounds(rounds)
+    weaker = "|".join(f"{r:02d}" for r in range(4, rounds))
+    if not weaker:
+        return 0
+    result = db.employees.update_many(
+        {"hashed_password": {"$regex": rf"^\$2[aby]?\$({weaker})\$"}},
+        {"$set": {"password_rehash_required": True}}
+    )
+    return result.modified_count
+
+
+def _rehash(db, employee_id, raw_password, hashed_password, rounds):
+    from utils.cache import invalidate_document
+    try:
+        new_hash = submit_hash(raw_password, rounds).result()
+        # Only replace the hash we checked, in case the password changed meanwhile
+        db.employees.update_one(
+            {"_id": ObjectId(employee_id), "hashed_password": hashed_password},
+            {"$set": {"hashed_password": new_hash}, "$unset": {"password_rehash_required": ""}}
+        )
+    except Exception:
+        logger.exception("Could not store the new password hash of employee %s", employee_id)
+        raise
+    finally:
+        invalidate_document(db.employees, ObjectId(employee_id))
+
+
+def rehash_if_needed(db, employee_id, raw_password, hashed_password, rounds=None):
+    """
+    After a successful password check, upgrade a weak hash in the background.
+
+    Returns a Future that resolves once the new hash is stored (and the cached employee
+    dropped), or None when the hash is already strong enough.
+    """
+    if not needs_rehash(hashed_password, rounds):
+        return None
+    return _rehash_executor.submit(_rehash, db, employee_id, raw_password, hashed_password, _current_rounds(rounds))
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.passwords [target_ms]
+    import sys
+
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 250
+    chosen, measured = benchmark_rounds(target)
+    for cost, ms in measured.items():
+        print(f"rounds={cost}: {ms:.1f} ms")
+    print(f"Recommended: MS_BCRYPT_ROUNDS={chosen}")
@@ -0,0 +1,89 @@
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    """
+    In-memory prefix index over a few text fields of a set of documents.
+
+    Every field value is indexed whole and word by word, lower-cased, in one sorted list,
+    so a lookup is a binary search plus a short scan of the matching range.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._keys = []
+        self._documents = {}
+
+    def _terms(self, document):
+        terms = set()
+        for field in self.fields:
+            value = document.get(field)
+            if not value:
+                continue
+            value = str(value).lower()
+            terms.update({value, *value.split()})
+        return terms
+
+    def build(self, documents):
+        """Replace the index contents with the given documents."""
+        keys = []
+        self._documents = {}
+        for document in documents:
+            document_id = str(document["_id"])
+            self._documents[document_id] = document
+            keys.extend((term, document_id) for term in self._terms(document))
+        keys.sort()
+        self._keys = keys
+        return self
+
+    def add(self, document):
+        """Index one document, replacing any earlier version of it."""
+        document_id = str(document["_id"])
+        self.remove(document_id)
+        self._documents[document_id] = document
+        for term in self._terms(document):
+            insort(self._keys, (term, document_id))
+
+    def extend(self, documents):
+        """Index a batch of new documents (e.g. the next page) with one sort instead of one insort per term."""
+        for document in documents:
+            document_id = str(document["_id"])
+            self.remove(document_id)
+            self._documents[document_id] = document
+            self._keys.extend((term, document_id) for term in self._terms(document))
+        # Timsort merges the already-sorted prefix with the new run in near-linear time
+        self._keys.sort()
+        return self
+
+    def remove(self, document_id):
+        """Drop one document from the index; unknown IDs are ignored."""
+        document_id = str(document_id)
+        document = self._documents.pop(document_id, None)
+        if document is None:
+            return
+        for term in self._terms(document):
+            position = bisect_left(self._keys, (term, document_id))
+            if position < len(self._keys) and self._keys[position] == (term, document_id):
+                del self._keys[position]
+
+    def search(self, prefix, limit=50):
+        """Return up to `limit` documents with a field or word starting with prefix."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(results) < limit:
+            term, document_id = self._keys[position]
+            if not term.startswith(prefix):
+                break
+            if document_id not in seen:
+                seen.add(document_id)
+                results.append(self._documents[document_id])
+            position += 1
+        return results
+
+    def __len__(self):
+        return len(self._documents)
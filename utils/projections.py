@@ -0,0 +1,82 @@
+import importlib
+
+# Model class per entity, for the public field allow-lists
+_MODELS = {
+    "companies": ("models.companies_model", "Company"),
+    "departments": ("models.departments_model", "Department"),
+    "employees": ("models.employees_model", "Employee"),
+    "roles": ("models.roles_model", "Role"),
+}
+# Named projections callers outside the controllers may use; "credentials" is not one of them
+PUBLIC_VIEWS = ("list", "detail")
+
+
+def check_public_projection(entity, projection):
+    """
+    Reject a projection from an outside caller (API, CLI) that could expose a secret field.
+
+    Only the public views and inclusion of the entity's PUBLIC_FIELDS are allowed, and never
+    its SECRET_FIELDS; raises ValueError otherwise and returns the projection unchanged.
+    """
+    if projection is None:
+        return None
+    if isinstance(projection, str):
+        if projection not in PUBLIC_VIEWS:
+            raise ValueError(f"Unknown projection {projection!r}; expected one of {', '.join(PUBLIC_VIEWS)}")
+        return projection
+    module_name, class_name = _MODELS[entity]
+    model = getattr(importlib.import_module(module_name), class_name)
+    allowed = model.PUBLIC_FIELDS
+    if isinstance(projection, dict) and not all(projection.values()):
+        # An exclusion projection returns every field it doesn't name, secret ones included
+        raise ValueError("Only inclusion projections are allowed")
+    secret = [field for field in projection if field in getattr(model, "SECRET_FIELDS", ())]
+    if secret:
+        raise ValueError(f"Secret fields cannot be requested: {', '.join(secret)}")
+    unknown = [field for field in projection if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}; expected some of {', '.join(allowed)}")
+    return projection
+
+
+def resolve_projection(projection, named, default=None):
+    """
+    Turn a projection argument into a MongoDB projection dict (or None for every field).
+
+    projection may be the name of one of the `named` views (e.g. "list", "detail"), a list of
+    field names to include, or a projection dict. None falls back to the `default` view name.
+    """
+    if projection is None:
+        projection = default
+        if projection is None:
+            return None
+    if isinstance(projection, str):
+        if projection not in named:
+            raise ValueError(f"Unknown projection {projection!r}; expected one of {', '.join(named)}")
+        projection = named[projection]
+        if projection is None:
+            return None
+    if isinstance(projection, (list, tuple, set)):
+        return {field: 1 for field in projection}
+    return dict(projection)
+
+
+def project_document(document, projection):
+    """Apply a resolved projection to a document already in memory (e.g. a cached one)."""
+    if document is None or not projection:
+        return document
+
+    include_id = projection.get("_id", 1)
+    fields = {field: value for field, value in projection.items() if field != "_id"}
+    if any(fields.values()):
+        # Inclusion projection: keep only the listed fields
+        projected = {field: document[field] for field in fields if field in document}
+    else:
+        # Exclusion projection: drop the listed fields
+        projected = {field: value for field, value in document.items() if field not in fields}
+
+    if include_id and "_id" in document:
+        projected["_id"] = document["_id"]
+    else:
+        projected.pop("_id", None)
+    return projected
@@ -0,0 +1,273 @@
+"""
+Local SQLite read replica of the entity collections, for offices on high-latency links.
+
+Each collection is seeded with one full read, then kept current by pulling only the documents
+whose updated_at is at or above its watermark, plus the tombstones of deleted ones. The
+watermark is the server's clock when a pull started, and each pull reaches back
+replica_sync_overlap_ms before it to cover clock skew between writers and commit latency.
+
+get_all_*, get_*_page and get_*_by_id read from the replica while it is within
+replica_max_staleness_ms of the server; otherwise they pull the changes first and fall back to
+the server if that fails.
+Writes made by this process mark their collection stale, so they are visible on the next read.
+A background thread keeps collections fresh so most reads never wait on the network.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import bson
+from pymongo.errors import PyMongoError
+from utils.change_tracking import TOMBSTONES, TOMBSTONE_TTL_SECONDS, UPDATED_AT, local_writes, now
+from utils.pagination import check_page
+from utils.projections import project_document
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ("companies", "departments", "roles", "employees")
+# Fields that never leave the server
+_EXCLUDED = {"employees": {"hashed_password": 0, "password_rehash_required": 0}}
+_INSERT_CHUNK = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (collection, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    collection TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class LocalReplica:
+    """SQLite copy of the entity collections of one database, kept current by delta pulls."""
+
+    def __init__(self, path, db, max_staleness_ms=30000, overlap_ms=5000):
+        self.db = db
+        self.max_staleness = max_staleness_ms / 1000
+        self.overlap = timedelta(milliseconds=overlap_ms)
+        # One connection shared by every thread; sqlite3 calls are serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        self._sync_locks = {collection: threading.Lock() for collection in COLLECTIONS}
+        self._fresh_until = {}
+        self._seen_writes = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Syncing
+
+    def _server_time(self):
+        try:
+            moment = self.db.command("hello")["localTime"]
+        except NotImplementedError:
+            # In-process stand-ins such as mongomock have no hello
+            return now()
+        return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+    def _state(self, collection):
+        with self._lock:
+            row = self._conn.execute("SELECT watermark, synced_at FROM sync_state WHERE collection = ?", (collection,)).fetchone()
+        if row is None:
+            return None, None
+        return datetime.fromisoformat(row[0]), row[1]
+
+    def sync(self, collection, reseed=False):
+        """
+        Bring one collection up to date; the first sync (or reseed=True) copies all of it.
+
+        Returns the number of documents and tombstones pulled.
+        """
+        with self._sync_locks[collection]:
+            # Read before pulling, so a write made while the pull runs marks it stale again
+            seen_writes = local_writes(collection)
+            started = time.monotonic()
+            watermark, synced_at = self._state(collection)
+            # Tombstones expire; past their lifetime, deletes could have been missed
+            if reseed or watermark is None or time.time() - synced_at > TOMBSTONE_TTL_SECONDS:
+                pulled = self._seed(collection)
+            else:
+                pulled = self._pull(collection, watermark)
+            self._fresh_until[collection] = started + self.max_staleness
+            self._seen_writes[collection] = seen_writes
+            return pulled
+
+    def _seed(self, collection):
+        watermark = self._server_time()
+        # Fetched before taking the lock, so reads of other collections aren't held up by the network
+        documents = list(self.db[collection].find({}, _EXCLUDED.get(collection)))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            pulled = self._store(collection, documents)
+            self._save_state(collection, watermark)
+        logger.info("Seeded the local replica of %s with %d documents", collection, pulled)
+        return pulled
+
+    def _pull(self, collection, watermark):
+        since = watermark - self.overlap
+        next_watermark = self._server_time()
+        documents = list(self.db[collection].find({UPDATED_AT: {"$gte": since}}, _EXCLUDED.get(collection)))
+        deleted = [str(doc["document_id"]) for doc in self.db[TOMBSTONES].find(
+            {"collection": collection, "deleted_at": {"$gte": since}}, {"document_id": 1}
+        )]
+        with self._lock, self._conn:
+            self._store(collection, documents)
+            self._conn.executemany("DELETE FROM documents WHERE collection = ? AND id = ?", [(collection, i) for i in deleted])
+            self._save_state(collection, next_watermark)
+        return len(documents) + len(deleted)
+
+    def _store(self, collection, documents):
+        stored = 0
+        batch = []
+        for document in documents:
+            batch.append((collection, str(document["_id"]), bson.encode(document)))
+            if len(batch) >= _INSERT_CHUNK:
+                stored += self._insert(batch)
+        return stored + self._insert(batch)
+
+    def _insert(self, batch):
+        self._conn.executemany("INSERT OR REPLACE INTO documents (collection, id, body) VALUES (?, ?, ?)", batch)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def _save_state(self, collection, watermark):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO sync_state (collection, watermark, synced_at) VALUES (?, ?, ?)",
+            (collection, watermark.isoformat(), time.time())
+        )
+
+    def is_fresh(self, collection):
+        """True while the last sync is within the staleness bound and this process wrote nothing since."""
+        return (time.monotonic() < self._fresh_until.get(collection, 0)
+                and self._seen_writes.get(collection) == local_writes(collection))
+
+    def ensure_fresh(self, collection):
+        """Sync a stale collection; returns False when it could not catch up with the server."""
+        if self.is_fresh(collection):
+            return True
+        try:
+            self.sync(collection)
+            return True
+        except PyMongoError as e:
+            logger.warning("Local replica of %s could not sync: %s", collection, e)
+            return False
+
+    def start_background_sync(self, interval=None):
+        """Keep every collection fresh from a daemon thread, syncing every interval seconds."""
+        if self._thread is not None:
+            return
+        interval = interval or max(self.max_staleness / 2, 1)
+
+        def run():
+            while not self._stop.wait(interval):
+                for collection in COLLECTIONS:
+                    try:
+                        self.sync(collection)
+                    except PyMongoError as e:
+                        logger.warning("Background sync of %s failed: %s", collection, e)
+
+        self._thread = threading.Thread(target=run, name="replica-sync", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
+
+    # Reads
+
+    def find_all(self, collection, projection=None):
+        """Every document of a collection, ordered by _id like the server's cursors."""
+        with self._lock:
+            rows = self._conn.execute("SELECT body FROM documents WHERE collection = ? ORDER BY id", (collection,)).fetchall()
+        return [project_document(bson.decode(body), projection) for (body,) in rows]
+
+    def find_page(self, collection, page_size, after=None, with_total=False, projection=None):
+        """One keyset page of a collection, shaped like utils.pagination.fetch_page's result."""
+        after = check_page(page_size, after)
+        # ObjectId hex strings have a fixed width, so ordering by id matches the server's _id order
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT body FROM documents WHERE collection = ? AND id > ? ORDER BY id LIMIT ?",
+                (collection, str(after) if after is not None else "", page_size)
+            ).fetchall()
+            total = None
+            if with_total:
+                total = self._conn.execute("SELECT COUNT(*) FROM documents WHERE collection = ?", (collection,)).fetchone()[0]
+        documents = [project_document(bson.decode(body), projection) for (body,) in rows]
+        next_after = str(documents[-1]["_id"]) if len(documents) == page_size else None
+        return {"items": documents, "next_after": next_after, "total": total}
+
+    def find_by_id(self, collection, document_id, projection=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM documents WHERE collection = ? AND id = ?", (collection, str(document_id))
+            ).fetchone()
+        return project_document(bson.decode(row[0]), projection) if row else None
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT collection, COUNT(*) FROM documents GROUP BY collection").fetchall())
+        return {
+            collection: {"documents": counts.get(collection, 0), "fresh": self.is_fresh(collection)}
+            for collection in COLLECTIONS
+        }
+
+
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica():
+    """Return the process-wide replica, or None when replica_path is not set."""
+    global _replica
+    from config.settings import get_settings
+    settings = get_settings()
+    if not settings["replica_path"]:
+        return None
+    with _replica_lock:
+        if _replica is None:
+            from config.db_config import get_client
+            _replica = LocalReplica(
+                settings["replica_path"], get_client()[settings["database_name"]],
+                settings["replica_max_staleness_ms"], settings["replica_sync_overlap_ms"]
+            )
+            _replica.start_background_sync()
+        return _replica
+
+
+def _enabled_for(db):
+    from config.settings import get_settings
+    settings = get_settings()
+    return bool(settings["replica_path"]) and db.name == settings["database_name"]
+
+
+def serving_replica(db, collection):
+    """
+    The replica to read a collection from, or None to read from the server.
+
+    Only reads of the configured database are served locally, and only once the collection
+    is within the staleness bound (syncing it first when needed).
+    """
+    if not _enabled_for(db):
+        return None
+    replica = get_replica()
+    return replica if replica.ensure_fresh(collection) else None
+
+
+async def serving_replica_async(db, collection):
+    """serving_replica for coroutines; a sync it needs runs on a worker thread, off the event loop."""
+    if not _enabled_for(db):
+        return None
+    return await asyncio.to_thread(serving_replica, db, collection)
@@ -0,0 +1,164 @@
+"""
+Deterministic synthetic data for companies, departments, roles and employees.
+
+Usage: python -m utils.seeder --companies 100 --departments 10 --roles 5 --employees 40 [--seed 1]
+"""
+import argparse
+import random
+import time
+from bson import ObjectId
+from utils.change_tracking import stamp
+from utils.formatters import format_address, format_email, format_name, format_phone_number
+from utils.passwords import hash_passwords
+from utils.validators import is_valid_address, is_valid_email, is_valid_name, is_valid_phone_number
+
+DEFAULT_BATCH_SIZE = 5000
+# bcrypt's minimum cost: seeded accounts only need a well-formed hash, not a strong one
+SEED_BCRYPT_ROUNDS = 4
+
+_FIRST_NAMES = ["ahmed", "mona", "omar", "sara", "youssef", "laila", "karim", "nour", "hassan", "salma",
+                "john", "maria", "david", "emma", "lucas", "sofia", "adam", "hana", "ali", "yara"]
+_LAST_NAMES = ["hassan", "ibrahim", "mostafa", "salem", "fathy", "smith", "garcia", "brown", "khalil", "nasser",
+               "adel", "farouk", "mansour", "taha", "lopez", "wilson", "said", "zaki", "amin", "kamal"]
+_COMPANY_WORDS = ["nile", "delta", "pyramid", "lotus", "horizon", "falcon", "oasis", "cedar", "atlas", "summit"]
+_COMPANY_SUFFIXES = ["tech", "systems", "logistics", "solutions", "holdings", "labs", "trading", "group"]
+_CITIES = ["cairo", "giza", "alexandria", "mansoura", "aswan", "luxor", "tanta", "suez"]
+_DEPARTMENTS = ["engineering", "finance", "human resources", "marketing", "sales", "support", "legal",
+                "operations", "research", "procurement"]
+_ROLES = ["manager", "engineer", "analyst", "specialist", "coordinator", "director", "associate", "consultant"]
+_NATIONALITIES = ["Egyptian", "Saudi", "Jordanian", "Lebanese", "Moroccan", "British", "German", "Indian"]
+
+
+def _object_id(rng):
+    # Random bytes from the seeded generator, so the same seed gives the same IDs
+    return ObjectId(rng.randbytes(12))
+
+
+def _check(record, checks):
+    for field, validator in checks.items():
+        if not validator(record[field]):
+            raise ValueError(f"Generated an invalid {field}: {record[field]!r}")
+    return record
+
+
+def _company(rng, index):
+    name = format_name(f"{rng.choice(_COMPANY_WORDS)} {rng.choice(_COMPANY_SUFFIXES)}")
+    return _check({
+        "_id": _object_id(rng),
+        "name": name,
+        "phone_number": format_phone_number(f"02-{rng.randrange(10**7, 10**8)}"),
+        "email": format_email(f"contact{index}@{name.replace(' ', '')}.com"),
+        "location": format_address(rng.choice(_CITIES)),
+    }, {"name": is_valid_name, "phone_number": is_valid_phone_number, "email": is_valid_email, "location": is_valid_address})
+
+
+def _department(rng, company_id, index):
+    return _check({
+        "_id": _object_id(rng),
+        "name": format_name(_DEPARTMENTS[index % len(_DEPARTMENTS)]),
+        "description": f"Seeded department {index}",
+        "company_id": company_id,
+    }, {"name": is_valid_name})
+
+
+def _role(rng, department_id, index):
+    return _check({
+        "_id": _object_id(rng),
+        "title": format_name(f"{rng.choice(['junior', 'senior', 'lead'])} {_ROLES[index % len(_ROLES)]}"),
+        "description": f"Seeded role {index}",
+        "department_id": department_id,
+    }, {"title": is_valid_name})
+
+
+def _employee(rng, department_id, index, hashed_password):
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    return _check({
+        "_id": _object_id(rng),
+        "name": format_name(f"{first} {last}"),
+        # The running index keeps emails unique for the unique email index
+        "email": format_email(f"{first}.{last}.{index}@example.com"),
+        "phone_number": format_phone_number(f"+20 1{rng.randrange(10**9, 10**10)}"),
+        "department_id": department_id,
+        "hashed_password": hashed_password,
+        "nationality": rng.choice(_NATIONALITIES),
+    }, {"name": is_valid_name, "email": is_valid_email, "phone_number": is_valid_phone_number})
+
+
+class _BatchWriter:
+    """Buffers documents per collection and flushes them with unordered insert_many."""
+
+    def __init__(self, db, batch_size):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, collection_name, document):
+        buffer = self.buffers.setdefault(collection_name, [])
+        buffer.append(stamp(document))
+        if len(buffer) >= self.batch_size:
+            self.flush(collection_name)
+
+    def flush(self, collection_name=None):
+        names = [collection_name] if collection_name else list(self.buffers)
+        for name in names:
+            buffer = self.buffers.get(name)
+            if buffer:
+                self.db[name].insert_many(buffer, ordered=False)
+                self.counts[name] = self.counts.get(name, 0) + len(buffer)
+                buffer.clear()
+
+
+def seed_database(db, companies=10, departments_per_company=5, roles_per_department=4,
+                  employees_per_department=20, seed=0, batch_size=DEFAULT_BATCH_SIZE, password_pool=32):
+    """
+    Insert a consistent companies → departments → roles/employees hierarchy.
+
+    The same seed always produces the same documents and IDs, except for the bcrypt salts.
+    Employees share `password_pool` distinct passwords hashed once at the cheapest cost.
+    Returns the number of inserted documents per collection, the elapsed seconds and docs/sec.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    passwords = [f"password{i}" for i in range(max(1, password_pool))]
+    hashes = hash_passwords(passwords, rounds=SEED_BCRYPT_ROUNDS)
+
+    writer = _BatchWriter(db, batch_size)
+    employee_index = 0
+    for company_index in range(companies):
+        company = _company(rng, company_index)
+        writer.add("companies", company)
+        for department_index in range(departments_per_company):
+            department = _department(rng, company["_id"], department_index)
+            writer.add("departments", department)
+            for role_index in range(roles_per_department):
+                writer.add("roles", _role(rng, department["_id"], role_index))
+            for _ in range(employees_per_department):
+                writer.add("employees", _employee(rng, department["_id"], employee_index, hashes[employee_index % len(hashes)]))
+                employee_index += 1
+    writer.flush()
+
+    seconds = time.perf_counter() - started
+    total = sum(writer.counts.values())
+    return {
+        "inserted": dict(writer.counts),
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(total / seconds, 1) if seconds else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    from config.db_config import get_database
+
+    parser = argparse.ArgumentParser(description="Seed the database with synthetic data.")
+    parser.add_argument("--companies", type=int, default=10)
+    parser.add_argument("--departments", type=int, default=5, help="departments per company")
+    parser.add_argument("--roles", type=int, default=4, help="roles per department")
+    parser.add_argument("--employees", type=int, default=20, help="employees per department")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(seed_database(get_database(), args.companies, args.departments, args.roles, args.employees,
+                        seed=args.seed, batch_size=args.batch_size))
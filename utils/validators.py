@@ -13,6 +13,12 @@ def is_valid_object_id(object_id):
     # Validate if the given string is a valid MongoDB ObjectId.
     return ObjectId.is_valid(object_id)
 
+def to_object_id(value, label):
+    # Convert a reference to an ObjectId, raising ValueError("Invalid <label> ID") when it isn't one.
+    if not ObjectId.is_valid(value):
+        raise ValueError(f"Invalid {label} ID")
+    return ObjectId(value)
+
 def is_valid_name(name):
     # Validate if the given name is non-empty and contains only letters and spaces.
     return bool(name) and all(char.isalpha() or char.isspace() for char in name)
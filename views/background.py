@@ -0,0 +1,100 @@
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the worker pool shared by every view."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="view-loader")
+        return _executor
+
+
+class BackgroundLoader:
+    """
+    Run controller calls on worker threads and hand their results back on the Tk thread.
+
+    Tk is not thread-safe, so workers never touch widgets: finished futures are queued and
+    drained by a `root.after` poll. Calls sharing a key supersede each other, so a slow
+    refresh that returns after a newer one started is dropped instead of overwriting it.
+    """
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root, status_var=None):
+        self.root = root
+        self.status_var = status_var
+        self._results = queue.Queue()
+        self._generations = {}
+        self._pending = 0
+        self._polling = False
+
+    def run(self, key, func, *args, on_success=None, on_error=None, message="Loading..."):
+        """Call func(*args) in the background; key=None means the result is never treated as stale."""
+        return self._track(key, lambda: get_executor().submit(func, *args), on_success, on_error, message)
+
+    def run_async(self, key, coroutine_func, *args, on_success=None, on_error=None, message="Loading..."):
+        """Like run(), but await coroutine_func(*args) on the shared event-loop thread."""
+        from utils.event_loop import submit
+        return self._track(key, lambda: submit(coroutine_func(*args)), on_success, on_error, message)
+
+    def _track(self, key, start, on_success, on_error, message):
+        generation = None
+        if key is not None:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+
+        self._pending += 1
+        self._set_status(message)
+
+        future = start()
+        future.add_done_callback(lambda f: self._results.put((key, generation, f, on_success, on_error)))
+        self._schedule_poll()
+        return future
+
+    def cancel(self, key):
+        """Mark any call in flight under key as stale without starting a new one."""
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _schedule_poll(self):
+        if not self._polling:
+            try:
+                self.root.after(self.POLL_INTERVAL_MS, self._poll)
+                self._polling = True
+            except tk.TclError:
+                # The window was closed while work was still running
+                pass
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                key, generation, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._pending -= 1
+            if key is not None and generation != self._generations.get(key):
+                # A newer call with the same key is in flight; this answer is stale
+                continue
+
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+            elif on_success:
+                on_success(future.result())
+
+        if self._pending > 0:
+            self._schedule_poll()
+        else:
+            self._set_status("")
+
+    def _set_status(self, message):
+        if self.status_var is not None:
+            self.status_var.set(message)
@@ -1,26 +1,85 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from controllers.companies_controller import get_all_companies, get_company_by_id, add_company, edit_company, delete_company
+from controllers.async_companies_controller import get_companies_page, search_companies, get_company_by_id, add_company, edit_company, delete_company
+from controllers.cascade_controller import delete_company_cascade
+from utils.prefix_index import PrefixIndex
+from config.db_config import get_async_database
+from views.background import BackgroundLoader
+from views.paging import PAGE_SIZE, PagedRows
+from views.search_support import bind_debounced
+from views.staged_changes import StagingPanel
 
-def create_companies_view(db):
+def create_companies_view(db, parent):
     """
     Create a Tkinter GUI for managing companies.
     """
+    # Rows loaded so far (one page at a time), and the prefix index over them used for type-ahead search
+    all_companies = {}
+    prefix_index = PrefixIndex(("name", "email", "location"))
+    # Controller calls run as coroutines on the shared async client; db is kept for the
+    # blocking-only paths such as cascade deletes
+    async_db = get_async_database()
+
     def refresh_companies():
-        """Refresh the Treeview with the latest company data."""
-        try:
-            companies = get_all_companies(db)
-            tree.delete(*tree.get_children())
-            for company in companies:
-                tree.insert("", "end", values=(
-                    str(company["_id"]),
-                    company["name"],
-                    company["phone_number"],
-                    company["email"],
-                    company["location"]
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch companies: {e}")
+        """Reload the first page of companies in the background and refresh the Treeview with it."""
+        paging.refresh()
+
+    async def fetch_page(after):
+        # Only the fields the Treeview renders; the first page also brings the estimated total
+        return await get_companies_page(async_db, PAGE_SIZE, after, after is None, columns)
+
+    def populate_tree(companies):
+        """Keep the loaded companies for type-ahead search and show them in the Treeview."""
+        all_companies.clear()
+        all_companies.update((str(company["_id"]), company) for company in companies)
+        prefix_index.build(companies)
+        show_rows(companies)
+
+    def append_rows(companies):
+        """Show the next page of companies below the rows already loaded."""
+        all_companies.update((str(company["_id"]), company) for company in companies)
+        prefix_index.extend(companies)
+        for company in companies:
+            if not tree.exists(str(company["_id"])):
+                tree.insert("", "end", iid=str(company["_id"]), values=row_values(company))
+        staging.mark_rows()
+
+    def row_values(company):
+        """Values of the Treeview columns for one company."""
+        return (
+            str(company["_id"]),
+            company.get("name", ""),
+            company.get("phone_number", ""),
+            company.get("email", ""),
+            company.get("location", "")
+        )
+
+    def show_rows(companies):
+        """Replace the Treeview rows with the given companies."""
+        tree.delete(*tree.get_children())
+        for company in companies:
+            tree.insert("", "end", iid=str(company["_id"]), values=row_values(company))
+        staging.mark_rows()
+
+    def upsert_row(company):
+        """Insert or update a single company row in place, keeping the selection and scroll position."""
+        company_id = str(company["_id"])
+        all_companies[company_id] = company
+        prefix_index.add(company)
+        if tree.exists(company_id):
+            tree.item(company_id, values=row_values(company))
+        else:
+            tree.insert("", "end", iid=company_id, values=row_values(company))
+        paging.update_summary()
+
+    def remove_row(company_id):
+        """Remove a single company row without reloading the others."""
+        company_id = str(company_id)
+        all_companies.pop(company_id, None)
+        prefix_index.remove(company_id)
+        if tree.exists(company_id):
+            tree.delete(company_id)
+        paging.update_summary()
 
     def add_company_action():
         """Add a new company."""
@@ -30,21 +89,29 @@ def create_companies_view(db):
         location = location_entry.get().strip()
 
         if not name or not phone or not email or not location:
-            messagebox.showwarning("Validation Error", "All fields are required.")
+            messagebox.showwarning("Validation Error", "All fields are required.", parent=window)
             return
 
-        try:
-            add_company(db, name, phone, email, location)
-            messagebox.showinfo("Success", "Company added successfully.")
-            refresh_companies()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add company: {e}")
+        if staging.enabled():
+            staging.stage_insert({"name": name, "phone_number": phone, "email": email, "location": location})
+            return
+
+        def on_added(company):
+            upsert_row(company)
+            messagebox.showinfo("Success", "Company added successfully.", parent=window)
+
+        loader.run_async(
+            None, add_company, async_db, name, phone, email, location,
+            on_success=on_added,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add company: {e}", parent=window),
+            message="Saving..."
+        )
 
     def edit_company_action():
         """Edit the selected company."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a company to edit.")
+            messagebox.showwarning("Selection Error", "Please select a company to edit.", parent=window)
             return
 
         company_id = tree.item(selected_item)["values"][0]
@@ -54,35 +121,94 @@ def create_companies_view(db):
         location = location_entry.get().strip()
 
         if not name or not phone or not email or not location:
-            messagebox.showwarning("Validation Error", "All fields are required.")
+            messagebox.showwarning("Validation Error", "All fields are required.", parent=window)
+            return
+
+        if staging.enabled():
+            staging.stage_update(company_id, {"name": name, "phone_number": phone, "email": email, "location": location})
             return
 
-        try:
-            edit_company(db, company_id, {
+        def on_updated(company):
+            if company is None:
+                remove_row(company_id)
+                messagebox.showinfo("Not Found", "The company no longer exists.", parent=window)
+                return
+            upsert_row(company)
+            messagebox.showinfo("Success", "Company updated successfully.", parent=window)
+
+        loader.run_async(
+            None, edit_company, async_db, company_id, {
                 "name": name,
                 "phone_number": phone,
                 "email": email,
                 "location": location
-            })
-            messagebox.showinfo("Success", "Company updated successfully.")
-            refresh_companies()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update company: {e}")
+            },
+            on_success=on_updated,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update company: {e}", parent=window),
+            message="Saving..."
+        )
 
     def delete_company_action():
         """Delete the selected company."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a company to delete.")
+            messagebox.showwarning("Selection Error", "Please select a company to delete.", parent=window)
             return
 
         company_id = tree.item(selected_item)["values"][0]
-        try:
-            delete_company(db, company_id)
-            messagebox.showinfo("Success", "Company deleted successfully.")
-            refresh_companies()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete company: {e}")
+
+        if staging.enabled():
+            # Staged rows may not have a database ID yet, and staged deletes never cascade
+            staging.stage_delete(company_id)
+            return
+
+        cascade = messagebox.askyesnocancel(
+            "Delete Company",
+            "Also delete its departments, roles and employees?\n\nYes: delete everything under it\nNo: delete only the company",
+            parent=window
+        )
+        if cascade is None:
+            return
+
+        def on_deleted(result):
+            if cascade:
+                details = ", ".join(f"{count} {name}" for name, count in result.items())
+                messagebox.showinfo("Success", f"Company deleted successfully ({details}).", parent=window)
+            else:
+                messagebox.showinfo("Success", "Company deleted successfully.", parent=window)
+            remove_row(company_id)
+
+        callbacks = dict(
+            on_success=on_deleted,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete company: {e}", parent=window),
+            message="Deleting..."
+        )
+        if cascade:
+            # The cascade runs in a transaction on the blocking client
+            loader.run(None, delete_company_cascade, db, company_id, **callbacks)
+        else:
+            loader.run_async(None, delete_company, async_db, company_id, **callbacks)
+
+    def on_search_text(text):
+        """Filter the loaded rows while typing; ask the server when they may not hold every match."""
+        loader.cancel("companies-search")
+        if not text:
+            show_rows(all_companies.values())
+            return
+
+        matches = prefix_index.search(text, limit=200)
+        if len(text) < 3 or (matches and paging.complete):
+            show_rows(matches)
+            return
+
+        # Rows on pages not loaded yet may match too; show the local matches meanwhile
+        show_rows(matches)
+
+        loader.run_async(
+            "companies-search", search_companies, async_db, text, 20, columns,
+            on_success=lambda found: show_rows({str(row["_id"]): row for row in [*matches, *found]}.values()),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to search companies: {e}", parent=window)
+        )
 
     def on_tree_select(event):
         """Handle Treeview item selection."""
@@ -98,12 +224,12 @@ def create_companies_view(db):
             location_entry.delete(0, tk.END)
             location_entry.insert(0, values[4])
 
-    # Create the main Tkinter window
-    root = tk.Tk()
-    root.title("Companies Management")
+    # A Toplevel of the application's single root; the main menu hides it instead of destroying it
+    window = tk.Toplevel(parent)
+    window.title("Companies Management")
 
     # Input Form
-    form_frame = tk.Frame(root)
+    form_frame = tk.Frame(window)
     form_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(form_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -123,7 +249,7 @@ def create_companies_view(db):
     location_entry.grid(row=3, column=1, padx=5, pady=5, sticky="ew")
 
     # Action Buttons
-    button_frame = tk.Frame(root)
+    button_frame = tk.Frame(window)
     button_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Button(button_frame, text="Add Company", command=add_company_action).grid(row=0, column=0, padx=5, pady=5)
@@ -131,7 +257,7 @@ def create_companies_view(db):
     tk.Button(button_frame, text="Delete Company", command=delete_company_action).grid(row=0, column=2, padx=5, pady=5)
 
     # Treeview for displaying companies
-    tree_frame = tk.Frame(root)
+    tree_frame = tk.Frame(window)
     tree_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
 
     columns = ("_id", "name", "phone_number", "email", "location")
@@ -152,6 +278,37 @@ def create_companies_view(db):
     tree.bind("<<TreeviewSelect>>", on_tree_select)
     tree.pack(fill="both", expand=True)
 
+    # Search Section
+    search_frame = tk.Frame(window)
+    search_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
+
+    tk.Label(search_frame, text="Search by name/email:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
+    search_text_entry = tk.Entry(search_frame)
+    search_text_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+    bind_debounced(search_text_entry, on_search_text)
+
+    # Loading indicator, driven by the background loader
+    status_var = tk.StringVar()
+    tk.Label(window, textvariable=status_var, anchor="w").grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+    loader = BackgroundLoader(window, status_var)
+
+    # Staged changes: collected here and written with one bulk_write on Apply
+    staging = StagingPanel(
+        window, tree, "companies", db, loader, row_values, upsert_row, remove_row,
+        lookup=all_companies.get, redraw=lambda: show_rows(all_companies.values())
+    )
+    staging.frame.grid(row=4, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+    # Rows arrive one page at a time; "Load more" under the Treeview fetches the next page
+    paging = PagedRows(
+        tree_frame, loader, "companies", fetch_page, populate_tree, append_rows,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch companies: {e}", parent=window),
+        count=lambda: len(all_companies)
+    )
+    paging.frame.pack(fill="x")
+
+    # Shown again from the main menu: reload in the background, the old rows stay until then
+    window.bind("<<ViewShown>>", lambda event: refresh_companies())
     refresh_companies()
 
-    root.mainloop()
\ No newline at end of file
+    return window
@@ -1,25 +1,84 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from controllers.departments_controller import get_all_departments, get_department_by_id, add_department, edit_department, delete_department
+from controllers.async_departments_controller import get_departments_page, search_departments, get_department_by_id, add_department, edit_department, delete_department
+from controllers.cascade_controller import delete_department_cascade
 from utils.validators import is_valid_object_id
 from utils.formatters import format_name
-
-def create_departments_view(db):
+from utils.prefix_index import PrefixIndex
+from config.db_config import get_async_database
+from views.background import BackgroundLoader
+from views.paging import PAGE_SIZE, PagedRows
+from views.search_support import bind_debounced
+from views.staged_changes import StagingPanel
+
+def create_departments_view(db, parent):
     """Create a Tkinter GUI for managing departments."""
+    # Rows loaded so far (one page at a time), and the prefix index over them used for type-ahead search
+    all_departments = {}
+    prefix_index = PrefixIndex(("name", "description"))
+    # Controller calls run as coroutines on the shared async client; db is kept for the
+    # blocking-only paths such as cascade deletes
+    async_db = get_async_database()
+
     def refresh_departments():
-        """Refresh the Treeview with the latest department data."""
-        try:
-            departments = get_all_departments(db)
-            tree.delete(*tree.get_children())
-            for department in departments:
-                tree.insert("", "end", values=(
-                    str(department["_id"]),
-                    department["name"],
-                    department["description"],
-                    department["company_id"]
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch departments: {e}")
+        """Reload the first page of departments in the background and refresh the Treeview with it."""
+        paging.refresh()
+
+    async def fetch_page(after):
+        # Only the fields the Treeview renders; the first page also brings the estimated total
+        return await get_departments_page(async_db, PAGE_SIZE, after, after is None, columns)
+
+    def populate_tree(departments):
+        """Keep the loaded departments for type-ahead search and show them in the Treeview."""
+        all_departments.clear()
+        all_departments.update((str(department["_id"]), department) for department in departments)
+        prefix_index.build(departments)
+        show_rows(departments)
+
+    def append_rows(departments):
+        """Show the next page of departments below the rows already loaded."""
+        all_departments.update((str(department["_id"]), department) for department in departments)
+        prefix_index.extend(departments)
+        for department in departments:
+            if not tree.exists(str(department["_id"])):
+                tree.insert("", "end", iid=str(department["_id"]), values=row_values(department))
+        staging.mark_rows()
+
+    def row_values(department):
+        """Values of the Treeview columns for one department."""
+        return (
+            str(department["_id"]),
+            department.get("name", ""),
+            department.get("description", ""),
+            department.get("company_id", "")
+        )
+
+    def show_rows(departments):
+        """Replace the Treeview rows with the given departments."""
+        tree.delete(*tree.get_children())
+        for department in departments:
+            tree.insert("", "end", iid=str(department["_id"]), values=row_values(department))
+        staging.mark_rows()
+
+    def upsert_row(department):
+        """Insert or update a single department row in place, keeping the selection and scroll position."""
+        department_id = str(department["_id"])
+        all_departments[department_id] = department
+        prefix_index.add(department)
+        if tree.exists(department_id):
+            tree.item(department_id, values=row_values(department))
+        else:
+            tree.insert("", "end", iid=department_id, values=row_values(department))
+        paging.update_summary()
+
+    def remove_row(department_id):
+        """Remove a single department row without reloading the others."""
+        department_id = str(department_id)
+        all_departments.pop(department_id, None)
+        prefix_index.remove(department_id)
+        if tree.exists(department_id):
+            tree.delete(department_id)
+        paging.update_summary()
 
     def add_department_action():
         """Add a new department."""
@@ -28,15 +87,24 @@ def create_departments_view(db):
         company_id = company_id_entry.get().strip()
 
         if not name or not description or not is_valid_object_id(company_id):
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
+            return
+
+        if staging.enabled():
+            staging.stage_insert({"name": name, "description": description, "company_id": company_id})
             return
 
-        try:
-            add_department(db, name, description, company_id)
-            messagebox.showinfo("Success", "Department added successfully.")
-            refresh_departments()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add department: {e}")
+        def on_added(department):
+            upsert_row(department)
+            messagebox.showinfo("Success", "Department added successfully.", parent=window)
+
+        loader.run_async(
+            None, add_department, async_db, name, description, company_id,
+            on_success=on_added,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add department: {e}", parent=window),
+            message="Saving..."
+        )
+
     def show_all_departments():
         """Show all departments."""
         refresh_departments()
@@ -44,7 +112,7 @@ def create_departments_view(db):
         """Edit the selected department."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a department to edit.")
+            messagebox.showwarning("Selection Error", "Please select a department to edit.", parent=window)
             return
 
         department_id = tree.item(selected_item)["values"][0]
@@ -53,39 +121,97 @@ def create_departments_view(db):
         company_id = company_id_entry.get().strip()
 
         if not name or not description or not is_valid_object_id(company_id):
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
             return
 
-        try:
-            edit_department(db, department_id, {
+        if staging.enabled():
+            staging.stage_update(department_id, {"name": name, "description": description, "company_id": company_id})
+            return
+
+        def on_updated(department):
+            if department is None:
+                remove_row(department_id)
+                messagebox.showinfo("Not Found", "The department no longer exists.", parent=window)
+                return
+            upsert_row(department)
+            messagebox.showinfo("Success", "Department updated successfully.", parent=window)
+
+        loader.run_async(
+            None, edit_department, async_db, department_id, {
                 "name": name,
                 "description": description,
                 "company_id": company_id
-            })
-            messagebox.showinfo("Success", "Department updated successfully.")
-            refresh_departments()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update department: {e}")
+            },
+            on_success=on_updated,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update department: {e}", parent=window),
+            message="Saving..."
+        )
 
     def delete_department_action():
         """Delete the selected department."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a department to delete.")
+            messagebox.showwarning("Selection Error", "Please select a department to delete.", parent=window)
             return
 
         department_id = tree.item(selected_item)["values"][0]
 
+        if staging.enabled():
+            # Staged rows may not have a database ID yet, and staged deletes never cascade
+            staging.stage_delete(department_id)
+            return
+
         if not is_valid_object_id(department_id):
-            messagebox.showwarning("Validation Error", "Invalid Department ID.")
+            messagebox.showwarning("Validation Error", "Invalid Department ID.", parent=window)
             return
 
-        try:
-            delete_department(db, department_id)
-            messagebox.showinfo("Success", "Department deleted successfully.")
-            refresh_departments()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete department: {e}")
+        cascade = messagebox.askyesnocancel(
+            "Delete Department",
+            "Also delete its roles and employees?\n\nYes: delete everything under it\nNo: delete only the department",
+            parent=window
+        )
+        if cascade is None:
+            return
+
+        def on_deleted(result):
+            if cascade:
+                details = ", ".join(f"{count} {name}" for name, count in result.items())
+                messagebox.showinfo("Success", f"Department deleted successfully ({details}).", parent=window)
+            else:
+                messagebox.showinfo("Success", "Department deleted successfully.", parent=window)
+            remove_row(department_id)
+
+        callbacks = dict(
+            on_success=on_deleted,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete department: {e}", parent=window),
+            message="Deleting..."
+        )
+        if cascade:
+            # The cascade runs in a transaction on the blocking client
+            loader.run(None, delete_department_cascade, db, department_id, **callbacks)
+        else:
+            loader.run_async(None, delete_department, async_db, department_id, **callbacks)
+
+    def on_search_text(text):
+        """Filter the loaded rows while typing; ask the server when they may not hold every match."""
+        loader.cancel("departments-search")
+        if not text:
+            show_rows(all_departments.values())
+            return
+
+        matches = prefix_index.search(text, limit=200)
+        if len(text) < 3 or (matches and paging.complete):
+            show_rows(matches)
+            return
+
+        # Rows on pages not loaded yet may match too; show the local matches meanwhile
+        show_rows(matches)
+
+        loader.run_async(
+            "departments-search", search_departments, async_db, text, 20, columns,
+            on_success=lambda found: show_rows({str(row["_id"]): row for row in [*matches, *found]}.values()),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to search departments: {e}", parent=window)
+        )
 
     def on_tree_select(event):
         """Handle Treeview item selection."""
@@ -104,44 +230,42 @@ def create_departments_view(db):
         department_id = search_id_entry.get().strip()
 
         if not is_valid_object_id(department_id):
-            messagebox.showwarning("Validation Error", "Invalid Department ID.")
+            messagebox.showwarning("Validation Error", "Invalid Department ID.", parent=window)
             return
 
-        try:
-            department = get_department_by_id(db, department_id)
-            
+        def on_loaded(department):
             if department:
                 tree.delete(*tree.get_children())
                 
-                tree.insert("", "end", values=(
-                    str(department["_id"]),
-                    department["name"],
-                    department["description"],
-                    department["company_id"]
-                ))
+                tree.insert("", "end", iid=str(department["_id"]), values=row_values(department))
 
                 name_entry.delete(0, tk.END)
-                name_entry.insert(0, department["name"])
+                name_entry.insert(0, department.get("name", ""))
 
                 description_entry.delete(0, tk.END)
-                description_entry.insert(0, department["description"])
+                description_entry.insert(0, department.get("description", ""))
 
                 company_id_entry.delete(0, tk.END)
-                company_id_entry.insert(0, department["company_id"])
+                company_id_entry.insert(0, department.get("company_id", ""))
 
-                messagebox.showinfo("Success", "Department details loaded successfully.")
+                messagebox.showinfo("Success", "Department details loaded successfully.", parent=window)
             else:
-                messagebox.showinfo("Not Found", "No department found with the given ID.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch department: {e}")
+                messagebox.showinfo("Not Found", "No department found with the given ID.", parent=window)
 
+        # Shares the refresh key, so whichever of the two was started last fills the Treeview
+        loader.run_async(
+            "departments", get_department_by_id, async_db, department_id, columns,
+            on_success=on_loaded,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch department: {e}", parent=window)
+        )
 
-    # Create the main Tkinter window
-    root = tk.Tk()
-    root.title("Departments Management")
+
+    # A Toplevel of the application's single root; the main menu hides it instead of destroying it
+    window = tk.Toplevel(parent)
+    window.title("Departments Management")
 
     # Input Form
-    form_frame = tk.Frame(root)
+    form_frame = tk.Frame(window)
     form_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(form_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -157,7 +281,7 @@ def create_departments_view(db):
     company_id_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
 
     # Search Section
-    search_frame = tk.Frame(root)
+    search_frame = tk.Frame(window)
     search_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(search_frame, text="Search by ID:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -165,8 +289,13 @@ def create_departments_view(db):
     search_id_entry.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
     tk.Button(search_frame, text="Search", command=search_department_by_id).grid(row=0, column=2, padx=5, pady=5)
 
+    tk.Label(search_frame, text="Search by name:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+    search_text_entry = tk.Entry(search_frame)
+    search_text_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+    bind_debounced(search_text_entry, on_search_text)
+
     # Action Buttons
-    button_frame = tk.Frame(root)
+    button_frame = tk.Frame(window)
     button_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Button(button_frame, text="Add Department", command=add_department_action).grid(row=0, column=0, padx=5, pady=5)
@@ -175,7 +304,7 @@ def create_departments_view(db):
     tk.Button(button_frame, text="Show All Departments", command=show_all_departments).grid(row=0, column=3, padx=5, pady=5)
 
     # Treeview for displaying departments
-    tree_frame = tk.Frame(root)
+    tree_frame = tk.Frame(window)
     tree_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
 
     columns = ("_id", "name", "description", "company_id")
@@ -194,6 +323,28 @@ def create_departments_view(db):
     tree.bind("<<TreeviewSelect>>", on_tree_select)
     tree.pack(fill="both", expand=True)
 
+    # Loading indicator, driven by the background loader
+    status_var = tk.StringVar()
+    tk.Label(window, textvariable=status_var, anchor="w").grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+    loader = BackgroundLoader(window, status_var)
+
+    # Staged changes: collected here and written with one bulk_write on Apply
+    staging = StagingPanel(
+        window, tree, "departments", db, loader, row_values, upsert_row, remove_row,
+        lookup=all_departments.get, redraw=lambda: show_rows(all_departments.values())
+    )
+    staging.frame.grid(row=4, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+    # Rows arrive one page at a time; "Load more" under the Treeview fetches the next page
+    paging = PagedRows(
+        tree_frame, loader, "departments", fetch_page, populate_tree, append_rows,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch departments: {e}", parent=window),
+        count=lambda: len(all_departments)
+    )
+    paging.frame.pack(fill="x")
+
+    # Shown again from the main menu: reload in the background, the old rows stay until then
+    window.bind("<<ViewShown>>", lambda event: refresh_departments())
     refresh_departments()
 
-    root.mainloop()
+    return window
@@ -0,0 +1,92 @@
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from config.monitoring import metrics
+
+REFRESH_INTERVAL_MS = 1000
+
+
+def create_diagnostics_view(parent):
+    """Open a window with live MongoDB and controller latency statistics."""
+
+    def refresh_stats():
+        """Redraw the table from the metrics registry, then schedule the next redraw."""
+        if not window.winfo_exists():
+            return
+        if not window.winfo_viewable():
+            # Hidden by the main menu: keep the timer, skip the work
+            window.after(REFRESH_INTERVAL_MS, refresh_stats)
+            return
+        snapshot = metrics.snapshot()
+        selected = tree.focus()
+        tree.delete(*tree.get_children())
+        for name, stats in snapshot["operations"].items():
+            tree.insert("", "end", iid=name, values=(
+                name,
+                stats["count"],
+                stats["errors"],
+                stats["p50_ms"],
+                stats["p95_ms"],
+                stats["p99_ms"],
+                stats["max_ms"],
+                f"{stats['bytes_returned'] / 1024:.1f}"
+            ))
+        if selected and tree.exists(selected):
+            tree.focus(selected)
+            tree.selection_set(selected)
+        since_var.set(f"Collecting since {snapshot['since']}")
+        window.after(REFRESH_INTERVAL_MS, refresh_stats)
+
+    def export_stats():
+        """Save the current statistics to a JSON file."""
+        path = filedialog.asksaveasfilename(
+            parent=window, defaultextension=".json", filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            metrics.export_json(path)
+            messagebox.showinfo("Success", f"Diagnostics exported to {path}.", parent=window)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export diagnostics: {e}", parent=window)
+
+    def reset_stats():
+        """Start collecting from zero."""
+        metrics.reset()
+
+    window = tk.Toplevel(parent)
+    window.title("Diagnostics")
+
+    # Action Buttons
+    button_frame = tk.Frame(window)
+    button_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
+
+    tk.Button(button_frame, text="Export to JSON", command=export_stats).grid(row=0, column=0, padx=5, pady=5)
+    tk.Button(button_frame, text="Reset", command=reset_stats).grid(row=0, column=1, padx=5, pady=5)
+    since_var = tk.StringVar()
+    tk.Label(button_frame, textvariable=since_var).grid(row=0, column=2, padx=5, pady=5)
+
+    # Treeview for displaying the statistics
+    tree_frame = tk.Frame(window)
+    tree_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+
+    columns = ("operation", "count", "errors", "p50", "p95", "p99", "max", "kb_returned")
+    tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
+
+    tree.heading("operation", text="Operation")
+    tree.heading("count", text="Count")
+    tree.heading("errors", text="Errors")
+    tree.heading("p50", text="p50 (ms)")
+    tree.heading("p95", text="p95 (ms)")
+    tree.heading("p99", text="p99 (ms)")
+    tree.heading("max", text="Max (ms)")
+    # Estimated from a sample of the replies (reply_size_sample_rate)
+    tree.heading("kb_returned", text="KB Returned (est.)")
+
+    tree.column("operation", width=300)
+    for column in columns[1:]:
+        tree.column(column, width=90, anchor="e")
+
+    tree.pack(fill="both", expand=True)
+
+    refresh_stats()
+    return window
@@ -1,30 +1,85 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from controllers.employees_controller import get_all_employees, get_employee_by_id, add_employee, edit_employee, delete_employee
+from controllers.async_employees_controller import get_employees_page, search_employees, get_employee_by_id, add_employee, edit_employee, delete_employee
 from utils.validators import is_valid_object_id
 from utils.formatters import format_name
-import bcrypt
-
-def create_employees_view(db):
+from utils.prefix_index import PrefixIndex
+from config.db_config import get_async_database
+from views.background import BackgroundLoader
+from views.paging import PAGE_SIZE, PagedRows
+from views.search_support import bind_debounced
+from views.staged_changes import StagingPanel
+
+def create_employees_view(db, parent):
     """Create a Tkinter GUI for managing employees."""
 
+    # Rows loaded so far (one page at a time), and the prefix index over them used for type-ahead search
+    all_employees = {}
+    prefix_index = PrefixIndex(("name", "email"))
+    # Controller calls run as coroutines on the shared async client
+    async_db = get_async_database()
+
     def refresh_employees():
-        """Refresh the Treeview with the latest employee data."""
-        try:
-            employees = get_all_employees(db)
-            tree.delete(*tree.get_children())
-            for employee in employees:
-                tree.insert("", "end", values=(
-                    str(employee["_id"]),
-                    employee["name"],
-                    employee["email"],
-                    employee["phone_number"],
-                    employee["department_id"],
-                    employee["hashed_password"],  
-                    employee["nationality"]  
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch employees: {e}")
+        """Reload the first page of employees in the background and refresh the Treeview with it."""
+        paging.refresh()
+
+    async def fetch_page(after):
+        # Only the fields the Treeview renders; the first page also brings the estimated total
+        return await get_employees_page(async_db, PAGE_SIZE, after, after is None, columns)
+
+    def populate_tree(employees):
+        """Keep the loaded employees for type-ahead search and show them in the Treeview."""
+        all_employees.clear()
+        all_employees.update((str(employee["_id"]), employee) for employee in employees)
+        prefix_index.build(employees)
+        show_rows(employees)
+
+    def append_rows(employees):
+        """Show the next page of employees below the rows already loaded."""
+        all_employees.update((str(employee["_id"]), employee) for employee in employees)
+        prefix_index.extend(employees)
+        for employee in employees:
+            if not tree.exists(str(employee["_id"])):
+                tree.insert("", "end", iid=str(employee["_id"]), values=row_values(employee))
+        staging.mark_rows()
+
+    def row_values(employee):
+        """Values of the Treeview columns for one employee."""
+        return (
+            str(employee["_id"]),
+            employee.get("name", ""),
+            employee.get("email", ""),
+            employee.get("phone_number", ""),
+            employee.get("department_id", ""),
+            employee.get("nationality", "")
+        )
+
+    def show_rows(employees):
+        """Replace the Treeview rows with the given employees."""
+        tree.delete(*tree.get_children())
+        for employee in employees:
+            tree.insert("", "end", iid=str(employee["_id"]), values=row_values(employee))
+        staging.mark_rows()
+
+    def upsert_row(employee):
+        """Insert or update a single employee row in place, keeping the selection and scroll position."""
+        employee_id = str(employee["_id"])
+        all_employees[employee_id] = employee
+        prefix_index.add(employee)
+        if tree.exists(employee_id):
+            tree.item(employee_id, values=row_values(employee))
+        else:
+            tree.insert("", "end", iid=employee_id, values=row_values(employee))
+        paging.update_summary()
+
+    def remove_row(employee_id):
+        """Remove a single employee row without reloading the others."""
+        employee_id = str(employee_id)
+        all_employees.pop(employee_id, None)
+        prefix_index.remove(employee_id)
+        if tree.exists(employee_id):
+            tree.delete(employee_id)
+        paging.update_summary()
 
     def add_employee_action():
         """Add a new employee."""
@@ -36,21 +91,36 @@ def create_employees_view(db):
         nationality = nationality_entry.get().strip()
 
         if not name or not email or not phone_number or not is_valid_object_id(department_id) or not raw_password or not nationality:
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
+            return
+
+        if staging.enabled():
+            staging.stage_insert({
+                "name": name,
+                "email": email,
+                "password": raw_password,
+                "nationality": nationality,
+                "phone_number": phone_number,
+                "department_id": department_id
+            })
             return
 
-        try:
-            add_employee(db, name, email, raw_password, nationality, phone_number, department_id)
-            messagebox.showinfo("Success", "Employee added successfully.")
-            refresh_employees()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add employee: {e}")
+        def on_added(employee):
+            upsert_row(employee)
+            messagebox.showinfo("Success", "Employee added successfully.", parent=window)
+
+        loader.run_async(
+            None, add_employee, async_db, name, email, raw_password, nationality, phone_number, department_id,
+            on_success=on_added,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add employee: {e}", parent=window),
+            message="Saving..."
+        )
 
     def edit_employee_action():
         """Edit the selected employee."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select an employee to edit.")
+            messagebox.showwarning("Selection Error", "Please select an employee to edit.", parent=window)
             return
 
         employee_id = tree.item(selected_item)["values"][0]
@@ -61,47 +131,88 @@ def create_employees_view(db):
         raw_password = password_entry.get().strip() 
         nationality = nationality_entry.get().strip()
         if not name or not email or not phone_number or not is_valid_object_id(department_id) or not nationality:
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
             return
+        updated_data = {
+            "name": name,
+            "email": email,
+            "phone_number": phone_number,
+            "department_id": department_id,
+            "nationality": nationality
+        }
+
+        # An empty password keeps the current hash
         if raw_password:
-            if isinstance(raw_password, str):  
-                raw_password = raw_password.encode('utf-8')  
-            hashed_password = bcrypt.hashpw(raw_password, bcrypt.gensalt())  
-        else:
-            hashed_password = None  
-        try:
-            edit_employee(db, employee_id, {
-                "name": name,
-                "email": email,
-                "phone_number": phone_number,
-                "department_id": department_id,
-                "hashed_password": hashed_password,
-                "nationality": nationality
-            })
-            messagebox.showinfo("Success", "Employee updated successfully.")
-            refresh_employees()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update employee: {e}")
+            updated_data["password"] = raw_password
+
+        if staging.enabled():
+            staging.stage_update(employee_id, updated_data)
+            return
+
+        def on_updated(employee):
+            if employee is None:
+                remove_row(employee_id)
+                messagebox.showinfo("Not Found", "The employee no longer exists.", parent=window)
+                return
+            upsert_row(employee)
+            messagebox.showinfo("Success", "Employee updated successfully.", parent=window)
+
+        loader.run_async(
+            None, edit_employee, async_db, employee_id, updated_data,
+            on_success=on_updated,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update employee: {e}", parent=window),
+            message="Saving..."
+        )
 
     def delete_employee_action():
         """Delete the selected employee."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select an employee to delete.")
+            messagebox.showwarning("Selection Error", "Please select an employee to delete.", parent=window)
             return
 
         employee_id = tree.item(selected_item)["values"][0]
 
+        if staging.enabled():
+            # Staged rows may not have a database ID yet
+            staging.stage_delete(employee_id)
+            return
+
         if not is_valid_object_id(employee_id):
-            messagebox.showwarning("Validation Error", "Invalid Employee ID.")
+            messagebox.showwarning("Validation Error", "Invalid Employee ID.", parent=window)
             return
 
-        try:
-            delete_employee(db, employee_id)
-            messagebox.showinfo("Success", "Employee deleted successfully.")
-            refresh_employees()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete employee: {e}")
+        def on_deleted(_):
+            remove_row(employee_id)
+            messagebox.showinfo("Success", "Employee deleted successfully.", parent=window)
+
+        loader.run_async(
+            None, delete_employee, async_db, employee_id,
+            on_success=on_deleted,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete employee: {e}", parent=window),
+            message="Deleting..."
+        )
+
+    def on_search_text(text):
+        """Filter the loaded rows while typing; ask the server when they may not hold every match."""
+        loader.cancel("employees-search")
+        if not text:
+            show_rows(all_employees.values())
+            return
+
+        matches = prefix_index.search(text, limit=200)
+        if len(text) < 3 or (matches and paging.complete):
+            show_rows(matches)
+            return
+
+        # Rows on pages not loaded yet may match too; show the local matches meanwhile
+        show_rows(matches)
+
+        loader.run_async(
+            "employees-search", search_employees, async_db, text, 20, columns,
+            on_success=lambda found: show_rows({str(row["_id"]): row for row in [*matches, *found]}.values()),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to search employees: {e}", parent=window)
+        )
 
     def on_tree_select(event):
         """Handle Treeview item selection."""
@@ -121,39 +232,43 @@ def create_employees_view(db):
         """Search for an employee by its ID and display its details."""
         employee_id = search_id_entry.get().strip()
         if not is_valid_object_id(employee_id):
-            messagebox.showwarning("Validation Error", "Invalid Employee ID.")
+            messagebox.showwarning("Validation Error", "Invalid Employee ID.", parent=window)
             return
 
-        try:
-            employee = get_employee_by_id(db, employee_id)
+        def on_loaded(employee):
             if employee:
                 name_entry.delete(0, tk.END)
-                name_entry.insert(0, employee["name"])
+                name_entry.insert(0, employee.get("name", ""))
                 email_entry.delete(0, tk.END)
-                email_entry.insert(0, employee["email"])
+                email_entry.insert(0, employee.get("email", ""))
                 phone_entry.delete(0, tk.END)
-                phone_entry.insert(0, employee["phone_number"])
+                phone_entry.insert(0, employee.get("phone_number", ""))
                 department_id_entry.delete(0, tk.END)
-                department_id_entry.insert(0, employee["department_id"])
-                messagebox.showinfo("Success", "Employee details loaded successfully.")
+                department_id_entry.insert(0, employee.get("department_id", ""))
+                messagebox.showinfo("Success", "Employee details loaded successfully.", parent=window)
                 tree.delete(*tree.get_children())
-                tree.insert("", "end", values=(employee["_id"], employee["name"], employee["email"], employee["phone_number"], employee["department_id"], employee["hashed_password"], employee["nationality"]))
+                tree.insert("", "end", iid=str(employee["_id"]), values=row_values(employee))
             else:
-                messagebox.showinfo("Not Found", "No employee found with the given ID.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch employee: {e}")
+                messagebox.showinfo("Not Found", "No employee found with the given ID.", parent=window)
+
+        # Shares the refresh key, so whichever of the two was started last fills the Treeview
+        loader.run_async(
+            "employees", get_employee_by_id, async_db, employee_id, columns,
+            on_success=on_loaded,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch employee: {e}", parent=window)
+        )
 
     def show_all_employees():
         """Show all employees after a search."""
         search_id_entry.delete(0, tk.END)  
         refresh_employees()  
 
-    # Create the main Tkinter window
-    root = tk.Tk()
-    root.title("Employees Management")
+    # A Toplevel of the application's single root; the main menu hides it instead of destroying it
+    window = tk.Toplevel(parent)
+    window.title("Employees Management")
 
     # Input Form
-    form_frame = tk.Frame(root)
+    form_frame = tk.Frame(window)
     form_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(form_frame, text="Name:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -181,7 +296,7 @@ def create_employees_view(db):
     nationality_entry.grid(row=5, column=1, padx=5, pady=5, sticky="ew")
 
     # Search Section
-    search_frame = tk.Frame(root)
+    search_frame = tk.Frame(window)
     search_frame.grid(row=6, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(search_frame, text="Search by ID:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -190,8 +305,13 @@ def create_employees_view(db):
     tk.Button(search_frame, text="Search", command=search_employee_by_id).grid(row=0, column=2, padx=5, pady=5)
     tk.Button(search_frame, text="Show All", command=show_all_employees).grid(row=0, column=3, padx=5, pady=5)
 
+    tk.Label(search_frame, text="Search by name/email:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+    search_text_entry = tk.Entry(search_frame)
+    search_text_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+    bind_debounced(search_text_entry, on_search_text)
+
     # Action Buttons
-    button_frame = tk.Frame(root)
+    button_frame = tk.Frame(window)
     button_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Button(button_frame, text="Add Employee", command=add_employee_action).grid(row=0, column=0, padx=5, pady=5)
@@ -199,10 +319,10 @@ def create_employees_view(db):
     tk.Button(button_frame, text="Delete Employee", command=delete_employee_action).grid(row=0, column=2, padx=5, pady=5)
 
     # Treeview for displaying employees
-    tree_frame = tk.Frame(root)
+    tree_frame = tk.Frame(window)
     tree_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
 
-    columns = ("_id", "name", "email", "phone_number", "department_id", "hashed_password", "nationality")
+    columns = ("_id", "name", "email", "phone_number", "department_id", "nationality")
     tree = ttk.Treeview(tree_frame, columns=columns, show="headings")
 
     tree.heading("_id", text="ID")
@@ -210,7 +330,6 @@ def create_employees_view(db):
     tree.heading("email", text="Email")
     tree.heading("phone_number", text="Phone Number")
     tree.heading("department_id", text="Department ID")
-    tree.heading("hashed_password", text="Hashed Password") 
     tree.heading("nationality", text="Nationality")  
 
     tree.column("_id", width=150)
@@ -218,12 +337,33 @@ def create_employees_view(db):
     tree.column("email", width=200)
     tree.column("phone_number", width=150)
     tree.column("department_id", width=150)
-    tree.column("hashed_password", width=200)  
     tree.column("nationality", width=150)
 
     tree.bind("<<TreeviewSelect>>", on_tree_select)
     tree.pack(fill="both", expand=True)
 
+    # Loading indicator, driven by the background loader
+    status_var = tk.StringVar()
+    tk.Label(window, textvariable=status_var, anchor="w").grid(row=8, column=0, padx=10, pady=(0, 10), sticky="ew")
+    loader = BackgroundLoader(window, status_var)
+
+    # Staged changes: collected here and written with one bulk_write on Apply
+    staging = StagingPanel(
+        window, tree, "employees", db, loader, row_values, upsert_row, remove_row,
+        lookup=all_employees.get, redraw=lambda: show_rows(all_employees.values())
+    )
+    staging.frame.grid(row=7, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+    # Rows arrive one page at a time; "Load more" under the Treeview fetches the next page
+    paging = PagedRows(
+        tree_frame, loader, "employees", fetch_page, populate_tree, append_rows,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch employees: {e}", parent=window),
+        count=lambda: len(all_employees)
+    )
+    paging.frame.pack(fill="x")
+
+    # Shown again from the main menu: reload in the background, the old rows stay until then
+    window.bind("<<ViewShown>>", lambda event: refresh_employees())
     refresh_employees()
 
-    root.mainloop()
+    return window
@@ -1,51 +1,153 @@
+import importlib
+import threading
 import tkinter as tk
 from tkinter import messagebox
-from views.departments_view import create_departments_view
-from views.employees_view import create_employees_view
-from views.roles_view import create_roles_view
-from views.companies_view import create_companies_view
+from views.background import BackgroundLoader
 
-def create_main_menu(db):
-    """Create the main menu window for the application. """
-    def open_companies_view():
-        """Open the Companies Management view."""
-        try:
-            create_companies_view(db)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open Companies view: {e}")
+# View modules are imported on first use: they pull in pymongo, bcrypt and the controllers,
+# which the menu itself does not need to appear
+VIEWS = {
+    "companies": ("views.companies_view", "create_companies_view"),
+    "departments": ("views.departments_view", "create_departments_view"),
+    "employees": ("views.employees_view", "create_employees_view"),
+    "roles": ("views.roles_view", "create_roles_view"),
+    "diagnostics": ("views.diagnostics_view", "create_diagnostics_view"),
+}
 
-    def open_departments_view():
-        """Open the Departments Management view."""
-        try:
-            create_departments_view(db)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to open Departments view: {e}")
 
-    def open_employees_view():
-        """Open the Employees Management view."""
+def load_view(name):
+    """Import a view module on demand and return its create_* function."""
+    module_name, function_name = VIEWS[name]
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def sync_indexes_in_background(db):
+    """Make sure the declared indexes exist without holding up the menu."""
+    def sync():
+        from models.indexes import sync_indexes, format_report
+        print(format_report(sync_indexes(db)))
+
+    threading.Thread(target=sync, daemon=True).start()
+
+
+def connect_database():
+    """
+    Connect to MongoDB and warm up everything the views need; runs on a worker thread.
+
+    The ping forces server selection so the first pooled connection is open before a view
+    asks for data, and importing the views here means opening one later costs nothing.
+    """
+    from config.db_config import get_async_database, get_database
+    from utils.event_loop import run
+    db = get_database()
+    db.command("ping")
+    # The views query through the async client, so its pool is opened on the loop thread too
+    run(get_async_database().command("ping"))
+    for name in VIEWS:
+        load_view(name)
+    sync_indexes_in_background(db)
+    return db
+
+
+def build_main_menu(db=None):
+    """Create the main menu window; without a db the connection is made in the background."""
+    connection = {"db": db}
+    entity_buttons = []
+    # The one window per view, created on first open and hidden rather than destroyed
+    open_windows = {}
+
+    def show_window(name, create):
+        """Bring back the cached window of a view, or build it on first use."""
+        window = open_windows.get(name)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            window.event_generate("<<ViewShown>>")
+            return
+        window = create()
+        # Closing only hides the window, so reopening it is instant and at most one copy
+        # of each view is ever alive
+        window.protocol("WM_DELETE_WINDOW", window.withdraw)
+        open_windows[name] = window
+
+    def open_view(name, title):
+        """Open one of the management views once the database is available."""
         try:
-            create_employees_view(db)
+            show_window(name, lambda: load_view(name)(connection["db"], root))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to open Employees view: {e}")
+            messagebox.showerror("Error", f"Failed to open {title} view: {e}")
 
-    def open_roles_view():
-        """Open the Roles Management view."""
+    def open_diagnostics_view():
+        """Open the Diagnostics window with live query latencies."""
         try:
-            create_roles_view(db)
+            show_window("diagnostics", lambda: load_view("diagnostics")(root))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to open Roles view: {e}")
+            messagebox.showerror("Error", f"Failed to open Diagnostics view: {e}")
+
+    def set_connected(db):
+        """Enable the entity views now that the database answers."""
+        connection["db"] = db
+        for button in entity_buttons:
+            button.config(state=tk.NORMAL)
+        retry_button.pack_forget()
+        connection_var.set(f"Connected to {db.name}")
+
+    def connection_failed(error):
+        """Leave the entity views disabled and offer to try again."""
+        connection_var.set(f"Connection failed: {error}")
+        retry_button.pack(pady=5)
+
+    def connect():
+        """Start (or retry) the background connection."""
+        retry_button.pack_forget()
+        connection_var.set("")
+        loader.run("connect", connect_database, on_success=set_connected, on_error=connection_failed,
+                   message="Connecting to MongoDB...")
 
+    # The application's only Tk instance; every other window is a Toplevel of it
     root = tk.Tk()
     root.title("Management System")
 
     # Main Menu Buttons
     tk.Label(root, text="Welcome to the Management System", font=("Arial", 16)).pack(pady=20)
 
-    tk.Button(root, text="Manage Companies", command=open_companies_view, width=30).pack(pady=10)
-    tk.Button(root, text="Manage Departments", command=open_departments_view, width=30).pack(pady=10)
-    tk.Button(root, text="Manage Employees", command=open_employees_view, width=30).pack(pady=10)
-    tk.Button(root, text="Manage Roles", command=open_roles_view, width=30).pack(pady=10)
+    for name, title in (("companies", "Companies"), ("departments", "Departments"),
+                        ("employees", "Employees"), ("roles", "Roles")):
+        button = tk.Button(root, text=f"Manage {title}", width=30,
+                           command=lambda name=name, title=title: open_view(name, title))
+        button.pack(pady=10)
+        entity_buttons.append(button)
+    tk.Button(root, text="Diagnostics", command=open_diagnostics_view, width=30).pack(pady=10)
 
     tk.Button(root, text="Exit", command=root.destroy, width=30, bg="red", fg="white").pack(pady=20)
 
-    root.mainloop()
\ No newline at end of file
+    # Connection status: the loader shows progress, connection_var the outcome
+    status_var = tk.StringVar()
+    connection_var = tk.StringVar()
+    tk.Label(root, textvariable=status_var, fg="gray").pack()
+    tk.Label(root, textvariable=connection_var, fg="gray", wraplength=300).pack(pady=(0, 5))
+    retry_button = tk.Button(root, text="Retry", command=connect, width=10)
+    loader = BackgroundLoader(root, status_var)
+
+    if db is None:
+        for button in entity_buttons:
+            button.config(state=tk.DISABLED)
+        connect()
+    else:
+        set_connected(db)
+
+    return root
+
+
+def create_main_menu(db=None):
+    """Create the main menu window for the application. """
+    from config.db_config import close_client
+    try:
+        build_main_menu(db).mainloop()
+    finally:
+        # Summary refreshes still waiting on their timers run before the clients go away
+        from controllers import async_reports_controller, reports_controller
+        from utils.event_loop import run
+        reports_controller.flush_refreshes()
+        run(async_reports_controller.flush_refreshes())
+        close_client()
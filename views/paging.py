@@ -0,0 +1,79 @@
+import tkinter as tk
+
+# Rows fetched per request; more are loaded on demand with "Load more"
+PAGE_SIZE = 200
+
+
+class PagedRows:
+    """
+    Loads a view's rows one keyset page at a time instead of the whole collection.
+
+    refresh() fetches the first page (with the estimated total), and the "Load more" button
+    fetches the page after the last one shown. fetch_page(after) must be a coroutine function
+    returning a get_*_page result. Both share the loader key, so a refresh supersedes a
+    "Load more" still in flight.
+    """
+
+    def __init__(self, parent, loader, key, fetch_page, on_first_page, on_next_page, on_error, count):
+        self.loader = loader
+        self.key = key
+        self.fetch_page = fetch_page
+        self.on_first_page = on_first_page
+        self.on_next_page = on_next_page
+        self.on_error = on_error
+        self.count = count
+        self.next_after = None
+        self.total = None
+
+        self.frame = tk.Frame(parent)
+        self.more_button = tk.Button(self.frame, text="Load more", command=self.load_more, state="disabled")
+        self.more_button.pack(side="left", padx=5, pady=5)
+        self.summary_var = tk.StringVar()
+        tk.Label(self.frame, textvariable=self.summary_var, anchor="w").pack(side="left", padx=5, pady=5)
+
+    @property
+    def complete(self):
+        """True once every page has been loaded, so local search sees every row."""
+        return self.next_after is None
+
+    def refresh(self):
+        """Load the first page again, replacing the rows shown."""
+        self.loader.run_async(
+            self.key, self.fetch_page, None,
+            on_success=lambda page: self._loaded(page, self.on_first_page),
+            on_error=self.on_error
+        )
+
+    def load_more(self):
+        """Append the page after the last row loaded."""
+        if self.next_after is None:
+            return
+        self.more_button.config(state="disabled")
+        self.loader.run_async(
+            self.key, self.fetch_page, self.next_after,
+            on_success=lambda page: self._loaded(page, self.on_next_page),
+            on_error=self._on_more_error,
+            message="Loading more..."
+        )
+
+    def _loaded(self, page, deliver):
+        self.next_after = page["next_after"]
+        if page["total"] is not None:
+            self.total = page["total"]
+        deliver(page["items"])
+        self.update_summary()
+
+    def _on_more_error(self, error):
+        self.update_summary()
+        self.on_error(error)
+
+    def update_summary(self):
+        """Show how many rows are loaded; call after rows are added or removed locally."""
+        self.more_button.config(state="disabled" if self.complete else "normal")
+        loaded = self.count()
+        if self.complete:
+            self.summary_var.set(f"{loaded} rows")
+        elif self.total is not None:
+            self.summary_var.set(f"{loaded} of about {self.total} rows loaded")
+        else:
+            self.summary_var.set(f"{loaded} rows loaded")
@@ -1,26 +1,83 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from controllers.roles_controller import get_all_roles, get_role_by_id, add_role, edit_role, delete_role
+from controllers.async_roles_controller import get_roles_page, search_roles, get_role_by_id, add_role, edit_role, delete_role
 from utils.validators import is_valid_object_id
 from utils.formatters import format_name
-
-def create_roles_view(db):
+from utils.prefix_index import PrefixIndex
+from config.db_config import get_async_database
+from views.background import BackgroundLoader
+from views.paging import PAGE_SIZE, PagedRows
+from views.search_support import bind_debounced
+from views.staged_changes import StagingPanel
+
+def create_roles_view(db, parent):
     """Create a Tkinter GUI for managing roles."""
     
+    # Rows loaded so far (one page at a time), and the prefix index over them used for type-ahead search
+    all_roles = {}
+    prefix_index = PrefixIndex(("title", "description"))
+    # Controller calls run as coroutines on the shared async client
+    async_db = get_async_database()
+
     def refresh_roles():
-        """Refresh the Treeview with the latest role data."""
-        try:
-            roles = get_all_roles(db)
-            tree.delete(*tree.get_children())
-            for role in roles:
-                tree.insert("", "end", values=(
-                    str(role["_id"]),
-                    role["title"],
-                    role["description"],
-                    role["department_id"]
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch roles: {e}")
+        """Reload the first page of roles in the background and refresh the Treeview with it."""
+        paging.refresh()
+
+    async def fetch_page(after):
+        # Only the fields the Treeview renders; the first page also brings the estimated total
+        return await get_roles_page(async_db, PAGE_SIZE, after, after is None, columns)
+
+    def populate_tree(roles):
+        """Keep the loaded roles for type-ahead search and show them in the Treeview."""
+        all_roles.clear()
+        all_roles.update((str(role["_id"]), role) for role in roles)
+        prefix_index.build(roles)
+        show_rows(roles)
+
+    def append_rows(roles):
+        """Show the next page of roles below the rows already loaded."""
+        all_roles.update((str(role["_id"]), role) for role in roles)
+        prefix_index.extend(roles)
+        for role in roles:
+            if not tree.exists(str(role["_id"])):
+                tree.insert("", "end", iid=str(role["_id"]), values=row_values(role))
+        staging.mark_rows()
+
+    def row_values(role):
+        """Values of the Treeview columns for one role."""
+        return (
+            str(role["_id"]),
+            role.get("title", ""),
+            role.get("description", ""),
+            role.get("department_id", "")
+        )
+
+    def show_rows(roles):
+        """Replace the Treeview rows with the given roles."""
+        tree.delete(*tree.get_children())
+        for role in roles:
+            tree.insert("", "end", iid=str(role["_id"]), values=row_values(role))
+        staging.mark_rows()
+
+    def upsert_row(role):
+        """Insert or update a single role row in place, keeping the selection and scroll position."""
+        role_id = str(role["_id"])
+        all_roles[role_id] = role
+        prefix_index.add(role)
+        if tree.exists(role_id):
+            tree.item(role_id, values=row_values(role))
+        else:
+            tree.insert("", "end", iid=role_id, values=row_values(role))
+        paging.update_summary()
+
+    def remove_row(role_id):
+        """Remove a single role row without reloading the others."""
+        role_id = str(role_id)
+        all_roles.pop(role_id, None)
+        prefix_index.remove(role_id)
+        if tree.exists(role_id):
+            tree.delete(role_id)
+        paging.update_summary()
 
     def add_role_action():
         """Add a new role."""
@@ -29,21 +86,29 @@ def create_roles_view(db):
         department_id = department_id_entry.get().strip()
 
         if not title or not description or not is_valid_object_id(department_id):
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
             return
 
-        try:
-            add_role(db, title, description, department_id)
-            messagebox.showinfo("Success", "Role added successfully.")
-            refresh_roles()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add role: {e}")
+        if staging.enabled():
+            staging.stage_insert({"title": title, "description": description, "department_id": department_id})
+            return
+
+        def on_added(role):
+            upsert_row(role)
+            messagebox.showinfo("Success", "Role added successfully.", parent=window)
+
+        loader.run_async(
+            None, add_role, async_db, title, description, department_id,
+            on_success=on_added,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to add role: {e}", parent=window),
+            message="Saving..."
+        )
 
     def edit_role_action():
         """Edit the selected role."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a role to edit.")
+            messagebox.showwarning("Selection Error", "Please select a role to edit.", parent=window)
             return
 
         role_id = tree.item(selected_item)["values"][0]
@@ -52,39 +117,81 @@ def create_roles_view(db):
         department_id = department_id_entry.get().strip()
 
         if not title or not description or not is_valid_object_id(department_id):
-            messagebox.showwarning("Validation Error", "All fields are required and must be valid.")
+            messagebox.showwarning("Validation Error", "All fields are required and must be valid.", parent=window)
             return
 
-        try:
-            edit_role(db, role_id, {
+        if staging.enabled():
+            staging.stage_update(role_id, {"title": title, "description": description, "department_id": department_id})
+            return
+
+        def on_updated(role):
+            if role is None:
+                remove_row(role_id)
+                messagebox.showinfo("Not Found", "The role no longer exists.", parent=window)
+                return
+            upsert_row(role)
+            messagebox.showinfo("Success", "Role updated successfully.", parent=window)
+
+        loader.run_async(
+            None, edit_role, async_db, role_id, {
                 "title": title,
                 "description": description,
                 "department_id": department_id
-            })
-            messagebox.showinfo("Success", "Role updated successfully.")
-            refresh_roles()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update role: {e}")
+            },
+            on_success=on_updated,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to update role: {e}", parent=window),
+            message="Saving..."
+        )
 
     def delete_role_action():
         """Delete the selected role."""
         selected_item = tree.focus()
         if not selected_item:
-            messagebox.showwarning("Selection Error", "Please select a role to delete.")
+            messagebox.showwarning("Selection Error", "Please select a role to delete.", parent=window)
             return
 
         role_id = tree.item(selected_item)["values"][0]
 
+        if staging.enabled():
+            # Staged rows may not have a database ID yet
+            staging.stage_delete(role_id)
+            return
+
         if not is_valid_object_id(role_id):
-            messagebox.showwarning("Validation Error", "Invalid Role ID.")
+            messagebox.showwarning("Validation Error", "Invalid Role ID.", parent=window)
+            return
+
+        def on_deleted(_):
+            remove_row(role_id)
+            messagebox.showinfo("Success", "Role deleted successfully.", parent=window)
+
+        loader.run_async(
+            None, delete_role, async_db, role_id,
+            on_success=on_deleted,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to delete role: {e}", parent=window),
+            message="Deleting..."
+        )
+
+    def on_search_text(text):
+        """Filter the loaded rows while typing; ask the server when they may not hold every match."""
+        loader.cancel("roles-search")
+        if not text:
+            show_rows(all_roles.values())
+            return
+
+        matches = prefix_index.search(text, limit=200)
+        if len(text) < 3 or (matches and paging.complete):
+            show_rows(matches)
             return
 
-        try:
-            delete_role(db, role_id)
-            messagebox.showinfo("Success", "Role deleted successfully.")
-            refresh_roles()
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete role: {e}")
+        # Rows on pages not loaded yet may match too; show the local matches meanwhile
+        show_rows(matches)
+
+        loader.run_async(
+            "roles-search", search_roles, async_db, text, 20, columns,
+            on_success=lambda found: show_rows({str(row["_id"]): row for row in [*matches, *found]}.values()),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to search roles: {e}", parent=window)
+        )
 
     def on_tree_select(event):
         """Handle Treeview item selection."""
@@ -102,44 +209,43 @@ def create_roles_view(db):
         """Search for a role by its ID and display its details."""
         role_id = search_id_entry.get().strip()
         if not is_valid_object_id(role_id):
-            messagebox.showwarning("Validation Error", "Invalid Role ID.")
+            messagebox.showwarning("Validation Error", "Invalid Role ID.", parent=window)
             return
 
-        try:
-            role = get_role_by_id(db, role_id)
+        def on_loaded(role):
             if role:
                 title_entry.delete(0, tk.END)
-                title_entry.insert(0, role["title"])
+                title_entry.insert(0, role.get("title", ""))
                 description_entry.delete(0, tk.END)
-                description_entry.insert(0, role["description"])
+                description_entry.insert(0, role.get("description", ""))
                 department_id_entry.delete(0, tk.END)
-                department_id_entry.insert(0, role["department_id"])
+                department_id_entry.insert(0, role.get("department_id", ""))
 
                 # Clear the Treeview and show only this role
                 tree.delete(*tree.get_children())
-                tree.insert("", "end", values=(
-                    str(role["_id"]),
-                    role["title"],
-                    role["description"],
-                    role["department_id"]
-                ))
-                messagebox.showinfo("Success", "Role details loaded successfully.")
+                tree.insert("", "end", iid=str(role["_id"]), values=row_values(role))
+                messagebox.showinfo("Success", "Role details loaded successfully.", parent=window)
             else:
-                messagebox.showinfo("Not Found", "No role found with the given ID.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to fetch role: {e}")
+                messagebox.showinfo("Not Found", "No role found with the given ID.", parent=window)
+
+        # Shares the refresh key, so whichever of the two was started last fills the Treeview
+        loader.run_async(
+            "roles", get_role_by_id, async_db, role_id, columns,
+            on_success=on_loaded,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch role: {e}", parent=window)
+        )
 
     def show_all_roles():
         """Show all roles after a search."""
         search_id_entry.delete(0, tk.END)  # Clear the search ID field
         refresh_roles()  # Load and display all roles
 
-    # Create the main Tkinter window
-    root = tk.Tk()
-    root.title("Roles Management")
+    # A Toplevel of the application's single root; the main menu hides it instead of destroying it
+    window = tk.Toplevel(parent)
+    window.title("Roles Management")
 
     # Input Form
-    form_frame = tk.Frame(root)
+    form_frame = tk.Frame(window)
     form_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(form_frame, text="Title:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -155,7 +261,7 @@ def create_roles_view(db):
     department_id_entry.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
 
     # Search Section
-    search_frame = tk.Frame(root)
+    search_frame = tk.Frame(window)
     search_frame.grid(row=3, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Label(search_frame, text="Search by ID:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
@@ -164,8 +270,13 @@ def create_roles_view(db):
     tk.Button(search_frame, text="Search", command=search_role_by_id).grid(row=0, column=2, padx=5, pady=5)
     tk.Button(search_frame, text="Show All", command=show_all_roles).grid(row=0, column=3, padx=5, pady=5)
 
+    tk.Label(search_frame, text="Search by title:").grid(row=1, column=0, padx=5, pady=5, sticky="e")
+    search_text_entry = tk.Entry(search_frame)
+    search_text_entry.grid(row=1, column=1, padx=5, pady=5, sticky="ew")
+    bind_debounced(search_text_entry, on_search_text)
+
     # Action Buttons
-    button_frame = tk.Frame(root)
+    button_frame = tk.Frame(window)
     button_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
 
     tk.Button(button_frame, text="Add Role", command=add_role_action).grid(row=0, column=0, padx=5, pady=5)
@@ -173,7 +284,7 @@ def create_roles_view(db):
     tk.Button(button_frame, text="Delete Role", command=delete_role_action).grid(row=0, column=2, padx=5, pady=5)
 
     # Treeview for displaying roles
-    tree_frame = tk.Frame(root)
+    tree_frame = tk.Frame(window)
     tree_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
 
     columns = ("_id", "title", "description", "department_id")
@@ -192,6 +303,28 @@ def create_roles_view(db):
     tree.bind("<<TreeviewSelect>>", on_tree_select)
     tree.pack(fill="both", expand=True)
 
+    # Loading indicator, driven by the background loader
+    status_var = tk.StringVar()
+    tk.Label(window, textvariable=status_var, anchor="w").grid(row=5, column=0, padx=10, pady=(0, 10), sticky="ew")
+    loader = BackgroundLoader(window, status_var)
+
+    # Staged changes: collected here and written with one bulk_write on Apply
+    staging = StagingPanel(
+        window, tree, "roles", db, loader, row_values, upsert_row, remove_row,
+        lookup=all_roles.get, redraw=lambda: show_rows(all_roles.values())
+    )
+    staging.frame.grid(row=4, column=0, padx=10, pady=(0, 5), sticky="ew")
+
+    # Rows arrive one page at a time; "Load more" under the Treeview fetches the next page
+    paging = PagedRows(
+        tree_frame, loader, "roles", fetch_page, populate_tree, append_rows,
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch roles: {e}", parent=window),
+        count=lambda: len(all_roles)
+    )
+    paging.frame.pack(fill="x")
+
+    # Shown again from the main menu: reload in the background, the old rows stay until then
+    window.bind("<<ViewShown>>", lambda event: refresh_roles())
     refresh_roles()
 
-    root.mainloop()
+    return window
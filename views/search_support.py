@@ -0,0 +1,14 @@
+def bind_debounced(entry, callback, delay_ms=200):
+    """Call callback(text) on an Entry once typing has paused for delay_ms."""
+    pending = [None]
+
+    def fire():
+        pending[0] = None
+        callback(entry.get().strip())
+
+    def on_key(_event):
+        if pending[0] is not None:
+            entry.after_cancel(pending[0])
+        pending[0] = entry.after(delay_ms, fire)
+
+    entry.bind("<KeyRelease>", on_key)
@@ -0,0 +1,264 @@
+import tkinter as tk
+from tkinter import messagebox
+from itertools import count
+from controllers.batch_controller import apply_changes
+
+# Treeview tag per pending operation, plus one for rows whose last flush failed
+TAG_COLORS = {
+    "insert": {"background": "#e3f6e3"},
+    "update": {"background": "#fff4cc"},
+    "delete": {"foreground": "#999999", "background": "#f2f2f2"},
+    "failed": {"background": "#ffd6d6"},
+}
+MAX_REPORTED_ERRORS = 15
+
+
+class UnitOfWork:
+    """
+    Edits staged in a view until they are flushed together.
+
+    Holds at most one change per row, keyed by the row's Treeview iid: editing a staged
+    insert changes what will be inserted, deleting it drops it, and a second edit of a row
+    merges into the first. New rows get temporary "new-<n>" keys until they are stored.
+    """
+
+    def __init__(self):
+        self._changes = {}
+        self._errors = {}
+        self._new_keys = count(1)
+
+    def __len__(self):
+        return len(self._changes)
+
+    def __contains__(self, key):
+        return key in self._changes
+
+    def stage_insert(self, data):
+        key = f"new-{next(self._new_keys)}"
+        self._changes[key] = {"key": key, "op": "insert", "id": None, "data": dict(data)}
+        return key
+
+    def stage_update(self, key, data):
+        change = self._changes.get(key)
+        if change is None or change["op"] == "delete":
+            self._changes[key] = {"key": key, "op": "update", "id": key, "data": dict(data)}
+        else:
+            change["data"].update(data)
+        self._errors.pop(key, None)
+
+    def stage_delete(self, key):
+        """Stage a delete; returns False when it only dropped a staged insert."""
+        self._errors.pop(key, None)
+        change = self._changes.get(key)
+        if change is not None and change["op"] == "insert":
+            del self._changes[key]
+            return False
+        self._changes[key] = {"key": key, "op": "delete", "id": key, "data": None}
+        return True
+
+    def op(self, key):
+        change = self._changes.get(key)
+        return change["op"] if change else None
+
+    def data(self, key):
+        change = self._changes.get(key)
+        return change["data"] if change else None
+
+    def error(self, key):
+        return self._errors.get(key)
+
+    def keys(self, op=None):
+        return [key for key, change in self._changes.items() if op is None or change["op"] == op]
+
+    def changes(self):
+        """A snapshot of the staged changes, safe to hand to a worker thread."""
+        return [{**change, "data": dict(change["data"]) if change["data"] else None} for change in self._changes.values()]
+
+    def record_results(self, results):
+        """Drop the changes that were stored and keep the failed ones, with their error, for a retry."""
+        for result in results:
+            if result["ok"]:
+                self._changes.pop(result["key"], None)
+                self._errors.pop(result["key"], None)
+            else:
+                self._errors[result["key"]] = result["error"]
+
+    def clear(self):
+        self._changes.clear()
+        self._errors.clear()
+
+
+class StagingPanel:
+    """
+    "Stage changes" mode for an entity view: add/edit/delete are collected in a UnitOfWork,
+    shown as pending rows in the Treeview, and written with one bulk_write on Apply.
+
+    The view keeps its own row helpers; the panel only needs row_values, upsert_row and
+    remove_row to show stored rows, lookup(iid) for the loaded document of a row, and
+    redraw() to show the loaded rows again after Discard.
+    """
+
+    def __init__(self, window, tree, entity, db, loader, row_values, upsert_row, remove_row, lookup, redraw):
+        self.window = window
+        self.tree = tree
+        self.entity = entity
+        self.db = db
+        self.loader = loader
+        self.row_values = row_values
+        self.upsert_row = upsert_row
+        self.remove_row = remove_row
+        self.lookup = lookup
+        self.redraw = redraw
+        self.work = UnitOfWork()
+        # Staging is blocked while a flush is in flight, so its results match what is staged
+        self.flushing = False
+
+        for tag, options in TAG_COLORS.items():
+            tree.tag_configure(tag, **options)
+
+        self.frame = tk.Frame(window)
+        self.enabled_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.frame, text="Stage changes", variable=self.enabled_var).grid(row=0, column=0, padx=5, pady=5)
+        self.apply_button = tk.Button(self.frame, text="Apply (0)", command=self.flush, state="disabled")
+        self.apply_button.grid(row=0, column=1, padx=5, pady=5)
+        self.discard_button = tk.Button(self.frame, text="Discard", command=self.discard, state="disabled")
+        self.discard_button.grid(row=0, column=2, padx=5, pady=5)
+        self.summary_var = tk.StringVar()
+        tk.Label(self.frame, textvariable=self.summary_var, anchor="w").grid(row=0, column=3, padx=5, pady=5, sticky="w")
+
+    def enabled(self):
+        return self.enabled_var.get()
+
+    def _can_stage(self):
+        if self.flushing:
+            messagebox.showwarning("Please Wait", "Staged changes are being applied.", parent=self.window)
+        return not self.flushing
+
+    # Staging
+
+    def stage_insert(self, data):
+        if not self._can_stage():
+            return None
+        key = self.work.stage_insert(data)
+        self._show(key)
+        self._update_controls()
+        return key
+
+    def stage_update(self, key, data):
+        if not self._can_stage():
+            return
+        key = str(key)
+        self.work.stage_update(key, data)
+        self._show(key)
+        self._update_controls()
+
+    def stage_delete(self, key):
+        if not self._can_stage():
+            return
+        key = str(key)
+        if self.work.stage_delete(key):
+            self._show(key)
+        elif self.tree.exists(key):
+            # It was never stored, so there is nothing to delete
+            self.tree.delete(key)
+        self._update_controls()
+
+    def _pending_document(self, key):
+        op = self.work.op(key)
+        if op == "insert":
+            return {**self.work.data(key), "_id": key}
+        document = dict(self.lookup(key) or {"_id": key})
+        if op == "update":
+            document.update(self.work.data(key))
+        return document
+
+    def _show(self, key):
+        """Draw one staged row with the tag of its pending operation (and of a failed flush)."""
+        op = self.work.op(key)
+        if op is None:
+            return
+        values = self.row_values(self._pending_document(key))
+        tags = (op, "failed") if self.work.error(key) else (op,)
+        if self.tree.exists(key):
+            self.tree.item(key, values=values, tags=tags)
+        else:
+            self.tree.insert("", "end", iid=key, values=values, tags=tags)
+
+    def mark_rows(self):
+        """Re-apply the pending state after the view redrew its rows (refresh, search)."""
+        for key in self.work.keys():
+            if self.work.op(key) == "insert" or self.tree.exists(key):
+                self._show(key)
+
+    def _update_controls(self):
+        pending = len(self.work)
+        state = "normal" if pending else "disabled"
+        self.apply_button.config(text=f"Apply ({pending})", state=state)
+        self.discard_button.config(state=state)
+        counts = {op: len(self.work.keys(op)) for op in ("insert", "update", "delete")}
+        self.summary_var.set(
+            f"{counts['insert']} new, {counts['update']} edited, {counts['delete']} deleted" if pending else ""
+        )
+
+    # Flushing
+
+    def flush(self):
+        """Write every staged change with one bulk_write; failed rows stay staged and marked."""
+        changes = self.work.changes()
+        if not changes:
+            return
+        self.flushing = True
+        self.apply_button.config(state="disabled")
+        self.discard_button.config(state="disabled")
+        self.loader.run(
+            None, apply_changes, self.db, self.entity, changes,
+            on_success=self._on_flushed,
+            on_error=self._on_flush_error,
+            message="Applying changes..."
+        )
+
+    def _on_flushed(self, report):
+        self.flushing = False
+        self.work.record_results(report["results"])
+        for result in report["results"]:
+            key = result["key"]
+            if not result["ok"]:
+                self._show(key)
+                continue
+            if result["op"] == "delete":
+                self.remove_row(key)
+                continue
+            if result["op"] == "insert" and self.tree.exists(key):
+                self.tree.delete(key)
+            self.upsert_row(result["document"])
+            self.tree.item(str(result["document"]["_id"]), tags=())
+        self._update_controls()
+
+        summary = f"{report['inserted']} added, {report['updated']} updated, {report['deleted']} deleted."
+        if not report["failed"]:
+            messagebox.showinfo("Changes Applied", summary, parent=self.window)
+            return
+        failures = [result for result in report["results"] if not result["ok"]]
+        lines = [f"{result['op']} {result['id'] or result['key']}: {result['error']}" for result in failures[:MAX_REPORTED_ERRORS]]
+        if len(failures) > MAX_REPORTED_ERRORS:
+            lines.append(f"... and {len(failures) - MAX_REPORTED_ERRORS} more")
+        messagebox.showwarning(
+            "Some Changes Failed",
+            f"{summary}\n{report['failed']} failed and are still staged (marked red):\n\n" + "\n".join(lines),
+            parent=self.window
+        )
+
+    def _on_flush_error(self, error):
+        self.flushing = False
+        self._update_controls()
+        messagebox.showerror("Error", f"Failed to apply changes; they are still staged: {error}", parent=self.window)
+
+    def discard(self):
+        """Forget every staged change and show the loaded rows again."""
+        if self.flushing:
+            return
+        if self.work and not messagebox.askyesno("Discard Changes", f"Discard {len(self.work)} staged changes?", parent=self.window):
+            return
+        self.work.clear()
+        self.redraw()
+        self._update_controls()